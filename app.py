@@ -1,10 +1,14 @@
 
 from flask import Flask, Response, render_template, request, jsonify
 import traceback
+import gzip
 import logging
 import unified
+import artifacts
 import db
-from utils import STATUS_KEYWORDS, classify_status
+import net
+from cache import ResultCache
+from utils import STATUS_KEYWORDS
 from werkzeug.datastructures.structures import ImmutableMultiDict
 
 # Ensure DB created on startup
@@ -16,10 +20,26 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
-try:
-    db.init_db()
-except Exception:
-    logger.exception("Failed to initialize DB")
+# Results served by /api/track; also fed by the watchlist checks
+result_cache = ResultCache()
+
+
+def startup() -> None:
+    """Create/migrate the database and load the state kept in it."""
+    try:
+        db.init_db()
+        # Remember which courier each ambiguous number resolved to across restarts
+        unified.load_resolutions(db.get_courier_resolutions(unified.MAX_RESOLUTIONS))
+        unified.set_resolution_store(db.save_courier_resolution, db.forget_courier_resolution)
+        result_cache.warm(db.recent_results(result_cache.maxsize))
+    except Exception:
+        logger.exception("Failed to initialize DB")
+
+
+# Parse workers (parsepool, "spawn") re-import the main script as
+# __mp_main__; they must not touch the database
+if __name__ != "__mp_main__":
+    startup()
 
 
 
@@ -29,18 +49,50 @@ def index() -> str:
 
 
 
+def _cache_key(inv, courier=None, probe=None) -> str:
+    # Plain lookups share entries with the watchlist checks (keyed by the
+    # tracking number alone); a courier or probe hint gets its own entry
+    if not courier and not probe:
+        return inv
+    return f"{inv}|{unified.courier_key(courier) or ''}|{probe or ''}"
+
+
 @app.route("/api/track", methods=["POST"])
 def api_track() -> Response:
     try:
         payload = request.get_json() or request.form
         inv = payload.get("tracking_number")
         debug = bool(payload.get("debug", False))
+        probe = payload.get("probe")
+        courier = payload.get("courier")
         if debug:
             logger.setLevel(logging.DEBUG)
         logger.debug("API track request: %s (debug=%s)", inv, debug)
         if not inv:
             return jsonify({"error": "Missing tracking_number"}), 400
-        result = unified.track(inv, debug=debug)
+        if probe and probe not in unified.PROBE_MODES:
+            return jsonify({"error": f"Unknown probe mode: {probe}"}), 400
+        if courier and unified.courier_key(courier) is None:
+            return jsonify({"error": f"Unknown courier: {courier}"}), 400
+        max_age = payload.get("max_age")
+        if max_age is not None:
+            try:
+                max_age = float(max_age)
+            except (TypeError, ValueError):
+                max_age = -1
+            if max_age < 0:
+                return jsonify({"error": "max_age must be a non-negative number of seconds"}), 400
+        inv = inv.strip()
+        key = _cache_key(inv, courier, probe)
+        result, cache_state, age = None, "bypass", None
+        if not debug:
+            # Debug lookups always go to the courier so the raw page is fresh
+            result, cache_state, age = result_cache.lookup(key, max_age=max_age)
+            if cache_state == "stale":
+                result_cache.refresh(key, lambda: unified.track(inv, probe=probe, courier=courier))
+        if result is None:
+            result = unified.track(inv, debug=debug, probe=probe, courier=courier)
+            result_cache.put(key, result)
         try:
             if isinstance(result, dict):
                 summary = {
@@ -52,18 +104,43 @@ def api_track() -> Response:
                 dbg = result.get('_debug')
                 if isinstance(dbg, dict):
                     summary['debug_keys'] = list(dbg.keys())
-                    summary['snippet_len'] = len(dbg.get('snippet', ''))
-                    summary['raw_len'] = dbg.get('length')
+                    summary['artifact'] = dbg.get('artifact')
+                    summary['raw_len'] = dbg.get('size')
                 logger.debug("Track summary: %s", summary)
         except Exception:
             logger.debug("Track result received (unable to summarize)")
-        return jsonify(result)
+        resp = jsonify(result)
+        resp.headers["X-Cache"] = cache_state.upper()
+        if cache_state in ("fresh", "stale"):
+            resp.headers["Age"] = str(int(age))
+        return resp
     except Exception as e:
         tb = traceback.format_exc()
         logger.exception("Unhandled error in /api/track")
         return jsonify({"error": str(e), "trace": tb}), 500
 
 
+@app.route("/api/artifacts/<digest>", methods=["GET"])
+def api_artifact(digest) -> Response:
+    """Full response body stored by a debug lookup (see ``artifacts.describe``)."""
+    if not artifacts.valid_digest(digest):
+        return jsonify({"error": "Invalid artifact id"}), 400
+    blob = artifacts.get_store().get_compressed(digest)
+    if blob is None:
+        return jsonify({"error": "Not found"}), 404
+    # Stored gzipped; pass it through as-is when the client accepts gzip
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        resp = Response(blob, mimetype="text/plain")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(gzip.decompress(blob), mimetype="text/plain")
+    resp.charset = "utf-8"
+    # Content-addressed: a digest always names the same body
+    resp.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
 # Note: some Flask versions may not have before_first_request available in test context,
 # so we initialize DB eagerly on import above instead.
 
@@ -71,38 +148,26 @@ def api_track() -> Response:
 
 @app.route('/api/tracked', methods=['GET'])
 def api_list_tracked() -> Response:
-    items = db.list_tracked()
-    sort = request.args.get('sort')
-    order = request.args.get('order', 'desc')
-    status_filter = request.args.get('status')
-    q = request.args.get('q')
-    if status_filter:
-        items = [it for it in items if classify_status((it.get('last_result') or {}).get('status') or '') == status_filter]
-    if q:
-        ql = q.lower()
-        def matches(it):
-            if ql in str(it.get('tracking','')).lower(): return True
-            if ql in str(it.get('label','') or '').lower(): return True
-            lr = it.get('last_result') or {}
-            if lr and ql in str(lr.get('status','')).lower(): return True
-            if lr and ql in str(lr.get('courier','')).lower(): return True
-            return False
-        items = [it for it in items if matches(it)]
-    if sort in ('created_at', 'last_checked'):
-        reverse = (order != 'asc')
-        items = sorted(items, key=lambda it: (it.get(sort) or ''), reverse=reverse)
-    elif sort == 'first_event':
-        from utils import parse_time_to_dt
-        def first_event_dt(it):
-            lr = it.get('last_result') or {}
-            hist = lr.get('history') if isinstance(lr.get('history'), list) else []
-            if hist and isinstance(hist[0], dict):
-                t = hist[0].get('time') or ''
-                return parse_time_to_dt(t)
-            return None
-        reverse = (order != 'asc')
-        items = sorted(items, key=lambda it: (first_event_dt(it) is None, first_event_dt(it)), reverse=reverse)
-    return jsonify({'items': items})
+    # Filtering, sorting and paging run in SQL on columns derived when each
+    # result is stored (see db.query_tracked)
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+    try:
+        items, next_cursor = db.query_tracked(
+            status=request.args.get('status'),
+            q=request.args.get('q'),
+            sort=request.args.get('sort'),
+            order=request.args.get('order', 'desc'),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'items': items, 'next_cursor': next_cursor})
 
 
 
@@ -142,35 +207,66 @@ def api_delete_tracked(item_id) -> Response:
 
 
 
+def _check_response(item_id, tracking, res, delta) -> dict:
+    # The client already has the stored history; send the summary and the
+    # events that are new since the last check (?full=1 for the whole result)
+    if isinstance(res, dict) and not request.args.get('full'):
+        res = {k: v for k, v in res.items() if k != 'history'}
+    return {
+        'id': item_id,
+        'tracking': tracking,
+        'result': res,
+        'changed': delta['changed'],
+        'new_events': delta['new_events'],
+        'last_checked': delta['last_checked'],
+    }
+
+
+def _failed_check(item, exc) -> dict:
+    # A lookup that raised (timeout, open circuit, ...) is reported but not
+    # stored: the item keeps its previous result, history and last_checked,
+    # and the cache keeps whatever it had
+    unchanged = {'changed': False, 'new_events': [], 'last_checked': item['last_checked']}
+    return _check_response(item['id'], item['tracking'], {'error': str(exc) or type(exc).__name__}, unchanged)
+
+
 @app.route('/api/tracked/<int:item_id>/check', methods=['POST'])
 def api_check_tracked(item_id) -> Response:
-    items = db.list_tracked()
-    item = next((i for i in items if i['id'] == item_id), None)
+    item = db.get_tracked(item_id)
     if not item:
         return jsonify({'error': 'Not found'}), 404
-    res = unified.track(item['tracking'])
-    db.update_tracked_result(item_id, res)
-    return jsonify({'id': item_id, 'result': res})
+    try:
+        res = unified.track(item['tracking'])
+    except Exception as e:
+        logger.exception('Check failed for %s', item['tracking'])
+        return jsonify(_failed_check(item, e))
+    delta = db.update_tracked_result(item_id, res)
+    result_cache.put(item['tracking'], res)
+    return jsonify(_check_response(item_id, item['tracking'], res, delta))
 
 
 
 @app.route('/api/tracked/check_all', methods=['POST'])
 def api_check_all() -> Response:
-    from datetime import datetime
     items = db.list_tracked()
     tracking_numbers = [i['tracking'] for i in items]
     try:
-        results = asyncio.run(unified.track_many_async(tracking_numbers))
+        results = net.run(unified.track_many_async(tracking_numbers))
     except Exception as e:
         tb = traceback.format_exc()
         logger.exception('Batch tracking failed')
         return jsonify({'error': str(e), 'trace': tb}), 500
+    # Lookups that raised are left out of the write (see _failed_check)
+    checked = [(i, res) for i, res in zip(items, results) if not isinstance(res, Exception)]
+    deltas = iter(db.update_tracked_results([(i['id'], res) for i, res in checked]))
     out = []
     for i, res in zip(items, results):
-        db.update_tracked_result(i['id'], res)
-        last_checked = datetime.utcnow().isoformat()
-        out.append({'id': i['id'], 'tracking': i['tracking'], 'result': res, 'last_checked': last_checked})
-    return jsonify({'results': out})
+        if isinstance(res, Exception):
+            out.append(_failed_check(i, res))
+            continue
+        result_cache.put(i['tracking'], res)
+        out.append(_check_response(i['id'], i['tracking'], res, next(deltas)))
+    return jsonify({'results': out, 'changed': sum(1 for o in out if o['changed'])})
 
 
 
@@ -0,0 +1,189 @@
+"""Content-addressed store for raw courier responses captured in debug mode.
+
+Debug lookups used to inline each full page in ``_debug.raw``, and failed
+probe attempts are nested in ``attempts``, so a single response could carry
+the same large HTML several times. Instead, adapters call ``describe(text)``:
+the body is written once, gzip-compressed, under its SHA-256 digest, and the
+result only carries the digest, the size and a short snippet. The full body
+is fetched on demand from ``/api/artifacts/<digest>``.
+
+The store lives in ``ARTIFACT_DIR`` (``artifacts/`` next to this file, or the
+``ARTIFACT_DIR`` environment variable) and is bounded by ``MAX_BYTES`` of
+compressed data; the least recently used artifacts are evicted first.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger("artifacts")
+
+ARTIFACT_DIR: str = os.environ.get("ARTIFACT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+# Compressed bytes kept on disk before the oldest artifacts are evicted
+MAX_BYTES: int = 64 * 1024 * 1024
+# Characters of the body included inline in debug output
+SNIPPET_CHARS: int = 500
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+def valid_digest(digest) -> bool:
+    return isinstance(digest, str) and bool(_DIGEST.match(digest))
+
+
+class ArtifactStore:
+    """Thread-safe gzip blob store keyed by SHA-256, bounded by ``max_bytes``."""
+
+    def __init__(self, root, max_bytes=MAX_BYTES):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # digest -> (compressed size, last used); built from disk on first use
+        self._index: dict[str, tuple[int, float]] | None = None
+        self._total = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._index)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load()
+            return self._total
+
+    def _path(self, digest) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".gz")
+
+    def _load(self) -> None:
+        if self._index is not None:
+            return
+        index = {}
+        if os.path.isdir(self.root):
+            for sub in os.scandir(self.root):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    digest = entry.name[:-3]
+                    if entry.name.endswith(".gz") and valid_digest(digest):
+                        st = entry.stat()
+                        index[digest] = (st.st_size, st.st_mtime)
+        self._index = index
+        self._total = sum(size for size, _used in index.values())
+
+    def _touch(self, digest) -> None:
+        size, _used = self._index[digest]
+        now = time.time()
+        self._index[digest] = (size, now)
+        try:
+            # mtime doubles as last-used time when the index is rebuilt
+            os.utime(self._path(digest), (now, now))
+        except OSError:
+            pass
+
+    def _drop(self, digest) -> None:
+        size, _used = self._index.pop(digest)
+        self._total -= size
+        try:
+            os.unlink(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep) -> None:
+        if self._total <= self.max_bytes:
+            return
+        for digest in sorted(self._index, key=lambda d: self._index[d][1]):
+            if self._total <= self.max_bytes:
+                break
+            if digest != keep:
+                self._drop(digest)
+
+    def put(self, data) -> str:
+        """Store ``data`` (str is UTF-8 encoded) if new; return its digest."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with self._lock:
+            self._load()
+            if digest in self._index:
+                if os.path.exists(path):
+                    self._touch(digest)
+                    return digest
+                self._drop(digest)
+            blob = gzip.compress(data, mtime=0)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+            self._index[digest] = (len(blob), time.time())
+            self._total += len(blob)
+            self._evict(keep=digest)
+        return digest
+
+    def get_compressed(self, digest) -> bytes | None:
+        """The stored gzip blob for ``digest``, or None if unknown/evicted."""
+        if not valid_digest(digest):
+            return None
+        with self._lock:
+            self._load()
+            if digest not in self._index:
+                return None
+            try:
+                with open(self._path(digest), "rb") as f:
+                    blob = f.read()
+            except FileNotFoundError:
+                self._drop(digest)
+                return None
+            self._touch(digest)
+        return blob
+
+    def get(self, digest) -> bytes | None:
+        blob = self.get_compressed(digest)
+        return gzip.decompress(blob) if blob is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._load()
+            for digest in list(self._index):
+                self._drop(digest)
+
+
+_store: ArtifactStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ArtifactStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(ARTIFACT_DIR, MAX_BYTES)
+        return _store
+
+
+def set_store(store: ArtifactStore | None) -> None:
+    """Use ``store`` from now on (None: recreate from the module settings)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def describe(text) -> dict:
+    """Store ``text`` and return ``{"artifact", "size", "snippet"}`` for ``_debug``.
+
+    If the store cannot be written, ``artifact`` is None; the lookup itself
+    never fails because of debug output.
+    """
+    text = text or ""
+    data = text.encode("utf-8")
+    try:
+        digest = get_store().put(data)
+    except OSError:
+        logger.warning("Could not store debug artifact", exc_info=True)
+        digest = None
+    return {"artifact": digest, "size": len(data), "snippet": text[:SNIPPET_CHARS]}
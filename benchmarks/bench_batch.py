@@ -0,0 +1,106 @@
+"""Batch refresh throughput with the parse stage inline or in a process pool.
+
+Runs a ``check_all``-sized batch of adapter lookups on one event loop, with
+the network replaced by recorded pages from ``tests/fixtures`` (padded to
+``--pad`` KB, like live pages) and a fixed per-request latency. Prints
+lookups per second for ``parsepool.WORKERS`` = 0 (parse on the event loop)
+and for pools of increasing size up to the number of cores. Offline; run
+from the repository root:
+
+    python benchmarks/bench_batch.py [--batch N] [--pad KB] [--latency MS]
+        [--workers 0,1,2,4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import net  # noqa: E402
+import parsepool  # noqa: E402
+import unified  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+FILLER = (
+    '<div class="menu"><ul>' + "".join(f'<li><a href="/m/{i}">메뉴 {i}</a></li>' for i in range(20)) + "</ul></div>"
+    '<script>var cfg = {"a": 1, "b": [1, 2, 3]}; function noop() { return cfg; }</script>\n'
+)
+
+# Adapter key -> recorded page
+PAGES = {
+    "lotte": "lotte.html",
+    "cu": "cupost.html",
+    "hanjin": "hanjin.html",
+    "koreapost": "koreapost.html",
+}
+
+
+def load(name, pad_kb):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        html = f.read()
+    if pad_kb:
+        filler = FILLER * max(1, pad_kb * 1024 // len(FILLER))
+        html = html.replace("</body>", filler + "</body>", 1)
+    return html
+
+
+async def batch(n, pages, latency):
+    current = {}
+
+    async def fake(url, **kw):
+        await asyncio.sleep(latency)
+        return SimpleNamespace(text=current[asyncio.current_task()], status_code=200, headers={})
+
+    net.aget = net.apost = fake
+    keys = list(pages)
+
+    async def one(i):
+        key = keys[i % len(keys)]
+        current[asyncio.current_task()] = pages[key]
+        return await getattr(unified, f"track_{key}_async")(f"{i:012d}")
+
+    results = await asyncio.gather(*(one(i) for i in range(n)))
+    assert all(r and r.get("history") for r in results)
+
+
+def run(workers, n, pages, latency):
+    parsepool.configure(workers)
+    try:
+        if workers:
+            # Start the workers outside the timed run
+            asyncio.run(batch(workers * 2, pages, 0))
+        t0 = time.perf_counter()
+        asyncio.run(batch(n, pages, latency))
+        return time.perf_counter() - t0
+    finally:
+        parsepool.configure(0)
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    default_workers = sorted({0, 1, *(w for w in (2, 4, 8, 16) if w <= cores), cores})
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--pad", type=int, default=256, metavar="KB")
+    ap.add_argument("--latency", type=float, default=50.0, metavar="MS")
+    ap.add_argument("--workers", default=",".join(map(str, default_workers)))
+    args = ap.parse_args(argv)
+
+    pages = {key: load(name, args.pad) for key, name in PAGES.items()}
+    parsepool.INLINE_BELOW = 0
+    print(f"{args.batch} lookups, {args.pad} KB pages, {args.latency:.0f} ms latency, {cores} cores")
+    print(f"{'workers':>8} {'seconds':>9} {'lookups/s':>10} {'speedup':>8}")
+    base = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        elapsed = run(workers, args.batch, pages, args.latency / 1000)
+        base = base or elapsed
+        print(f"{workers or 'inline':>8} {elapsed:>9.2f} {args.batch / elapsed:>10.1f} {base / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Watchlist database operations per second, per-call connections vs the pool.
+
+"before" opens a plain ``sqlite3`` connection for every call (rollback
+journal, default pragmas), which is how ``db.py`` used to work; "after" uses
+``db.pooled()`` (reused WAL connections with ``db.PRAGMAS``). Each mode runs
+on its own temporary database:
+
+- add / label / result / list: single-threaded ops/sec for ``add_tracked``,
+  ``update_tracked_label``, ``update_tracked_result`` and ``list_tracked``
+  over ``--rows`` watchlist items;
+- append: ``update_tracked_result`` where each check adds one event to a
+  history of 30+ events;
+- bulk result: results/sec stored by ``update_tracked_results`` for all
+  ``--rows`` items at once (as ``check_all`` does);
+- mixed: ``--readers`` threads listing while ``--writers`` threads store
+  results, with the number of "database is locked" errors.
+
+Run from the repository root:
+
+    python benchmarks/bench_db.py [--rows N] [--seconds S]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+RESULT = {
+    "courier": "CJ Logistics",
+    "tracking_number": "000000000000",
+    "status": "이동중",
+    "history": [{"time": f"2025-12-{d:02d} 10:00", "location": "허브", "message": "이동중"} for d in range(1, 9)],
+}
+
+
+def append_result(n, base=30):
+    history = [{"time": f"2025-11-01 {i // 60:02d}:{i % 60:02d}", "location": f"허브 {i}", "message": "이동중"} for i in range(base + n)]
+    return dict(RESULT, history=history, latest_event=history[-1])
+
+
+@contextmanager
+def per_call_connection():
+    conn = sqlite3.connect(str(db.DB_PATH))
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def rate(fn, seconds):
+    n = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn(n)
+        n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def single(rows, seconds):
+    ids = [db.add_tracked(f"B{i:08d}") for i in range(rows)]
+    out = {}
+    out["add"] = rate(lambda n: db.add_tracked(f"N{n:08d}"), seconds)
+    # Back to ``rows`` items, so both modes list the same amount
+    with db.pooled() as conn:
+        conn.execute("DELETE FROM tracked WHERE tracking LIKE 'N%'")
+        conn.commit()
+    out["label"] = rate(lambda n: db.update_tracked_label(ids[n % rows], f"label {n}"), seconds)
+    # A new status each time, so every call writes
+    out["result"] = rate(lambda n: db.update_tracked_result(ids[n % rows], dict(RESULT, status=f"이동중 {n}")), seconds)
+    # A long history that gains one event per check, as a parcel in transit does
+    out["append"] = rate(lambda n: db.update_tracked_result(ids[n % rows], append_result(n // rows)), seconds)
+    out["list"] = rate(lambda n: db.list_tracked(), seconds)
+    # update_tracked_results: results/sec when a whole refresh is stored at once
+    batches = rate(lambda n: db.update_tracked_results([(i, dict(RESULT, status=f"배송중 {n}")) for i in ids]), seconds)
+    out["bulk result"] = batches * rows
+    return out
+
+
+def mixed(readers, writers, seconds):
+    ids = [row["id"] for row in db.list_tracked()[:200]]
+    counts = {"read": 0, "write": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def work(kind):
+        n = 0
+        while time.perf_counter() < stop:
+            try:
+                if kind == "read":
+                    db.list_tracked()
+                else:
+                    db.update_tracked_result(ids[n % len(ids)], dict(RESULT, status=f"{threading.get_ident()} {n}"))
+                with lock:
+                    counts[kind] += 1
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                with lock:
+                    counts["locked"] += 1
+            n += 1
+
+    threads = [threading.Thread(target=work, args=("read",)) for _ in range(readers)]
+    threads += [threading.Thread(target=work, args=("write",)) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"read": counts["read"] / seconds, "write": counts["write"] / seconds, "locked": counts["locked"]}
+
+
+def run(mode, args):
+    saved = db.DB_PATH, db.pooled
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, f"{mode}.db")
+        if mode == "before":
+            db.pooled = per_call_connection
+        try:
+            db.init_db()
+            out = single(args.rows, args.seconds)
+            out.update({f"mixed {k}": v for k, v in mixed(args.readers, args.writers, args.seconds * 2).items()})
+        finally:
+            db.close_pool()
+            db.DB_PATH, db.pooled = saved
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--seconds", type=float, default=1.0, help="per measurement")
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--writers", type=int, default=2)
+    args = ap.parse_args(argv)
+
+    before, after = run("before", args), run("after", args)
+    print(f"{args.rows} rows; ops/sec (mixed: {args.readers} readers, {args.writers} writers)")
+    print(f"{'operation':<14} {'before':>10} {'after':>10} {'speedup':>8}")
+    for name in before:
+        b, a = before[name], after[name]
+        if name == "mixed locked":
+            print(f"{'locked errors':<14} {b:>10d} {a:>10d}")
+        else:
+            print(f"{name:<14} {b:>10.1f} {a:>10.1f} {a / b if b else float('inf'):>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
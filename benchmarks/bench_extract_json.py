@@ -0,0 +1,86 @@
+"""Microbenchmark for ``utils.extract_json`` on ordinary and pathological input.
+
+Each case is run at a few sizes so the scaling is visible: a linear
+extractor roughly doubles its time when the input doubles. Offline; run
+from the repository root:
+
+    python benchmarks/bench_extract_json.py [--repeat N] [--sizes KB,KB,...]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+
+DETAIL = {
+    "parcelResultMap": {"resultList": [{"invcNo": "123456789013", "sendrNm": "홍*동"}]},
+    "parcelDetailResultMap": {"resultList": [{"dTime": f"2025-12-{d:02d} 10:00", "regBranNm": "허브", "crgNm": "간선상차"} for d in range(1, 25)]},
+}
+
+
+def json_body(n):
+    """A JSON document (like CJ's detail response) of about ``n`` characters."""
+    rows = [{"time": "2025-12-16 11:13", "location": "서울", "message": "배송중"}] * max(1, n // 70)
+    return json.dumps({"trackingDetails": rows}, ensure_ascii=False)
+
+
+def html_with_var(n):
+    """A page of ``n`` characters with the data assigned to a JS variable at the end."""
+    page = "<div class='row'>{}</div><style>.a{color:red}</style>\n"
+    return page * (n // len(page)) + "<script>var trackingInfo = " + json.dumps(DETAIL) + ";</script>"
+
+
+def html_without_json(n):
+    """CSS/JS-heavy markup with many braces and no JSON at all."""
+    chunk = "<style>.a{color:red}.b{margin:0}</style><script>function f(x){ if (x) { return [x, 1]; } }</script>\n"
+    return chunk * (n // len(chunk))
+
+
+def unclosed_braces(n):
+    """Openers that never close: every start position scans to the end."""
+    return "{[" * (n // 2)
+
+
+def long_prefixes(n):
+    """Object starts whose content parses for a long way before failing."""
+    return '{"k": ' * (n // 6)
+
+
+CASES = [
+    ("json body", json_body),
+    ("html + var", html_with_var),
+    ("html, no json", html_without_json),
+    ("unclosed {[", unclosed_braces),
+    ("long prefixes", long_prefixes),
+]
+
+
+def bench(text, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        utils.extract_json(text)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--sizes", default="8,16,32", help="input sizes in KB")
+    args = ap.parse_args(argv)
+    sizes = [int(s) * 1024 for s in args.sizes.split(",")]
+
+    print(f"{'case':<15} " + " ".join(f"{s // 1024:>10}KB" for s in sizes))
+    for name, make in CASES:
+        row = [bench(make(size), args.repeat) for size in sizes]
+        print(f"{name:<15} " + " ".join(f"{t * 1000:>10.2f}ms" for t in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""GET /api/tracked page latency as the watchlist grows.
+
+Fills a temporary database with ``--sizes`` rows (a mix of checked and
+unchecked items with histories) and times ``db.query_tracked`` pages of
+``--limit`` items: the first page and a page 90% of the way through, for
+each sort key, with a status filter and with common, rare and
+two-character search terms. With keyset pagination, the derived-column
+indexes and the trigram and gram search indexes, all should stay roughly
+flat as the row count grows; ``--like`` runs the searches without the
+indexes. Run from the repository root:
+
+    python benchmarks/bench_list.py [--sizes 1000,10000,100000] [--limit 50] [--like]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+STATUSES = ("배송완료", "이동중", "조회불가")
+COURIERS = ("CJ Logistics", "Lotte", "Hanjin", "CVSNet (GS25)")
+
+QUERIES = {
+    "id": {},
+    "first_event": {"sort": "first_event"},
+    "created_at asc": {"sort": "created_at", "order": "asc"},
+    "last_checked": {"sort": "last_checked"},
+    "delivered+first": {"status": "delivered", "sort": "first_event"},
+    "q=hanjin": {"q": "hanjin"},
+    "q=00777 (rare)": {"q": "00777"},
+    "q=부산 (2 chars)": {"q": "부산"},
+}
+
+
+def fill(n):
+    rows = []
+    for i in range(n):
+        created = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00"
+        if i % 4 == 0:
+            rows.append((f"{i:012d}", None, None, None, created))
+            continue
+        location = "부산 터미널" if i % 50 == 1 else "허브"  # 2% of the rows
+        history = [{"time": f"2025-{1 + (i + d) % 12:02d}-{1 + (i + d) % 28:02d} 10:00", "location": location, "message": "이동중"} for d in range(5)]
+        result = {"courier": COURIERS[i % 4], "status": STATUSES[i % 3], "history": history}
+        rows.append((f"{i:012d}", f"item {i}", json.dumps(result, ensure_ascii=False), created, created))
+    with db.pooled() as conn:
+        conn.executemany("INSERT INTO tracked (tracking, label, last_result, last_checked, created_at) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    db.init_db()  # derives the new columns for the inserted rows
+
+
+def timed(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def deep_cursor(params, limit, fraction=0.9):
+    """Cursor of the page ``fraction`` of the way through the results."""
+    items, _ = db.query_tracked(**params)
+    target = int(len(items) * fraction)
+    cursor = None
+    seen = 0
+    while seen < target:
+        page, cursor = db.query_tracked(limit=min(db.MAX_PAGE_SIZE, target - seen), cursor=cursor, **params)
+        seen += len(page)
+        if not cursor:
+            break
+    return cursor
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--like", action="store_true", help="search with LIKE instead of the FTS indexes")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"median ms per page of {args.limit} (first page / 90% deep)")
+    print(f"{'query':<18}" + "".join(f"{n:>20}" for n in sizes))
+    results = {name: [] for name in QUERIES}
+    saved = db.DB_PATH
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = os.path.join(tmp, "list.db")
+            try:
+                db.init_db()
+                fill(n)
+                if args.like:
+                    db.FTS_AVAILABLE = False
+                for name, params in QUERIES.items():
+                    first = timed(lambda: db.query_tracked(limit=args.limit, **params))
+                    cursor = deep_cursor(params, args.limit)
+                    deep = timed(lambda: db.query_tracked(limit=args.limit, cursor=cursor, **params)) if cursor else first
+                    results[name].append((first, deep))
+            finally:
+                db.close_pool()
+                db.DB_PATH = saved
+    for name, row in results.items():
+        print(f"{name:<18}" + "".join(f"{f * 1000:>10.2f} /{d * 1000:>7.2f}" for f, d in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Per-courier HTML parse time for each available parser backend.
+
+Parses the recorded pages in ``tests/fixtures`` with every backend in
+``htmlparse.BACKENDS`` that is installed and prints the median time per
+parse. A second table compares building the full tree with parsing only
+each parser's declared regions (time and peak traced memory). Offline; run
+from the repository root:
+
+    python benchmarks/bench_parse.py [--repeat N] [--pad KB]
+
+``--pad`` inflates each page with that many KB of unrelated markup (menus,
+scripts) before the footer, closer to the size of live courier pages.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import htmlparse  # noqa: E402
+import net  # noqa: E402
+import tracking  # noqa: E402
+import unified  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+FILLER = (
+    '<div class="menu"><ul>' + "".join(f'<li><a href="/m/{i}">메뉴 {i}</a></li>' for i in range(20)) + "</ul></div>"
+    '<script>var cfg = {"a": 1, "b": [1, 2, 3]}; function noop() { return cfg; }</script>\n'
+)
+
+
+def load(name, pad_kb):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        html = f.read()
+    if pad_kb:
+        filler = FILLER * max(1, pad_kb * 1024 // len(FILLER))
+        html = html.replace("</body>", filler + "</body>", 1)
+    return html
+
+
+LOOP = asyncio.new_event_loop()
+
+
+def offline(adapter):
+    """Run an async adapter's parse step on ``html`` without the network."""
+    def parse(html):
+        async def fake(*a, **kw):
+            return SimpleNamespace(text=html, status_code=200, headers={})
+
+        net.aget = net.apost = fake
+        return LOOP.run_until_complete(adapter("0000000000"))
+    return parse
+
+
+CASES = [
+    ("lotte", "lotte.html", tracking.parse_tracking_html),
+    ("cupost", "cupost.html", tracking.parse_cupost_main),
+    ("hanjin", "hanjin.html", offline(unified.track_hanjin_async)),
+    ("koreapost", "koreapost.html", offline(unified.track_koreapost_async)),
+]
+
+
+def bench(fn, html, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def peak_memory(fn, html):
+    tracemalloc.start()
+    try:
+        fn(html)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--pad", type=int, default=0, metavar="KB")
+    args = ap.parse_args(argv)
+
+    backends = [b for b in htmlparse.BACKENDS if htmlparse.available(b)]
+    print(f"{'courier':<10} {'size':>8} " + " ".join(f"{b:>12}" for b in backends) + "   speedup")
+    for name, fixture, fn in CASES:
+        html = load(fixture, args.pad)
+        medians = []
+        for backend in backends:
+            htmlparse.set_parser(backend)
+            fn(html)  # warm up
+            medians.append(bench(fn, html, args.repeat))
+        speedup = medians[-1] / medians[0] if len(medians) > 1 else 1.0
+        print(f"{name:<10} {len(html):>8} " + " ".join(f"{m * 1000:>10.3f}ms" for m in medians) + f"   {speedup:.2f}x")
+    htmlparse.set_parser()
+
+    print(f"\nfull tree vs regions ({htmlparse.PARSER})")
+    print(f"{'courier':<10} {'full':>12} {'regions':>12} {'full peak':>12} {'regions peak':>13}")
+    for name, fixture, fn in CASES:
+        html = load(fixture, args.pad)
+        row = []
+        for enabled in (False, True):
+            htmlparse.REGIONS_ENABLED = enabled
+            fn(html)
+            row.append((bench(fn, html, args.repeat), peak_memory(fn, html)))
+        (t_full, m_full), (t_reg, m_reg) = row
+        print(f"{name:<10} {t_full * 1000:>10.3f}ms {t_reg * 1000:>10.3f}ms {m_full / 1024:>10.0f}KB {m_reg / 1024:>11.0f}KB")
+    htmlparse.REGIONS_ENABLED = True
+
+
+if __name__ == "__main__":
+    main()
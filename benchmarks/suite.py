@@ -0,0 +1,242 @@
+"""Offline benchmark suite for the parsing hot paths.
+
+Runs ``tracking.parse_tracking_html``, ``tracking.parse_cupost_main``,
+``utils.extract_json``, ``utils.normalize_history`` and each adapter's
+offline parse step (network calls replaced by recorded responses) over the
+pages in ``tests/fixtures``, as recorded and padded to larger sizes. For
+each case it reports ops/sec, p50/p99 latency and peak traced memory, and
+flags a regression when p50 or peak memory exceeds the stored baseline by
+more than its tolerance.
+
+Run from the repository root:
+
+    python benchmarks/suite.py                     # run, compare to baselines
+    python benchmarks/suite.py -k lotte            # only matching cases
+    python benchmarks/suite.py --update-baselines  # store this run as baseline
+
+or through pytest with ``RUN_BENCH=1 pytest -m bench``. Baselines
+(``benchmarks/baselines.json``) are machine-specific; refresh them when
+benchmarking on a different host.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import net  # noqa: E402
+import tracking  # noqa: E402
+import unified  # noqa: E402
+import utils  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Page sizes: as recorded, and padded with unrelated markup (bytes)
+SIZES = {"rec": 0, "64k": 64 * 1024, "256k": 256 * 1024}
+# A case regresses when its p50 is more than TOLERANCE (1.0 = 2x) above the
+# baseline and by at least MIN_DELTA seconds; timings on shared machines
+# easily swing by half
+TOLERANCE = 1.0
+MIN_DELTA = 0.0001
+# Peak traced memory barely varies between runs, so it gets a tighter bound
+MEMORY_TOLERANCE = 0.25
+MIN_PEAK_DELTA_KB = 16
+MIN_TIME = 0.2
+MIN_ROUNDS = 5
+MAX_ROUNDS = 2000
+
+FILLER = (
+    '<div class="menu"><ul>' + "".join(f'<li><a href="/m/{i}">메뉴 {i}</a></li>' for i in range(20)) + "</ul></div>"
+    '<script>var cfg = {"a": 1, "b": [1, 2, 3]}; function noop() { return cfg; }</script>\n'
+)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def padded(html, size):
+    """``html`` with filler before ``</body>`` (and after the data) up to ``size``."""
+    if not size or len(html) >= size:
+        return html
+    filler = FILLER * ((size - len(html)) // len(FILLER) + 1)
+    return html.replace("</body>", filler + "</body>", 1)
+
+
+def history(n):
+    layouts = ("2025-12-{d:02d} {h:02d}:{m:02d}", "2025.12.{d:02d} {h:02d}:{m:02d}", "{d} Dec 2025 {h:02d}:{m:02d}")
+    events = []
+    for i in range(n):
+        d, h, m = 1 + i % 28, (i * 7) % 24, (i * 13) % 60
+        events.append({"time": layouts[i % 3].format(d=d, h=h, m=m), "location": "허브", "message": "이동중"})
+    return events[::-1]
+
+
+class Offline:
+    """Runs an async adapter against a canned response on a private loop."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.text = ""
+
+    async def _respond(self, url, **kw):
+        if url == unified.CJ_TRACKING_URL:
+            return SimpleNamespace(text='<input type="hidden" name="_csrf" value="tok">', cookies={}, status_code=200, headers={})
+        return SimpleNamespace(text=self.text, content=self.text.encode("utf-8"), status_code=200, headers={})
+
+    def adapter(self, name):
+        fn = getattr(unified, f"track_{name}_async")
+
+        def parse(text):
+            self.text = text
+            return self.loop.run_until_complete(fn("0000000000"))
+        return parse
+
+    def __enter__(self):
+        self._saved = (net.aget, net.apost)
+        net.aget = net.apost = self._respond
+        return self
+
+    def __exit__(self, *exc):
+        net.aget, net.apost = self._saved
+        self.loop.close()
+
+
+def cases(offline):
+    """Yield ``(name, fn, input)`` for every benchmark."""
+    pages = {
+        "lotte": fixture("lotte.html"),
+        "cupost": fixture("cupost.html"),
+        "hanjin": fixture("hanjin.html"),
+        "koreapost": fixture("koreapost.html"),
+        "cvs": fixture("cvs.html"),
+    }
+    cj = fixture("cj_detail.json")
+    logen = fixture("logen.json")
+    for size_name, size in SIZES.items():
+        yield f"parse_tracking_html[{size_name}]", tracking.parse_tracking_html, padded(pages["lotte"], size)
+        yield f"parse_cupost_main[{size_name}]", tracking.parse_cupost_main, padded(pages["cupost"], size)
+        yield f"extract_json.var[{size_name}]", utils.extract_json, padded(pages["cvs"], size)
+        for name in ("lotte", "cu", "hanjin", "koreapost", "cvs"):
+            page = pages["cupost" if name == "cu" else name]
+            yield f"adapter.{name}[{size_name}]", offline.adapter(name), padded(page, size)
+    yield "extract_json.body", utils.extract_json, cj
+    yield "adapter.cj", offline.adapter("cj"), cj
+    yield "adapter.logen", offline.adapter("logen"), logen
+    for n in (10, 100, 1000):
+        # Memoized parse_time_to_dt: later rounds measure the warm path
+        yield f"normalize_history[{n}]", utils.normalize_history, history(n)
+
+
+def measure(fn, arg, min_time=MIN_TIME):
+    fn(arg)  # warm up
+    times = []
+    start = time.perf_counter()
+    while len(times) < MAX_ROUNDS and (len(times) < MIN_ROUNDS or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops": len(times) / sum(times),
+        "p50": times[len(times) // 2],
+        "p99": times[min(len(times) - 1, int(len(times) * 0.99))],
+        "mean": statistics.fmean(times),
+        "peak_kb": peak / 1024,
+        "rounds": len(times),
+    }
+
+
+def load_baselines(path=BASELINES):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results, path=BASELINES):
+    data = {name: {"p50": r["p50"], "peak_kb": r["peak_kb"]} for name, r in sorted(results.items())}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def regressions(results, baselines, tolerance=TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Names of cases whose p50 or peak memory is above baseline.
+
+    p50 may exceed it by ``tolerance`` and peak memory by
+    ``memory_tolerance`` (both fractions of the baseline).
+    """
+    out = []
+    for name, r in results.items():
+        base = baselines.get(name)
+        if not base:
+            continue
+        slower = r["p50"] > base["p50"] * (1 + tolerance) and r["p50"] - base["p50"] >= MIN_DELTA
+        peak = base.get("peak_kb")
+        bigger = (
+            peak is not None
+            and r["peak_kb"] > peak * (1 + memory_tolerance)
+            and r["peak_kb"] - peak >= MIN_PEAK_DELTA_KB
+        )
+        if slower or bigger:
+            out.append(name)
+    return out
+
+
+def run(select=None, min_time=MIN_TIME, report=print):
+    results = {}
+    with Offline() as offline:
+        for name, fn, arg in cases(offline):
+            if select and select not in name:
+                continue
+            results[name] = measure(fn, arg, min_time)
+            if report:
+                r = results[name]
+                report(
+                    f"{name:<32} {r['ops']:>10.1f}/s  p50 {r['p50'] * 1000:>8.3f}ms  "
+                    f"p99 {r['p99'] * 1000:>8.3f}ms  peak {r['peak_kb']:>8.0f}KB"
+                )
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("-k", dest="select", help="only run cases whose name contains this")
+    ap.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds to spend per case")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed p50 slowdown vs baseline (1.0 = 2x)")
+    ap.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="allowed peak memory growth vs baseline")
+    ap.add_argument("--update-baselines", action="store_true")
+    args = ap.parse_args(argv)
+
+    results = run(args.select, args.min_time)
+    if args.update_baselines:
+        baselines = load_baselines()
+        baselines.update({k: v for k, v in results.items()})
+        save_baselines(baselines)
+        print(f"Baselines written to {BASELINES}")
+        return 0
+    slow = regressions(results, load_baselines(), args.tolerance, args.memory_tolerance)
+    for name in slow:
+        print(f"REGRESSION: {name}")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
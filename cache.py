@@ -0,0 +1,211 @@
+"""Result caching and request coalescing for tracking lookups.
+
+``ResultCache`` is a bounded LRU + TTL cache for tracking results.
+
+Entries live for a TTL picked from the result's status class (see
+``utils.classify_status``): delivered parcels never change again, errors
+are retried soon and anything in transit is kept briefly. Once an entry
+expires it may still be served for ``stale_window`` seconds while a single
+background refresh fetches a new copy (stale-while-revalidate).
+
+Timestamps are wall-clock seconds so the cache can be warmed from the
+``last_checked`` column of ``tracked.db``.
+
+``SingleFlight`` deduplicates concurrent lookups: callers asking for a key
+that is already being fetched wait for that fetch instead of starting
+their own. It works across threads (Flask request handlers) and the
+shared network loop alike.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from utils import classify_status
+
+logger = logging.getLogger("cache")
+
+# TTL (seconds) per status class
+TTLS: dict[str, float] = {
+    "delivered": 30 * 24 * 3600.0,
+    "other": 300.0,
+    "error": 30.0,
+}
+STALE_WINDOW: float = 3600.0
+MAX_ENTRIES: int = 2048
+
+
+def status_class(result) -> str:
+    if not isinstance(result, dict) or result.get("error"):
+        return "error"
+    return classify_status(result.get("status") or "")
+
+
+class ResultCache:
+    """Thread-safe LRU cache of tracking results with per-status TTLs."""
+
+    def __init__(self, maxsize=MAX_ENTRIES, ttls=None, stale_window=STALE_WINDOW, clock=time.time, refresh_workers=4):
+        self.maxsize = maxsize
+        self.ttls = dict(TTLS if ttls is None else ttls)
+        self.stale_window = stale_window
+        self.clock = clock
+        self.refresh_workers = refresh_workers
+        self._data: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def ttl_for(self, result) -> float:
+        return self.ttls.get(status_class(result), self.ttls.get("other", 0.0))
+
+    def put(self, key, result, stored_at=None) -> None:
+        """Store ``result`` (fetched at ``stored_at``, default now)."""
+        if not isinstance(result, dict) or "_debug" in result:
+            return
+        stored_at = self.clock() if stored_at is None else stored_at
+        with self._lock:
+            self._data[key] = (result, stored_at, stored_at + self.ttl_for(result))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def lookup(self, key, max_age=None):
+        """Return ``(result, state, age)``.
+
+        ``state`` is ``"fresh"``, ``"stale"`` (expired but within the stale
+        window) or ``"miss"``. With ``max_age`` set, entries older than that
+        many seconds are treated as misses.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None, "miss", None
+            result, stored_at, expires = entry
+            age = max(0.0, now - stored_at)
+            if max_age is not None and age > max_age:
+                return None, "miss", age
+            if now < expires:
+                self._data.move_to_end(key)
+                return result, "fresh", age
+            if now < expires + self.stale_window:
+                return result, "stale", age
+            del self._data[key]
+            return None, "miss", age
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def refresh(self, key, fetch) -> bool:
+        """Refresh ``key`` in the background with ``fetch()``.
+
+        Only one refresh per key runs at a time; returns False if one is
+        already in flight.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix="cache-refresh")
+            executor = self._executor
+
+        def run():
+            try:
+                self.put(key, fetch())
+            except Exception:
+                logger.exception("Background refresh failed for %s", key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        executor.submit(run)
+        return True
+
+    def warm(self, items) -> int:
+        """Seed from tracked rows (``last_result``/``last_checked``), e.g. ``db.recent_results()``.
+
+        Later rows count as more recently used, so pass them least recent
+        first: once the cache is full, the earliest ones are evicted.
+        """
+        n = 0
+        for it in items:
+            result = it.get("last_result")
+            checked = it.get("last_checked")
+            if not isinstance(result, dict) or not checked:
+                continue
+            try:
+                # last_checked is stored as naive UTC
+                stored_at = datetime.fromisoformat(checked).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                continue
+            self.put(it["tracking"], result, stored_at=stored_at)
+            n += 1
+        return n
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key):
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self._calls[key] = Future()
+            return fut, True
+
+    def _finish(self, key, fut, result=None, exc=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if exc is None:
+            fut.set_result(result)
+        elif isinstance(exc, Exception):
+            fut.set_exception(exc)
+        else:
+            fut.cancel()
+
+    def do(self, key, fn):
+        """Return ``fn()``, or the result of the identical call in flight."""
+        fut, leader = self._join(key)
+        if not leader:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, fut, exc=e)
+            raise
+        self._finish(key, fut, result)
+        return result
+
+    async def do_async(self, key, fn):
+        """Async variant of ``do``; ``fn`` returns an awaitable."""
+        fut, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(fut)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, fut, exc=e)
+            raise
+        self._finish(key, fut, result)
+        return result
@@ -1,103 +1,842 @@
+import atexit
+import base64
 import sqlite3
 import json
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from utils import classify_status, event_key, parse_time_to_dt
+
+logger = logging.getLogger("db")
 
 DB_PATH: Path = Path(__file__).resolve().parent / "tracked.db"
 
-def get_conn() -> sqlite3.Connection:
-    conn: sqlite3.Connection = sqlite3.connect(str(DB_PATH))
+# Connection settings. WAL lets UI reads run while a refresh writes, and
+# synchronous=NORMAL is durable across application crashes in WAL mode
+# (only an OS crash can lose the last commits). Each connection keeps up to
+# STATEMENT_CACHE_SIZE prepared statements, which pays off now that
+# connections are reused.
+PRAGMAS: dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,  # KiB, i.e. 8 MB of page cache per connection
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,  # ms to wait for a lock before "database is locked"
+    "temp_store": "MEMORY",
+}
+STATEMENT_CACHE_SIZE: int = 256
+# Idle connections kept for reuse; busier moments open (and then close) more
+POOL_SIZE: int = 8
+
+
+def connect(path=None) -> sqlite3.Connection:
+    """Open a new connection to ``path`` (default ``DB_PATH``) with ``PRAGMAS``."""
+    conn: sqlite3.Connection = sqlite3.connect(
+        str(path or DB_PATH),
+        timeout=PRAGMAS["busy_timeout"] / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
     conn.row_factory = sqlite3.Row
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
     return conn
 
+
+def get_conn() -> sqlite3.Connection:
+    """A new connection of its own; the caller closes it."""
+    return connect()
+
+
+class ConnectionPool:
+    """Reusable connections to one database file, shared by all threads.
+
+    A connection is used by one thread at a time (checked out with
+    ``connection()``); up to ``size`` idle connections are kept open.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = str(path)
+        self.size = size
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = connect(self.path)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                # Not committed by the caller (error or read-only use)
+                conn.rollback()
+            with self._lock:
+                if not self._closed and len(self._idle) < self.size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def pool() -> ConnectionPool:
+    """The pool for the current ``DB_PATH`` (replaced when it changes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != str(DB_PATH):
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def pooled():
+    """``with pooled() as conn:`` borrow a connection; commit before leaving."""
+    return pool().connection()
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        p, _pool = _pool, None
+    if p is not None:
+        p.close()
+
+
+# Closing the last connection checkpoints the WAL into tracked.db
+atexit.register(close_pool)
+
+
 def init_db() -> None:
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS tracked (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tracking TEXT NOT NULL UNIQUE,
-            label TEXT,
-            last_result TEXT,
-            last_checked TEXT,
-            created_at TEXT NOT NULL
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tracked (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tracking TEXT NOT NULL UNIQUE,
+                label TEXT,
+                last_result TEXT,
+                last_checked TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
         )
-        """
+        # If the column 'label' was added after table creation in older DBs,
+        # ensure it exists (SQLite ignores ADD COLUMN if exists, so we guard)
+        try:
+            c.execute("SELECT label FROM tracked LIMIT 1")
+        except sqlite3.OperationalError:
+            # Column missing; add it
+            c.execute("ALTER TABLE tracked ADD COLUMN label TEXT")
+        # Columns derived from last_result when it is written, so listing,
+        # filtering and sorting never parse the JSON (see derived_columns)
+        have = {r[1] for r in c.execute("PRAGMA table_info(tracked)")}
+        for name in DERIVED_COLUMNS:
+            if name not in have:
+                c.execute(f"ALTER TABLE tracked ADD COLUMN {name} TEXT")
+        # Number of history events, or NULL for results without a history
+        if "event_count" not in have:
+            c.execute("ALTER TABLE tracked ADD COLUMN event_count INTEGER")
+        # History events, one row each, instead of inside last_result (see
+        # update_tracked_results). seq is the event's position in the
+        # history and data the event as returned by the adapter; id is the
+        # rowid events_fts refers to.
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                tracked_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                time TEXT NOT NULL,
+                location TEXT NOT NULL,
+                message TEXT NOT NULL,
+                at TEXT,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_events_seq ON events(tracked_id, seq)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_events_at ON events(tracked_id, at)")
+        c.execute(
+            "CREATE TRIGGER IF NOT EXISTS tracked_events_delete AFTER DELETE ON tracked BEGIN "
+            "DELETE FROM events WHERE tracked_id = old.id; END"
+        )
+        _migrate_history(c)
+        _backfill_derived(c)
+        _reclassify(c)
+        _create_search_index(c)
+        for name, expr in INDEXES.items():
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON tracked({expr})")
+        # Courier each ambiguous tracking number resolved to (see unified.py)
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS courier_cache (
+                tracking TEXT PRIMARY KEY,
+                courier TEXT NOT NULL,
+                resolved_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+def result_status_class(result) -> str:
+    """Status class stored for ``result`` (see ``utils.classify_status``)."""
+    status = result.get("status") if isinstance(result, dict) else None
+    return classify_status(status or "")
+
+
+# Derived columns; status_text is '' (not NULL) once derived
+DERIVED_COLUMNS = ("status_class", "status_text", "courier", "first_event_at", "last_event_at")
+
+# Sort key -> SQL expression. Items without a first event sort as newest
+# (first in descending order); unchecked items as checked longest ago.
+SORTS: dict[str, str] = {
+    "id": "id",
+    "created_at": "created_at",
+    "last_checked": "COALESCE(last_checked, '')",
+    "first_event": "COALESCE(first_event_at, '~')",
+}
+# One index per sort key, alone and after status_class, so every filtered
+# and sorted page is read in index order (status_class alone covers "id")
+INDEXES: dict[str, str] = {"idx_tracked_status_class": "status_class"}
+for _key, _expr in SORTS.items():
+    if _key != "id":
+        INDEXES[f"idx_tracked_{_key}"] = f"{_expr}, id"
+        INDEXES[f"idx_tracked_status_{_key}"] = f"status_class, {_expr}, id"
+# Largest page query_tracked returns
+MAX_PAGE_SIZE: int = 1000
+
+
+def derived_columns(result, rows=None) -> dict[str, str | None]:
+    """Values of ``DERIVED_COLUMNS`` for ``result``.
+
+    ``first_event_at``/``last_event_at`` are the earliest and latest
+    parseable history times (ISO 8601), or None. ``rows`` are the
+    ``event_rows`` of its history, if already computed.
+    """
+    r = result if isinstance(result, dict) else {}
+    if rows is None:
+        rows = event_rows(split_history(result)[1])
+    times = [at for _seq, at, _data in rows.values() if at]
+    return {
+        "status_class": result_status_class(result),
+        "status_text": str(r.get("status") or ""),
+        "courier": str(r.get("courier") or ""),
+        "first_event_at": min(times) if times else None,
+        "last_event_at": max(times) if times else None,
+    }
+
+
+def split_history(result) -> tuple[Any, list | None]:
+    """``result`` without its ``history`` list, and that list (or None)."""
+    if isinstance(result, dict) and isinstance(result.get("history"), list):
+        return {k: v for k, v in result.items() if k != "history"}, result["history"]
+    return result, None
+
+
+def event_rows(history, rows=None) -> dict[tuple, tuple[int, str | None, str]]:
+    """``{(time, location, message, n): (seq, at, data)}`` for ``history``.
+
+    ``n`` counts the earlier occurrences of the same event, so an event
+    listed twice is stored twice. ``at`` is the parsed event time (ISO 8601)
+    or None. With ``rows`` (those of the first ``len(rows)`` events), only
+    the events after them are parsed.
+    """
+    rows = dict(rows or {})
+    repeats = Counter(key[:3] for key in rows)
+    for seq, ev in enumerate((history or ())[len(rows):], start=len(rows)):
+        key = event_key(ev)
+        if isinstance(key, tuple):
+            key = tuple(str(part) for part in key)
+            dt = parse_time_to_dt(key[0]) if key[0] else None
+        else:
+            key, dt = (str(key), "", ""), None
+        rows[(*key, repeats[key])] = (seq, dt.isoformat() if dt else None, _dumps(ev))
+        repeats[key] += 1
+    return rows
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+_INSERT_EVENT = "INSERT INTO events (tracked_id, seq, time, location, message, at, data) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+def _event_inserts(item_id, rows, old=()) -> list[tuple]:
+    """``_INSERT_EVENT`` parameters for the ``rows`` of ``item_id`` not in ``old``."""
+    return [(item_id, seq, *key[:3], at, data) for key, (seq, at, data) in rows.items() if key not in old]
+
+
+def _event_data(c: sqlite3.Cursor, ids=None) -> dict[int, list[str]]:
+    """Stored events (``data``) of each of ``ids`` (default: every item), in order."""
+    if ids is None:
+        batches = [()]
+    else:
+        ids = list(ids)
+        batches = [ids[i:i + WRITE_CHUNK] for i in range(0, len(ids), WRITE_CHUNK)]
+    found: dict[int, list] = {}
+    for batch in batches:
+        where = f"WHERE tracked_id IN ({','.join('?' * len(batch))})" if batch else ""
+        c.execute(f"SELECT tracked_id, seq, data FROM events {where}", batch)
+        for item_id, seq, data in c.fetchall():
+            found.setdefault(item_id, []).append((seq, data))
+    # Put in history order here; the rows come in index order
+    return {item_id: [data for _seq, data in sorted(events)] for item_id, events in found.items()}
+
+
+def _histories(c: sqlite3.Cursor, ids=None) -> dict[int, list]:
+    """Stored history of each of ``ids`` (default: every item), in order."""
+    # One JSON array per item, so there is one json.loads per item
+    return {item_id: json.loads("[" + ",".join(data) + "]") for item_id, data in _event_data(c, ids).items()}
+
+
+def _load_result(raw, event_count, history) -> Any:
+    try:
+        result = json.loads(raw) if raw else None
+    except Exception:
+        return None
+    if event_count is not None and isinstance(result, dict):
+        result["history"] = history or []
+    return result
+
+
+def _migrate_history(c: sqlite3.Cursor) -> None:
+    # Results stored with the history inside last_result
+    c.execute(
+        "SELECT id, last_result FROM tracked "
+        "WHERE json_valid(last_result) AND json_type(last_result, '$.history') = 'array'"
     )
-    # If the column 'label' was added after table creation in older DBs,
-    # ensure it exists (SQLite ignores ADD COLUMN if exists, so we guard)
+    updates, inserts = [], []
+    for item_id, raw in c.fetchall():
+        summary, history = split_history(json.loads(raw))
+        rows = event_rows(history)
+        inserts.extend(_event_inserts(item_id, rows))
+        updates.append((json.dumps(summary, ensure_ascii=False), len(rows), item_id))
+    if updates:
+        c.executemany(_INSERT_EVENT, inserts)
+        c.executemany("UPDATE tracked SET last_result=?, event_count=? WHERE id=?", updates)
+
+
+def _backfill_derived(c: sqlite3.Cursor) -> None:
+    # Rows stored before the derived columns existed
+    c.execute("SELECT id, last_result, event_count FROM tracked WHERE status_text IS NULL")
+    rows = c.fetchall()
+    histories = _histories(c, [r[0] for r in rows]) if rows else {}
+    updates = []
+    for item_id, lr_raw, event_count in rows:
+        d = derived_columns(_load_result(lr_raw, event_count, histories.get(item_id)))
+        updates.append((*(d[name] for name in DERIVED_COLUMNS), item_id))
+    if updates:
+        assignments = ", ".join(f"{name}=?" for name in DERIVED_COLUMNS)
+        c.executemany(f"UPDATE tracked SET {assignments} WHERE id=?", updates)
+
+
+def _reclassify(c: sqlite3.Cursor) -> None:
+    # Refresh stored classes on startup in case STATUS_KEYWORDS changed
+    c.execute("SELECT id, status_text, status_class FROM tracked")
+    updates = []
+    for item_id, status, old in c.fetchall():
+        new = classify_status(status or "")
+        if new != old:
+            updates.append((new, item_id))
+    if updates:
+        c.executemany("UPDATE tracked SET status_class=? WHERE id=?", updates)
+
+
+# Full-text search over these columns of tracked and of events (see
+# _create_search_index)
+SEARCH_COLUMNS = ("tracking", "label", "courier", "status_text")
+EVENT_SEARCH_COLUMNS = ("location", "message")
+# Trigram index: shorter terms use the gram index (see _create_grams)
+FTS_MIN_TERM = 3
+# The gram indexes cover the first GRAM_MAX_TEXT characters of each row
+GRAM_MAX_TEXT = 1000
+# Set by init_db: whether this SQLite build has FTS5 with the trigram tokenizer
+FTS_AVAILABLE: bool = False
+
+
+def _create_search_index(c: sqlite3.Cursor) -> None:
+    """Create the ``tracked_fts``/``events_fts`` and ``tracked_grams``/``events_grams`` indexes.
+
+    The ``_fts`` tables are external-content FTS5 tables over
+    ``SEARCH_COLUMNS`` of ``tracked`` and ``EVENT_SEARCH_COLUMNS`` of
+    ``events``, kept in sync by triggers, so a new event only indexes
+    itself. The trigram tokenizer matches any substring of three or more
+    characters, in any script, case-insensitively. The ``_grams`` tables do
+    the same for one- and two-character terms.
+    """
+    global FTS_AVAILABLE
+    grams_reset = _create_gram_positions(c)
+    for name, table, columns in (("tracked", "tracked", SEARCH_COLUMNS), ("events", "events", EVENT_SEARCH_COLUMNS)):
+        if not _create_fts(c, f"{name}_fts", table, columns):
+            FTS_AVAILABLE = False
+            logger.warning("SQLite has no FTS5 trigram tokenizer; watchlist search falls back to LIKE")
+            return
+        _create_grams(c, f"{name}_grams", table, columns, grams_reset)
+    FTS_AVAILABLE = True
+
+
+def _create_fts(c: sqlite3.Cursor, name, table, columns) -> bool:
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{col}" for col in columns)
+    old_cols = ", ".join(f"old.{col}" for col in columns)
+    exists = c.execute("SELECT 1 FROM sqlite_master WHERE name=?", (name,)).fetchone()
     try:
-        c.execute("SELECT label FROM tracked LIMIT 1")
+        c.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+            f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')"
+        )
     except sqlite3.OperationalError:
-        # Column missing; add it
-        c.execute("ALTER TABLE tracked ADD COLUMN label TEXT")
-    conn.commit()
-    conn.close()
+        return False
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+    )
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+    )
+    # Only when a searched value changes: not on last_checked-only updates,
+    # results that keep their status, or events that merely moved
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in columns)
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {cols} ON {table} WHEN {changed} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+    )
+    if not exists:
+        c.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    return True
+
+
+def _create_gram_positions(c: sqlite3.Cursor) -> bool:
+    # 1..GRAM_MAX_TEXT, for the triggers to split text into grams (no CTEs
+    # in triggers). Returns True when the gram indexes must be rebuilt.
+    c.execute("CREATE TABLE IF NOT EXISTS gram_positions (n INTEGER PRIMARY KEY)")
+    if c.execute("SELECT COUNT(*) FROM gram_positions").fetchone()[0] == GRAM_MAX_TEXT:
+        return False
+    c.execute("DELETE FROM gram_positions")
+    c.executemany("INSERT INTO gram_positions VALUES (?)", ((n,) for n in range(1, GRAM_MAX_TEXT + 1)))
+    return True
+
+
+def _grams(columns, row) -> str:
+    # Every one- and two-character substring of the row's columns (``row``
+    # is new/old/the table), space-separated for the unicode61 tokenizer
+    text = " || char(10) || ".join(f"coalesce({row}.{col}, '')" for col in columns)
+    return (
+        "(SELECT group_concat(substr(v, n, 2) || ' ' || substr(v, n, 1), ' ') "
+        f"FROM gram_positions, (SELECT {text} AS v) WHERE n <= length(v))"
+    )
+
+
+def _create_grams(c: sqlite3.Cursor, name, table, columns, reset=False) -> None:
+    """Index one- and two-character terms in ``columns`` of ``table``.
+
+    A contentless FTS5 table holding each row's grams (see ``_grams``), so
+    a short term is a single token lookup rather than a ``LIKE`` scan. The
+    triggers compute the grams, the delete trigger the same ones again.
+    """
+    if reset:
+        for kind in ("insert", "delete", "update"):
+            c.execute(f"DROP TRIGGER IF EXISTS {name}_{kind}")
+        c.execute(f"DROP TABLE IF EXISTS {name}")
+    exists = c.execute("SELECT 1 FROM sqlite_master WHERE name=?", (name,)).fetchone()
+    c.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5(grams, content='', detail='none', tokenize='unicode61')")
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {name}(rowid, grams) VALUES (new.id, {_grams(columns, 'new')}); END"
+    )
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, grams) VALUES ('delete', old.id, {_grams(columns, 'old')}); END"
+    )
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in columns)
+    c.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {', '.join(columns)} ON {table} WHEN {changed} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, grams) VALUES ('delete', old.id, {_grams(columns, 'old')}); "
+        f"INSERT INTO {name}(rowid, grams) VALUES (new.id, {_grams(columns, 'new')}); END"
+    )
+    if not exists:
+        c.execute(f"INSERT INTO {name}(rowid, grams) SELECT id, {_grams(columns, table)} FROM {table}")
+
+
+def _search(q) -> tuple[str, list]:
+    """WHERE clause and parameters matching every whitespace-separated term of ``q``.
+
+    A term matches an item when it occurs in one of its ``SEARCH_COLUMNS``
+    or in the location or message of one of its events. Terms of three or
+    more characters use the trigram indexes, shorter ones of letters and
+    digits the gram indexes. Other short terms are checked with LIKE, on
+    the rows the indexes matched for the rest of the query.
+    """
+    clauses, params, likes = [], [], []
+    for term in q.split():
+        if FTS_AVAILABLE and len(term) >= FTS_MIN_TERM:
+            index = "fts"
+        elif FTS_AVAILABLE and term.isalnum():
+            index = "grams"
+        else:
+            likes.append(_like(term))
+            continue
+        phrase = '"' + term.replace('"', '""') + '"'
+        clauses.append(
+            f"(id IN (SELECT rowid FROM tracked_{index} WHERE tracked_{index} MATCH ?) OR id IN "
+            f"(SELECT tracked_id FROM events WHERE id IN (SELECT rowid FROM events_{index} WHERE events_{index} MATCH ?)))"
+        )
+        params.extend([phrase, phrase])
+    item_cols = " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in SEARCH_COLUMNS)
+    event_cols = " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in EVENT_SEARCH_COLUMNS)
+    for like in likes:
+        clauses.append(f"({item_cols} OR EXISTS (SELECT 1 FROM events WHERE tracked_id = tracked.id AND ({event_cols})))")
+        params.extend([like] * (len(SEARCH_COLUMNS) + len(EVENT_SEARCH_COLUMNS)))
+    return " AND ".join(clauses), params
+
+
+def _item(r, histories) -> dict[str, Any]:
+    return {
+        "id": r["id"],
+        "tracking": r["tracking"],
+        "label": r["label"],
+        "last_result": _load_result(r["last_result"], r["event_count"], histories.get(r["id"])),
+        "last_checked": r["last_checked"],
+        "created_at": r["created_at"],
+        "status_class": r["status_class"] or "other",
+    }
+
+
+_ITEM_COLUMNS = "id, tracking, label, last_result, last_checked, created_at, status_class, event_count"
+
 
 def list_tracked():
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
-    c.execute("SELECT id, tracking, label, last_result, last_checked, created_at FROM tracked ORDER BY id DESC")
-    rows = c.fetchall()
-    conn.close()
-    out = []
-    for r in rows:
-        # r indices: 0=id,1=tracking,2=label,3=last_result,4=last_checked,5=created_at
-        label = r[2]
-        lr_raw = r[3]
-        try:
-            lr: sqlite3.Any | None = json.loads(lr_raw) if lr_raw else None
-        except Exception:
-            lr = None
-        out.append({
-            "id": r[0],
-            "tracking": r[1],
-            "label": label,
-            "last_result": lr,
-            "last_checked": r[4],
-            "created_at": r[5],
-        })
-    return out
+    with pooled() as conn:
+        rows = conn.execute(f"SELECT {_ITEM_COLUMNS} FROM tracked ORDER BY id DESC").fetchall()
+        histories = _histories(conn.cursor())
+    return [_item(r, histories) for r in rows]
 
-def add_tracked(tracking, label=None) -> int | None:
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
-    now: str = datetime.utcnow().isoformat()
+
+def recent_results(limit) -> list[dict[str, Any]]:
+    """The ``limit`` most recently checked items, least recent first.
+
+    Only those items' events are read. Used to warm the result cache
+    without loading the whole watchlist.
+    """
+    with pooled() as conn:
+        rows = conn.execute(
+            f"SELECT {_ITEM_COLUMNS} FROM tracked WHERE last_checked IS NOT NULL "
+            "ORDER BY last_checked DESC, id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        histories = _histories(conn.cursor(), [r["id"] for r in rows])
+    return [_item(r, histories) for r in reversed(rows)]
+
+
+def get_tracked(item_id) -> dict[str, Any] | None:
+    with pooled() as conn:
+        row = conn.execute(f"SELECT {_ITEM_COLUMNS} FROM tracked WHERE id=?", (item_id,)).fetchone()
+        histories = _histories(conn.cursor(), [item_id]) if row else {}
+    return _item(row, histories) if row else None
+
+
+def _encode_cursor(value, item_id) -> str:
+    raw = json.dumps([value, item_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor) -> tuple[Any, int]:
     try:
-        c.execute("INSERT INTO tracked (tracking, label, created_at) VALUES (?, ?, ?)", (tracking, label, now))
-        conn.commit()
-        rowid: int | None = c.lastrowid
-    except sqlite3.IntegrityError:
-        # already exists
-        rowid = None
-    conn.close()
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(item_id)
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+
+
+def _like(q) -> str:
+    return "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def query_tracked(status=None, q=None, sort=None, order="desc", limit=None, cursor=None):
+    """One page of tracked items, filtered and sorted in SQL.
+
+    ``status`` is a status class, ``q`` search terms that must each occur in
+    the tracking number, label, courier, status or event locations/messages
+    (via the ``tracked_fts`` index), ``sort`` a key of ``SORTS`` (default: newest
+    added first) and ``order`` "asc" or "desc". With ``limit`` (capped at
+    ``MAX_PAGE_SIZE``), returns ``(items, next_cursor)``; pass the cursor back
+    for the following page (keyset pagination, so deep pages cost the same
+    as the first). Without it, returns every match and None.
+    """
+    expr = SORTS.get(sort or "id", SORTS["id"])
+    desc = order != "asc"
+    where, params = [], []
+    if status:
+        where.append("status_class = ?")
+        params.append(status)
+    if q and q.split():
+        clause, search_params = _search(q)
+        where.append(clause)
+        params.extend(search_params)
+    if cursor:
+        value, after_id = _decode_cursor(cursor)
+        op = "<" if desc else ">"
+        # Written out (rather than as a row value) so SQLite seeks the
+        # index on the sort expression
+        where.append(f"{expr} {op}= ? AND ({expr} {op} ? OR id {op} ?)")
+        params.extend([value, value, after_id])
+    direction = "DESC" if desc else "ASC"
+    sql = f"SELECT {_ITEM_COLUMNS}, {expr} AS sort_value FROM tracked"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {expr} {direction}, id {direction}"
+    if limit is not None:
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql += " LIMIT ?"
+        params.append(limit + 1)
+    with pooled() as conn:
+        rows = conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1]["sort_value"], rows[-1]["id"])
+        histories = _histories(conn.cursor(), [r["id"] for r in rows])
+    return [_item(r, histories) for r in rows], next_cursor
+
+
+def add_tracked(tracking, label=None) -> int | None:
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        now: str = datetime.utcnow().isoformat()
+        try:
+            c.execute("INSERT INTO tracked (tracking, label, created_at) VALUES (?, ?, ?)", (tracking, label, now))
+            conn.commit()
+            rowid: int | None = c.lastrowid
+        except sqlite3.IntegrityError:
+            # already exists
+            rowid = None
     return rowid
 
 
 def update_tracked_label(item_id, label) -> bool:
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
-    c.execute("UPDATE tracked SET label=? WHERE id=?", (label, item_id))
-    conn.commit()
-    updated: int = c.rowcount
-    conn.close()
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        c.execute("UPDATE tracked SET label=? WHERE id=?", (label, item_id))
+        conn.commit()
+        updated: int = c.rowcount
     return updated > 0
 
 def remove_tracked(item_id) -> bool:
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
-    c.execute("DELETE FROM tracked WHERE id=?", (item_id,))
-    conn.commit()
-    deleted: int = c.rowcount
-    conn.close()
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        c.execute("DELETE FROM tracked WHERE id=?", (item_id,))
+        conn.commit()
+        deleted: int = c.rowcount
     return deleted > 0
 
-def update_tracked_result(item_id, result) -> None:
-    conn: sqlite3.Connection = get_conn()
-    c: sqlite3.Cursor = conn.cursor()
+# Rows written per transaction by update_tracked_results
+WRITE_CHUNK: int = 500
+
+
+def _stored_events(c: sqlite3.Cursor, ids) -> tuple[dict[int, dict[tuple, tuple[int, str | None, str]]], dict[int, dict[tuple, int]]]:
+    """``event_rows`` as stored for each of ``ids``, and the row id of each event."""
+    found: dict[int, list] = {}
+    if ids:
+        c.execute(f"SELECT tracked_id, seq, id, time, location, message, at, data FROM events WHERE tracked_id IN ({','.join('?' * len(ids))})", ids)
+        for item_id, *row in c.fetchall():
+            found.setdefault(item_id, []).append(row)
+    stored: dict[int, dict] = {}
+    row_ids: dict[int, dict] = {}
+    for item_id, events in found.items():
+        rows, keys, repeats = {}, {}, Counter()
+        for seq, row_id, *event, at, data in sorted(events):
+            key = (*event, repeats[tuple(event)])
+            repeats[tuple(event)] += 1
+            rows[key] = (seq, at, data)
+            keys[key] = row_id
+        stored[item_id], row_ids[item_id] = rows, keys
+    return stored, row_ids
+
+
+def _stored_histories(c: sqlite3.Cursor, ids) -> dict[int, str]:
+    """Stored events of each of ``ids`` as the JSON array ``_dumps`` makes of a history."""
+    return {item_id: "[" + ", ".join(data) + "]" for item_id, data in _event_data(c, ids).items()}
+
+
+def _updated_rows(history, history_json, old) -> dict[tuple, tuple[int, str | None, str]]:
+    # Usually the stored history again, or it plus new events at the end:
+    # then only the new events are parsed
+    stored_rows = sorted(old.values())
+    if stored_rows and history:
+        stored_json = "[" + ", ".join(data for _seq, _at, data in stored_rows)
+        if history_json == stored_json + "]":
+            return old
+        if history_json.startswith(stored_json + ", "):
+            return event_rows(history, old)
+    return event_rows(history)
+
+
+def _event_moves(old, rows, row_ids) -> list[tuple]:
+    """``UPDATE events`` parameters taking the events of one item from ``old`` to ``rows``.
+
+    Ordered so that no two rows ever share a seq (``idx_events_seq`` is
+    unique): an event moves once the row at its new seq has moved away.
+    Events that move in a cycle (a swap) go through a negative seq.
+    """
+    pending = {key: row for key, row in rows.items() if key in old and old[key] != row}
+    holders = {old[key][0]: key for key in pending}
+    moves = []
+    while pending:
+        ready = [key for key, (seq, _at, _data) in pending.items() if holders.get(seq, key) == key]
+        if not ready:
+            key = next(iter(pending))
+            seq, at, data = pending[key]
+            moves.append((-1 - seq, at, data, row_ids[key]))
+            del holders[old[key][0]]
+            continue
+        for key in ready:
+            moves.append((*pending.pop(key), row_ids[key]))
+            if holders.get(old[key][0]) == key:
+                del holders[old[key][0]]
+    return moves
+
+
+def update_tracked_results(items) -> list[dict[str, Any]]:
+    """Store fresh results for many ``(item_id, result)`` pairs.
+
+    Returns one delta per pair, in order: ``{"changed": bool, "new_events":
+    [...], "last_checked": str}`` where ``new_events`` are the history events
+    not stored yet. ``last_result`` keeps the result without its history;
+    the events go to the ``events`` table, where only added, removed, moved
+    or edited events are written. Results identical to the stored one only
+    move ``last_checked``. Rows are written with ``executemany``, one
+    transaction per ``WRITE_CHUNK`` items.
+    """
+    items = list(items)
+    deltas: list[dict[str, Any]] = []
     now: str = datetime.utcnow().isoformat()
-    c.execute("UPDATE tracked SET last_result=?, last_checked=? WHERE id=?", (json.dumps(result, ensure_ascii=False), now, item_id))
-    conn.commit()
-    conn.close()
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        for start in range(0, len(items), WRITE_CHUNK):
+            chunk = items[start:start + WRITE_CHUNK]
+            ids = list({item_id for item_id, _result in chunk})
+            c.execute(f"SELECT id, last_result, event_count FROM tracked WHERE id IN ({','.join('?' * len(ids))})", ids)
+            stored = {r[0]: (r[1], r[2]) for r in c.fetchall()}
+            existing = set(stored)
+            stored_json = _stored_histories(c, ids)
+            # Compare serialised results first: an unchanged one (the usual
+            # re-check) needs no per-event work at all
+            prepared, seen = [], set()
+            for item_id, result in chunk:
+                summary, history = split_history(result)
+                blob = json.dumps(summary, ensure_ascii=False)
+                history_json = _dumps(history) if history else None
+                if history_json is None:
+                    same = item_id not in stored_json and (blob, None if history is None else 0) == stored.get(item_id)
+                else:
+                    same = stored_json.get(item_id) == history_json and (blob, len(history)) == stored.get(item_id)
+                prepared.append((item_id, result, blob, history, history_json, same and item_id not in seen))
+                seen.add(item_id)
+            stored_events, row_ids = _stored_events(c, list({p[0] for p in prepared if not p[5]}))
+            original = dict(stored_events)
+            changed, unchanged = {}, []
+            for item_id, result, blob, history, history_json, same in prepared:
+                delta: dict[str, Any] = {"changed": False, "new_events": [], "last_checked": now}
+                deltas.append(delta)
+                if same:
+                    unchanged.append((now, item_id))
+                    continue
+                old = stored_events.get(item_id, {})
+                rows = _updated_rows(history, history_json, old)
+                count = len(rows) if history is not None else None
+                if (blob, count) == stored.get(item_id) and rows == old:
+                    unchanged.append((now, item_id))
+                    continue
+                delta["changed"] = True
+                delta["new_events"] = [json.loads(row[2]) for key, row in rows.items() if key not in old]
+                d = derived_columns(result, rows)
+                changed[item_id] = (blob, now, count, *(d[name] for name in DERIVED_COLUMNS), item_id)
+                stored[item_id] = (blob, count)
+                stored_events[item_id] = rows
+            # Event writes: the difference to what was stored before the chunk
+            inserts, moves, deletes = [], [], []
+            for item_id in changed:
+                if item_id not in existing:
+                    continue  # removed from the watchlist meanwhile
+                old, rows = original.get(item_id, {}), stored_events[item_id]
+                ids_of = row_ids.get(item_id, {})
+                inserts.extend(_event_inserts(item_id, rows, old))
+                moves.extend(_event_moves(old, rows, ids_of))
+                deletes.extend((ids_of[key],) for key in old if key not in rows)
+            if changed:
+                assignments = ", ".join(f"{name}=?" for name in DERIVED_COLUMNS)
+                c.executemany(f"UPDATE tracked SET last_result=?, last_checked=?, event_count=?, {assignments} WHERE id=?", changed.values())
+            if deletes:
+                c.executemany("DELETE FROM events WHERE id=?", deletes)
+            if moves:
+                c.executemany("UPDATE events SET seq=?, at=?, data=? WHERE id=?", moves)
+            if inserts:
+                c.executemany(_INSERT_EVENT, inserts)
+            if unchanged:
+                c.executemany("UPDATE tracked SET last_checked=? WHERE id=?", unchanged)
+            conn.commit()
+    return deltas
+
+
+def update_tracked_result(item_id, result) -> dict[str, Any]:
+    """Store a fresh ``result`` for ``item_id``; see ``update_tracked_results``."""
+    return update_tracked_results([(item_id, result)])[0]
+
+
+def get_courier_resolutions(limit=None) -> dict[str, str]:
+    """``{tracking: courier}``, least recently resolved first.
+
+    With ``limit``, only the ``limit`` most recent resolutions are returned
+    and the older ones are deleted.
+    """
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        if limit is not None:
+            c.execute(
+                "DELETE FROM courier_cache WHERE tracking NOT IN "
+                "(SELECT tracking FROM courier_cache ORDER BY resolved_at DESC LIMIT ?)",
+                (limit,),
+            )
+            conn.commit()
+        c.execute("SELECT tracking, courier FROM courier_cache ORDER BY resolved_at")
+        rows = c.fetchall()
+    return {r[0]: r[1] for r in rows}
+
+def save_courier_resolution(tracking, courier) -> None:
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        now: str = datetime.utcnow().isoformat()
+        c.execute(
+            "INSERT INTO courier_cache (tracking, courier, resolved_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(tracking) DO UPDATE SET courier=excluded.courier, resolved_at=excluded.resolved_at",
+            (tracking, courier, now),
+        )
+        conn.commit()
+
+def forget_courier_resolution(tracking) -> None:
+    with pooled() as conn:
+        c: sqlite3.Cursor = conn.cursor()
+        c.execute("DELETE FROM courier_cache WHERE tracking=?", (tracking,))
+        conn.commit()
@@ -0,0 +1,70 @@
+"""Offline courier detection for tracking numbers.
+
+Length alone does not identify a courier (CJ, CVSNet, Lotte and CUpost all
+issue 12-digit numbers), so before probing over the network the candidate
+list for a number's format is reordered using
+
+- check digits: CJ, Lotte, Hanjin and Logen waybills end in a mod-7 check
+  digit (the first n-1 digits modulo 7); a number that fails it is unlikely
+  to be theirs, so they are tried last;
+- prefixes: leading digits of sample numbers of a courier move it up the
+  list. They are a soft hint only and never add or remove a candidate.
+
+Ties keep the original fallback order.
+"""
+
+
+def mod7_check(number: str) -> bool:
+    """True if the last digit is the remaining digits modulo 7."""
+    if len(number) < 2 or not number.isdigit():
+        return False
+    return int(number[:-1]) % 7 == int(number[-1])
+
+
+# Courier key -> check digit validator
+CHECK_DIGITS = {
+    "cj": mod7_check,
+    "lotte": mod7_check,
+    "hanjin": mod7_check,
+    "logen": mod7_check,
+}
+
+# Courier key -> leading digits of sample numbers (README, __main__ demos);
+# not published ranges, so they only reorder candidates
+PREFIXES: dict[str, tuple[str, ...]] = {
+    "cvs": ("2105",),
+    "lotte": ("4049",),
+}
+
+# Score multipliers
+PREFIX_BOOST = 4.0
+
+
+def score(number: str, key: str) -> float:
+    """Relative likelihood that ``number`` belongs to courier ``key`` (0 = check digit fails)."""
+    check = CHECK_DIGITS.get(key)
+    if check is not None and not check(number):
+        return 0.0
+    s = 1.0
+    if number.startswith(PREFIXES.get(key, ())):
+        s *= PREFIX_BOOST
+    return s
+
+
+def rank(number: str, candidates, names=None, hint=None):
+    """Order ``candidates`` (``(name, key)`` pairs) by likelihood for ``number``.
+
+    Couriers whose check digit fails keep their original order after the
+    rest; no candidate is added or dropped. A ``hint`` courier key is
+    always tried first (its display name is looked up in ``names``, a key ->
+    name map).
+    """
+    names = names or {}
+    scored = [(score(number, key), i, (name, key)) for i, (name, key) in enumerate(candidates)]
+    scored.sort(key=lambda c: (-c[0], c[1]))
+    ranked = [c for _s, _i, c in scored]
+
+    if hint:
+        ranked = [c for c in ranked if c[1] != hint]
+        ranked.insert(0, (names.get(hint, hint), hint))
+    return tuple(ranked)
@@ -0,0 +1,115 @@
+"""HTML parser backend for the courier page parsers.
+
+Every HTML parse in ``tracking.py`` and ``unified.py`` goes through
+``make_soup`` so the BeautifulSoup tree builder can be swapped in one place.
+By default the C-accelerated ``lxml`` builder is used when it is installed,
+otherwise the pure-Python ``html.parser``. Set ``HTML_PARSER`` in the
+environment (or call ``set_parser``) to force one.
+
+The parsers only use ``find``/``find_all``/``select`` and element text, which
+both builders produce identically for the recorded courier pages in
+``tests/fixtures`` (checked by ``tests/test_htmlparse.py``).
+
+Parsers that only read a few parts of a page declare them as ``Regions``
+(simple ``tag.class`` / ``tag#id`` selectors). Only those elements and their
+descendants are turned into tree nodes; headers, scripts and the rest of the
+page are skipped while parsing, which saves time and memory on large pages.
+Set ``REGIONS_ENABLED = False`` to always build the full tree.
+"""
+import os
+import re
+
+from bs4 import BeautifulSoup
+from bs4.filter import ElementFilter
+
+# Tree builders in order of preference
+BACKENDS: tuple[str, ...] = ("lxml", "html.parser")
+FALLBACK: str = "html.parser"
+
+
+def available(name: str) -> bool:
+    """True if BeautifulSoup can use the ``name`` tree builder here."""
+    if name == FALLBACK:
+        return True
+    try:
+        BeautifulSoup("", name)
+    except Exception:
+        return False
+    return True
+
+
+def default_parser() -> str:
+    forced = os.environ.get("HTML_PARSER")
+    if forced:
+        return forced if available(forced) else FALLBACK
+    return next(name for name in BACKENDS if available(name))
+
+
+PARSER: str = default_parser()
+REGIONS_ENABLED: bool = True
+
+_SELECTOR = re.compile(r"^([\w-]+)?(?:\.([\w-]+))?(?:#([\w-]+))?$")
+
+
+class Regions(ElementFilter):
+    """Keep only elements matching one of ``selectors`` (with their subtrees).
+
+    Each selector is ``tag``, ``.class``, ``#id`` or a combination such as
+    ``div.data_table`` or ``input#goodsStep``.
+    """
+
+    def __init__(self, *selectors: str) -> None:
+        super().__init__()
+        self.selectors = selectors
+        self._rules = []
+        for sel in selectors:
+            m = _SELECTOR.match(sel)
+            if not m or not any(m.groups()):
+                raise ValueError(f"Unsupported region selector: {sel!r}")
+            self._rules.append(m.groups())
+
+    def __repr__(self) -> str:
+        return f"Regions{self.selectors!r}"
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        attrs = attrs or {}
+        for tag, cls, id_ in self._rules:
+            if tag and tag != name:
+                continue
+            if id_ and attrs.get("id") != id_:
+                continue
+            if cls:
+                classes = attrs.get("class") or ""
+                if isinstance(classes, str):
+                    classes = classes.split()
+                if cls not in classes:
+                    continue
+            return True
+        return False
+
+    def allow_string_creation(self, string: str) -> bool:
+        # Text outside the kept regions is dropped; text inside them is
+        # always kept because only top-level nodes are filtered
+        return False
+
+
+def set_parser(name: str | None = None) -> str:
+    """Use ``name`` (default: best available) for subsequent parses; return it."""
+    global PARSER
+    if name is None:
+        name = default_parser()
+    elif not available(name):
+        raise ValueError(f"HTML parser backend not available: {name}")
+    PARSER = name
+    return PARSER
+
+
+def make_soup(markup, parser: str | None = None, regions: Regions | None = None) -> BeautifulSoup:
+    """Parse ``markup`` with the configured backend (or ``parser``).
+
+    With ``regions``, only the matching parts of the page are parsed into
+    the tree (unless ``REGIONS_ENABLED`` is off).
+    """
+    if regions is not None and REGIONS_ENABLED:
+        return BeautifulSoup(markup, parser or PARSER, parse_only=regions)
+    return BeautifulSoup(markup, parser or PARSER)
@@ -0,0 +1,353 @@
+"""Shared, pooled HTTP clients for the courier adapters.
+
+All adapters go through this module instead of opening their own
+``httpx.AsyncClient``. That way every
+lookup reuses warm keep-alive connections to each courier host:
+
+- one ``httpx.AsyncClient`` per event loop, with a cap on total
+  connections; per-courier concurrency and request rate are governed by
+  ``ratelimit.scheduler``;
+- a single background event loop that synchronous callers use via ``run()``,
+  so the async pool survives between ``track_*`` wrapper calls instead of
+  being thrown away by ``asyncio.run``.
+
+``arequest(..., stream=True)`` (or passing ``until``) streams the body
+through ``streaming.read``: the charset is detected once, reading stops as
+soon as the ``until`` watcher has seen what the adapter needs, and at most
+``MAX_RESPONSE_BYTES`` are read.
+
+Async requests are retried with jittered exponential backoff when they are
+idempotent (GETs, and lookups that pass ``idempotent=True``), and each host
+has a circuit breaker that fails fast with ``CircuitOpenError`` while the
+host is down, letting one probe request through after a cooldown.
+
+Clients are created lazily and closed by ``close()`` (registered atexit).
+"""
+import asyncio
+import atexit
+import logging
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+import ratelimit
+import streaming
+
+logger = logging.getLogger("net")
+
+# Default timeouts shared by every adapter (seconds)
+CONNECT_TIMEOUT: float = 5.0
+READ_TIMEOUT: float = 10.0
+
+# Connection pool sizing
+MAX_CONNECTIONS: int = 100
+KEEPALIVE_EXPIRY: float = 30.0
+
+# Size cap for streamed response bodies (bytes)
+MAX_RESPONSE_BYTES: int = 5 * 1024 * 1024
+
+# Retries for idempotent requests
+RETRIES: int = 2
+RETRY_BASE_DELAY: float = 0.25
+RETRY_MAX_DELAY: float = 4.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Circuit breakers (per host)
+BREAKER_FAILURE_THRESHOLD: int = 5
+BREAKER_COOLDOWN: float = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a host's breaker is open."""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"Circuit open for {host}; retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host.
+
+    ``closed``: requests flow. After ``failure_threshold`` consecutive
+    failures it turns ``open`` and rejects requests for ``cooldown``
+    seconds, then goes ``half_open`` and lets a single probe through; the
+    probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, host: str, failure_threshold: int | None = None, cooldown: float | None = None) -> None:
+        self.host = host
+        self.failure_threshold = BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.cooldown = BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot that ended without an outcome."""
+        with self._lock:
+            self._probing = False
+
+
+class _LoopState:
+    """Pooled async client, bound to one event loop."""
+
+    def __init__(self) -> None:
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    st = _states.get(loop)
+    if st is None or st.client.is_closed:
+        st = _states[loop] = _LoopState()
+    return st
+
+
+def async_client() -> httpx.AsyncClient:
+    """Return the pooled ``httpx.AsyncClient`` for the running event loop."""
+    return _state().client
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def breaker(host: str) -> CircuitBreaker:
+    """Return the circuit breaker for ``host``."""
+    with _lock:
+        br = _breakers.get(host)
+        if br is None:
+            br = _breakers[host] = CircuitBreaker(host)
+        return br
+
+
+def reset_breakers() -> None:
+    with _lock:
+        _breakers.clear()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _retry_after(resp) -> float:
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        return min(RETRY_MAX_DELAY, max(0.0, float(headers.get("Retry-After"))))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# -------------------------------------------------------------
+# Async requests (pooled httpx client)
+# -------------------------------------------------------------
+def _healthy(status_code: int) -> bool:
+    return status_code < 500 and status_code != 429
+
+
+async def _send(method: str, url: str, host: str, read=None, **kwargs):
+    # One attempt: take a slot from the courier's limiter and report the
+    # outcome and latency back so the limiter can adapt
+    client = _state().client
+    limiter = ratelimit.scheduler.for_host(host)
+    await limiter.acquire()
+    t0 = time.monotonic()
+    try:
+        if read is None:
+            resp = await client.request(method, url, **kwargs)
+        else:
+            async with client.stream(method, url, **kwargs) as stream:
+                resp = await read(stream)
+    except Exception:
+        limiter.record(False, time.monotonic() - t0)
+        raise
+    else:
+        limiter.record(_healthy(resp.status_code), time.monotonic() - t0)
+        return resp
+    finally:
+        limiter.release()
+
+
+async def arequest(
+    method: str,
+    url: str,
+    *,
+    idempotent: bool | None = None,
+    retries: int | None = None,
+    stream: bool = False,
+    until=None,
+    max_bytes: int | None = None,
+    **kwargs,
+):
+    """Send a request on the shared async client.
+
+    Returns an ``httpx.Response``, or a ``streaming.StreamedResponse`` when
+    ``stream`` is set or an ``until`` watcher is given (see
+    ``streaming.read``; ``max_bytes`` defaults to ``MAX_RESPONSE_BYTES``).
+
+    Transport errors and ``RETRY_STATUS`` responses are retried up to
+    ``retries`` (default ``RETRIES``) times with jittered exponential
+    backoff, but only for idempotent requests: GETs by default, other
+    methods when the caller passes ``idempotent=True``. Raises
+    ``CircuitOpenError`` without sending anything while the host's breaker
+    is open.
+    """
+    host = host_of(url)
+    read = None
+    if stream or until is not None:
+        cap = MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+
+        async def read(resp):
+            return await streaming.read(resp, until=until, max_bytes=cap)
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    attempts = 1 + ((RETRIES if retries is None else retries) if idempotent else 0)
+    br = breaker(host)
+    for attempt in range(attempts):
+        if not br.allow():
+            raise CircuitOpenError(host, br.retry_in())
+        last = attempt + 1 >= attempts
+        try:
+            resp = await _send(method, url, host, read, **kwargs)
+        except httpx.TransportError as e:
+            br.record_failure()
+            if last:
+                raise
+            delay = backoff_delay(attempt)
+            logger.debug("%s %s failed (%r); retry %d in %.2fs", method, url, e, attempt + 1, delay)
+        except BaseException:
+            br.release_probe()
+            raise
+        else:
+            if resp.status_code not in RETRY_STATUS:
+                br.record_success()
+                return resp
+            br.record_failure()
+            if last:
+                return resp
+            delay = max(backoff_delay(attempt), _retry_after(resp))
+            logger.debug("%s %s returned %d; retry %d in %.2fs", method, url, resp.status_code, attempt + 1, delay)
+        await asyncio.sleep(delay)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+# -------------------------------------------------------------
+# Background loop for synchronous callers
+# -------------------------------------------------------------
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            t = threading.Thread(target=loop.run_forever, name="courier-net", daemon=True)
+            t.start()
+            _loop, _loop_thread = loop, t
+        return _loop
+
+
+def run(coro, timeout: float | None = None):
+    """Run ``coro`` on the shared background loop and return its result.
+
+    Use this instead of ``asyncio.run`` from synchronous code so the pooled
+    async client (and its warm connections) is reused across calls.
+    """
+    loop = _background_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("net.run() cannot be called from the shared network loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def aclose() -> None:
+    """Close the pooled async client of the running loop, if any."""
+    st = _states.pop(asyncio.get_running_loop(), None)
+    if st is not None:
+        await st.client.aclose()
+
+
+def close() -> None:
+    """Close all pooled clients and stop the background loop."""
+    global _loop, _loop_thread
+    with _lock:
+        loop, _loop = _loop, None
+        _loop_thread = None
+    if loop is not None and not loop.is_closed():
+        try:
+            asyncio.run_coroutine_threadsafe(aclose(), loop).result(5)
+        except Exception:
+            logger.debug("Failed to close async client cleanly", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(close)
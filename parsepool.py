@@ -0,0 +1,103 @@
+"""Optional process pool for the CPU-bound parse step of the adapters.
+
+The async adapters fetch a page on the event loop and then parse it. Parsing
+a large page with BeautifulSoup blocks the loop, which stalls every other
+lookup in a ``track_many_async`` batch, and only ever uses one core. With a
+pool configured, ``run()`` sends the body to a worker process instead; the
+worker returns the normalized result dict and the loop keeps serving network
+I/O in the meantime.
+
+The pool is off by default (``WORKERS = 0``: parse inline, as before). Set
+``PARSE_WORKERS`` in the environment or call ``configure(n)``. Bodies shorter
+than ``INLINE_BELOW`` characters are still parsed inline, since shipping them
+to a worker costs more than parsing them. Workers are started with the
+``spawn`` method (safe alongside the network loop thread, and the only one on
+Windows) and use the parent's ``htmlparse`` settings.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import htmlparse
+
+logger = logging.getLogger("parsepool")
+
+
+def _env_workers() -> int:
+    try:
+        return max(0, int(os.environ.get("PARSE_WORKERS") or 0))
+    except ValueError:
+        return 0
+
+
+WORKERS: int = _env_workers()
+INLINE_BELOW: int = 16 * 1024
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def _init_worker(parser, regions_enabled):
+    htmlparse.set_parser(parser)
+    htmlparse.REGIONS_ENABLED = regions_enabled
+
+
+def configure(workers: int | None = None) -> int:
+    """Use ``workers`` processes (0 = parse inline; None = ``os.cpu_count()``).
+
+    An existing pool is shut down and replaced on next use. Returns the size.
+    """
+    global WORKERS
+    if workers is None:
+        workers = os.cpu_count() or 1
+    WORKERS = max(0, int(workers))
+    shutdown()
+    return WORKERS
+
+
+def pool() -> ProcessPoolExecutor | None:
+    """The shared pool, started on first use; None when disabled."""
+    global _pool
+    if WORKERS <= 0:
+        return None
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(htmlparse.PARSER, htmlparse.REGIONS_ENABLED),
+            )
+        return _pool
+
+
+def shutdown(wait: bool = True) -> None:
+    global _pool
+    with _lock:
+        p, _pool = _pool, None
+    if p is not None:
+        p.shutdown(wait=wait, cancel_futures=True)
+
+
+async def run(fn, text, *args):
+    """Return ``fn(text, *args)``, computed in the pool when one is configured.
+
+    ``fn`` must be a module-level function (workers import it by name) whose
+    result can be pickled. If the pool breaks (a worker died), the pool is
+    discarded and the body is parsed inline.
+    """
+    p = pool() if len(text) >= INLINE_BELOW else None
+    if p is None:
+        return fn(text, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(p, functools.partial(fn, text, *args))
+    except BrokenProcessPool:
+        logger.warning("Parse pool broke; restarting it and parsing inline")
+        shutdown(wait=False)
+        return fn(text, *args)
@@ -0,0 +1,228 @@
+"""Per-courier concurrency caps and adaptive rate control.
+
+Every async request made through ``net.arequest`` takes a slot from the
+limiter of the courier that owns the target host. A limiter combines
+
+- a concurrency cap that follows AIMD: it grows by roughly one slot per
+  window of healthy responses and is halved on errors (exceptions, 429/5xx
+  or latency above ``latency_target``);
+- a token bucket (``rate`` requests/second, ``burst`` tokens) whose rate is
+  scaled down and back up the same way.
+
+``max_concurrency`` and ``rate`` are the ceilings the limiter recovers to, so
+raising them in ``COURIER_LIMITS`` (or via ``configure``) lets batch
+refreshes run as fast as each host allows.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Courier hosts, keyed to the adapter names used in unified.py
+COURIER_HOSTS: dict[str, str] = {
+    "www.cjlogistics.com": "cj",
+    "www.cvsnet.co.kr": "cvs",
+    "www.lotteglogis.com": "lotte",
+    "www.cupost.co.kr": "cu",
+    "www.hanjin.co.kr": "hanjin",
+    "service.epost.go.kr": "koreapost",
+    "www.kglogis.co.kr": "kgl",
+    "www.ds3211.co.kr": "daesin",
+    "www.ilogen.com": "logen",
+}
+
+DEFAULT_LIMITS: dict = {
+    "max_concurrency": 8,
+    "rate": 10.0,
+    "burst": 10,
+}
+
+# Per-courier overrides of DEFAULT_LIMITS
+COURIER_LIMITS: dict[str, dict] = {
+    "cj": {"max_concurrency": 6, "rate": 8.0},
+    "koreapost": {"max_concurrency": 4, "rate": 5.0},
+}
+
+
+class CourierLimiter:
+    """AIMD concurrency limit plus token bucket for one courier."""
+
+    def __init__(
+        self,
+        name,
+        max_concurrency=8,
+        rate=None,
+        burst=None,
+        min_concurrency=1,
+        latency_target=5.0,
+        decrease=0.5,
+        rate_increase=0.05,
+        min_rate_factor=0.1,
+        cooldown=1.0,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.rate_increase = rate_increase
+        self.min_rate_factor = min_rate_factor
+        self.cooldown = cooldown
+
+        self.limit = float(self.max_concurrency)
+        self.rate_factor = 1.0
+        self.inflight = 0
+        self.successes = 0
+        self.errors = 0
+        self.latency_ewma = None
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._last_cut = float("-inf")
+        self._waiters = deque()
+        # Limiters are shared by every event loop in the process
+        self._lock = threading.Lock()
+
+    # -- concurrency ------------------------------------------------------
+    async def acquire(self):
+        """Wait for a concurrency slot and a rate token."""
+        fut = None
+        with self._lock:
+            if self.inflight < int(self.limit) and not self._waiters:
+                self.inflight += 1
+            else:
+                fut = asyncio.get_running_loop().create_future()
+                self._waiters.append(fut)
+        if fut is not None:
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._waiters.remove(fut)
+                    except ValueError:
+                        pass
+                if fut.done() and not fut.cancelled():
+                    self.release()
+                raise
+        delay = self._reserve_token()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+            self._wake()
+
+    def _wake(self):
+        # caller holds self._lock
+        while self._waiters and self.inflight < int(self.limit):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.inflight += 1
+            fut.get_loop().call_soon_threadsafe(self._grant, fut)
+
+    def _grant(self, fut):
+        if fut.done():
+            # waiter went away after being picked; hand the slot back
+            self.release()
+        else:
+            fut.set_result(None)
+
+    # -- rate -------------------------------------------------------------
+    def current_rate(self):
+        return self.rate * self.rate_factor if self.rate else None
+
+    def _reserve_token(self):
+        """Take one token; return how long to wait before using it."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            rate = self.rate * self.rate_factor
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._stamp) * rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / rate
+
+    # -- feedback ---------------------------------------------------------
+    def record(self, ok, latency):
+        """Feed back one request outcome (AIMD)."""
+        now = time.monotonic()
+        with self._lock:
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            if ok and latency <= self.latency_target:
+                self.successes += 1
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+                self.rate_factor = min(1.0, self.rate_factor + self.rate_increase)
+                self._wake()
+            else:
+                if not ok:
+                    self.errors += 1
+                # Cut at most once per cooldown so one burst of failures
+                # does not collapse the limit to the floor
+                if now - self._last_cut >= self.cooldown:
+                    self.limit = max(float(self.min_concurrency), self.limit * self.decrease)
+                    self.rate_factor = max(self.min_rate_factor, self.rate_factor * self.decrease)
+                    self._last_cut = now
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "max_concurrency": self.max_concurrency,
+                "inflight": self.inflight,
+                "queued": len(self._waiters),
+                "rate": self.current_rate(),
+                "successes": self.successes,
+                "errors": self.errors,
+                "latency_ewma": self.latency_ewma,
+            }
+
+
+class Scheduler:
+    """Maps hosts to couriers and hands out their limiters."""
+
+    def __init__(self, limits=None, hosts=None, default=None):
+        self.hosts = dict(COURIER_HOSTS if hosts is None else hosts)
+        self.default = dict(DEFAULT_LIMITS if default is None else default)
+        self.limits = {k: dict(v) for k, v in (COURIER_LIMITS if limits is None else limits).items()}
+        self._limiters: dict[str, CourierLimiter] = {}
+        self._lock = threading.Lock()
+
+    def courier_for(self, host):
+        return self.hosts.get(host, host)
+
+    def limiter(self, courier):
+        with self._lock:
+            lim = self._limiters.get(courier)
+            if lim is None:
+                lim = self._limiters[courier] = CourierLimiter(courier, **{**self.default, **self.limits.get(courier, {})})
+            return lim
+
+    def for_host(self, host):
+        return self.limiter(self.courier_for(host))
+
+    def configure(self, courier, **limits):
+        """Set limits for ``courier``; its limiter restarts from the new ceilings."""
+        with self._lock:
+            self.limits.setdefault(courier, {}).update(limits)
+            self._limiters.pop(courier, None)
+
+    def stats(self):
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: lim.stats() for name, lim in limiters.items()}
+
+
+scheduler = Scheduler()
+
+
+def configure(courier, **limits):
+    scheduler.configure(courier, **limits)
@@ -185,6 +185,7 @@ document.addEventListener('DOMContentLoaded', function () {
               <p><strong>Attempts:</strong> ${JSON.stringify(dbg.attempts || [], null, 2)}</p>
               ${dbg.status_code ? `<p><strong>Status:</strong> ${dbg.status_code}</p>` : ''}
               ${dbg.headers ? `<p><strong>Headers:</strong> <pre class="result-json">${JSON.stringify(dbg.headers, null, 2)}</pre></p>` : ''}
+              ${dbg.artifact ? `<p><strong>Full response:</strong> <a href="/api/artifacts/${dbg.artifact}" target="_blank" rel="noopener">${dbg.size} bytes</a></p>` : ''}
               ${dbg.snippet ? `<details><summary>Raw snippet</summary><pre class="result-json">${dbg.snippet}</pre></details>` : ''}
             </div>
           </div>`;
@@ -211,7 +212,15 @@ document.addEventListener('DOMContentLoaded', function () {
   // renderTrackedList() and attach the handler once.
 
   // --- Tracked list UI ---
-  async function renderTrackedList() {
+  // The list is fetched one page at a time; "Show more" appends the page
+  // after data.next_cursor. Any other re-render starts from the first page.
+  const TRACKED_PAGE = 200;
+  let trackedRender = 0;
+
+  async function renderTrackedList(cursor) {
+    // Also used as an event listener: only a string is a page cursor
+    if (typeof cursor !== 'string') cursor = null;
+    const render = ++trackedRender;
     // Read UI controls for sorting/filtering
     let sortVal = document.getElementById('sort-select') ? document.getElementById('sort-select').value : '';
     // Default to 'first_event:desc' (newest-first) on initial load when no explicit sort is set
@@ -228,10 +237,14 @@ document.addEventListener('DOMContentLoaded', function () {
     const searchEl = document.getElementById('tracked-search');
     const searchVal = searchEl ? (searchEl.value || '').trim() : '';
     if (searchVal) q.push(`q=${encodeURIComponent(searchVal)}`);
+    q.push(`limit=${TRACKED_PAGE}`);
+    if (cursor) q.push(`cursor=${encodeURIComponent(cursor)}`);
     if (q.length) url += '?' + q.join('&');
 
     const r = await fetch(url, { cache: 'no-store' });
     const data = await r.json();
+    // a newer render (e.g. the search changed) has taken over
+    if (render !== trackedRender) return;
     const items = data.items || [];
     // no header badge — nothing to update; wrapper will show items
 
@@ -279,6 +292,7 @@ document.addEventListener('DOMContentLoaded', function () {
       function debounce(fn, ms){ let t = null; return (...args)=>{ if (t) clearTimeout(t); t = setTimeout(()=> fn(...args), ms); }; }
       if (searchEl) {
         searchEl.addEventListener('input', debounce(renderTrackedList, 250));
+        searchEl.addEventListener('keydown', (e)=> { if (e.key === 'Enter') renderTrackedList(); });
         // prevent parent click handlers from stealing focus when clicking here
         searchEl.addEventListener('mousedown', (e)=> e.stopPropagation());
         searchEl.addEventListener('click', (e)=> e.stopPropagation());
@@ -376,7 +390,7 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     const trackedListDiv = document.getElementById('tracked-list');
-    if (!items.length) {
+    if (!items.length && !cursor) {
       trackedListDiv.innerHTML = '<div class="card mt-3"><div class="card-body"><p class="note mb-0">No tracked numbers yet.</p></div></div>';
       return;
     }
@@ -444,10 +458,24 @@ document.addEventListener('DOMContentLoaded', function () {
       </div>`;
     }).join('');
 
-    trackedListDiv.innerHTML = html;
+    const moreHtml = data.next_cursor ? `<div class="text-center mt-2" id="tracked-more-wrap"><button class="btn btn-sm btn-outline-secondary" id="tracked-more">Show more</button></div>` : '';
+    // handlers below are attached to the cards rendered now only
+    let page = trackedListDiv;
+    if (cursor) {
+      const oldMore = document.getElementById('tracked-more-wrap');
+      if (oldMore) oldMore.remove();
+      page = document.createElement('div');
+      page.innerHTML = html;
+      trackedListDiv.appendChild(page);
+      trackedListDiv.insertAdjacentHTML('beforeend', moreHtml);
+    } else {
+      trackedListDiv.innerHTML = html + moreHtml;
+    }
+    const moreBtn = document.getElementById('tracked-more');
+    if (moreBtn) moreBtn.addEventListener('click', () => { moreBtn.disabled = true; renderTrackedList(data.next_cursor); });
 
     // attach handlers
-    trackedListDiv.querySelectorAll('.btn-check').forEach(btn=>{
+    page.querySelectorAll('.btn-check').forEach(btn=>{
       btn.addEventListener('click', async (e)=>{
         e.stopPropagation();
         const card = e.target.closest('.card');
@@ -480,7 +508,7 @@ document.addEventListener('DOMContentLoaded', function () {
       });
     });
 
-    trackedListDiv.querySelectorAll('.btn-delete').forEach(btn=>{
+    page.querySelectorAll('.btn-delete').forEach(btn=>{
       btn.addEventListener('click', async (e)=>{
         e.stopPropagation();
         const card = e.target.closest('.card');
@@ -492,7 +520,7 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 
     // Label edit handler (clicking label opens inline editor)
-    trackedListDiv.querySelectorAll('.tracked-label').forEach(b=>{
+    page.querySelectorAll('.tracked-label').forEach(b=>{
       b.addEventListener('click', (e)=>{
         e.stopPropagation();
         const card = e.target.closest('.card');
@@ -525,7 +553,7 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 
     // Expand/collapse behavior: clicking a card toggles its details and collapses others
-    trackedListDiv.querySelectorAll('.card').forEach(card => {
+    page.querySelectorAll('.card').forEach(card => {
       card.addEventListener('click', (e) => {
         if (e.target.closest('button')) return; // ignore button clicks
         const wasExpanded = card.classList.contains('expanded');
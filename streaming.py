@@ -0,0 +1,246 @@
+"""Streaming response bodies with early termination.
+
+``net.arequest(..., stream=True)`` reads the body through ``read()`` here
+instead of buffering the whole page:
+
+- the charset is detected once, from the ``Content-Type`` header, a BOM or
+  a ``<meta charset>`` in the first bytes, falling back to UTF-8 and then
+  CP949 (the legacy Korean encoding several courier sites still serve), and
+  the body is decoded incrementally with it;
+- each decoded chunk is fed to an optional watcher (``JsonClosed``,
+  ``ElementClosed``) and reading stops as soon as the watcher has seen the
+  block the adapter needs (once at least ``EARLY_STOP_MIN_BYTES`` have
+  been read, since an unfinished body costs the keep-alive connection).
+  ``until`` is a factory (e.g. ``JsonClosed`` or
+  ``element_closed("table.tb_deliver")``) so each retry starts afresh;
+- at most ``max_bytes`` (default ``net.MAX_RESPONSE_BYTES``) are read.
+
+The result is a ``StreamedResponse``, which has the ``text``, ``content``,
+``status_code`` and ``headers`` the adapters use from a regular response.
+"""
+import codecs
+import logging
+import re
+
+import utils
+
+logger = logging.getLogger("streaming")
+
+# Bytes gathered before guessing the charset from the body
+SNIFF_BYTES: int = 2048
+FALLBACK_CHARSET: str = "cp949"
+
+# Once the watcher is done, reading still goes on to the end of bodies up to
+# this size: stopping mid-body closes the connection instead of returning it
+# to the keep-alive pool, which only pays off for large pages
+EARLY_STOP_MIN_BYTES: int = 32768
+
+# Kept from the end of each chunk so patterns split across chunks still match
+_TAIL_CHARS: int = 256
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+# Supersets used in place of the declared charset
+_CHARSET_ALIASES = {"euc-kr": "cp949", "ks_c_5601-1987": "cp949", "ascii": "utf-8", "us-ascii": "utf-8"}
+
+
+def _codec(name) -> str | None:
+    if not name:
+        return None
+    name = name.strip().strip("\"'").lower()
+    name = _CHARSET_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(headers, head: bytes) -> str:
+    """Pick the charset for a body starting with ``head``."""
+    content_type = (headers or {}).get("content-type") or ""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            codec = _codec(value)
+            if codec:
+                return codec
+    for bom, codec in _BOMS:
+        if head.startswith(bom):
+            return codec
+    m = _META_CHARSET.search(head[:SNIFF_BYTES])
+    codec = _codec(m.group(1).decode("ascii", "ignore")) if m else None
+    if codec:
+        return codec
+    if "json" in content_type.lower():
+        return "utf-8"
+    try:
+        # final=False: a multi-byte character may be cut at the end of head
+        codecs.getincrementaldecoder("utf-8")().decode(head, False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_CHARSET
+
+
+class JsonClosed:
+    """Watcher that is done once the JSON ``utils.extract_json`` settles on has closed.
+
+    That is the whole body if it is a JSON document, the value of the
+    preferred JS variable (``trackingInfo``), or a value of any other
+    well-known variable that decodes to an object with ``trackingDetails``.
+    Other assignments (e.g. an earlier ``data = {...}``) are read past.
+    """
+
+    def __init__(self) -> None:
+        self._tail = ""
+        self._first = True
+        # Values still open: [rank, scanner, pieces of the value so far]
+        self._open: list[list] = []
+
+    def _closed(self, rank, value) -> bool:
+        if rank == 0:
+            return True
+        v = utils.loads_value(value)
+        return isinstance(v, dict) and "trackingDetails" in v
+
+    def feed(self, chunk: str) -> bool:
+        for cand in list(self._open):
+            rank, scanner, pieces = cand
+            end = scanner.feed(chunk)
+            if end is None and not scanner.failed:
+                pieces.append(chunk)
+                continue
+            self._open.remove(cand)
+            if end is not None and self._closed(rank, "".join(pieces) + chunk[:end]):
+                return True
+
+        text = self._tail + chunk
+        starts = []
+        if self._first and text.strip():
+            self._first = False
+            stripped = text.lstrip()
+            if stripped[0] in "{[":
+                starts.append((0, len(text) - len(stripped)))
+        # Assignments wholly inside the tail were seen with the last chunk
+        starts += [(rank, start) for rank, start in utils.json_vars(text) if start >= len(self._tail)]
+        self._tail = text[-_TAIL_CHARS:]
+        for rank, start in starts:
+            scanner = utils.BracketScanner()
+            end = scanner.feed(text, start)
+            if end is not None:
+                if self._closed(rank, text[start:end]):
+                    return True
+            elif not scanner.failed:
+                self._open.append([rank, scanner, [text[start:]]])
+        return False
+
+
+class ElementClosed:
+    """Watcher that is done once the element matching ``selector`` has closed.
+
+    ``selector`` is ``tag``, ``tag.class`` or ``tag#id`` (as for
+    ``htmlparse.Regions``); nested elements of the same tag are counted.
+    """
+
+    def __init__(self, selector: str) -> None:
+        tag, _, rest = selector.partition(".")
+        tag, _, id_ = tag.partition("#")
+        attr = ""
+        if rest:
+            attr = r"""[^>]*\bclass\s*=\s*["']?[^"'>]*\b""" + re.escape(rest) + r"\b"
+        elif id_:
+            attr = r"""[^>]*\bid\s*=\s*["']?""" + re.escape(id_) + r"""\b"""
+        self.selector = selector
+        self._open = re.compile(r"<" + re.escape(tag) + r"\b" + attr, re.I)
+        self._tags = re.compile(r"<(/?)" + re.escape(tag) + r"\b[^>]*>", re.I)
+        self._buf = ""
+        self._depth = 0
+        self._inside = False
+
+    def feed(self, chunk: str) -> bool:
+        text = self._buf + chunk
+        pos = 0
+        if not self._inside:
+            m = self._open.search(text)
+            if not m:
+                self._buf = text[-_TAIL_CHARS:]
+                return False
+            self._inside = True
+            pos = m.start()
+        consumed = pos
+        for m in self._tags.finditer(text, pos):
+            self._depth += -1 if m.group(1) else 1
+            consumed = m.end()
+            if self._depth <= 0:
+                return True
+        self._buf = text[max(consumed, len(text) - _TAIL_CHARS):]
+        return False
+
+
+def element_closed(selector: str):
+    """``until`` factory for ``ElementClosed(selector)``."""
+    return lambda: ElementClosed(selector)
+
+
+class StreamedResponse:
+    """Body read by ``read()``, shaped like the responses the adapters use."""
+
+    def __init__(self, resp, content: bytes, text: str, encoding: str, complete: bool, truncated: bool) -> None:
+        self.status_code = resp.status_code
+        self.headers = resp.headers
+        self.url = resp.url
+        self.cookies = resp.cookies
+        self.content = content
+        self.text = text
+        self.encoding = encoding
+        # complete: the whole body was read; truncated: stopped by the size cap
+        self.complete = complete
+        self.truncated = truncated
+
+    def __repr__(self) -> str:
+        state = "complete" if self.complete else ("truncated" if self.truncated else "stopped early")
+        return f"<StreamedResponse [{self.status_code}] {len(self.content)} bytes, {state}>"
+
+
+async def read(resp, until=None, max_bytes: int | None = None) -> StreamedResponse:
+    """Read ``resp`` (an httpx streaming response) as described above."""
+    watcher = until() if until is not None else None
+    content = bytearray()
+    parts: list[str] = []
+    decoder = None
+    encoding = None
+    stopped = truncated = finished = False
+
+    def decode(data: bytes, final=False) -> bool:
+        text = decoder.decode(data, final)
+        if text:
+            parts.append(text)
+            return watcher is not None and not stopped and watcher.feed(text)
+        return False
+
+    async for chunk in resp.aiter_bytes():
+        if max_bytes is not None and len(content) + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - len(content)]
+            truncated = True
+        content += chunk
+        if decoder is None:
+            if len(content) < SNIFF_BYTES and not truncated:
+                continue
+            encoding = detect_charset(resp.headers, bytes(content))
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            stopped = decode(bytes(content))
+        else:
+            stopped = decode(chunk) or stopped
+        if truncated or (stopped and len(content) >= EARLY_STOP_MIN_BYTES):
+            break
+    else:
+        finished = True
+
+    if decoder is None:
+        encoding = detect_charset(resp.headers, bytes(content))
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        stopped = decode(bytes(content), final=True)
+    else:
+        decode(b"", final=True)
+    if truncated:
+        logger.warning("Response from %s cut at %d bytes", resp.url, len(content))
+    return StreamedResponse(resp, bytes(content), "".join(parts), encoding, finished and not truncated, truncated)
@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+import artifacts
+import db
+import net
+import unified
+
+# app.py creates and migrates the database when it is imported; point it at
+# a scratch file before any test imports app, so tracked.db is never touched
+_db_dir = tempfile.mkdtemp(prefix="courier-tests-")
+db.DB_PATH = Path(_db_dir) / "tracked.db"
+
+
+def pytest_unconfigure(config):
+    db.close_pool()
+    shutil.rmtree(_db_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _isolate_courier_resolutions(monkeypatch):
+    # Resolved couriers are process-wide and app.py persists them to the DB;
+    # keep tests independent of each other and of tracked.db
+    unified.clear_resolutions()
+    monkeypatch.setattr(unified, '_resolution_store', None)
+    yield
+    unified.clear_resolutions()
+
+
+@pytest.fixture(autouse=True)
+def _reset_circuit_breakers():
+    net.reset_breakers()
+    yield
+    net.reset_breakers()
+
+
+@pytest.fixture(autouse=True)
+def _isolate_artifacts(tmp_path):
+    # Debug lookups store response bodies; keep them out of the project folder
+    artifacts.set_store(artifacts.ArtifactStore(tmp_path / "artifacts"))
+    yield
+    artifacts.set_store(None)
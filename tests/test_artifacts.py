@@ -0,0 +1,73 @@
+import gzip
+import json
+import os
+from types import SimpleNamespace
+
+import artifacts
+import net
+import unified
+from app import app
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'lotte.html')
+
+
+def test_put_is_content_addressed_and_deduplicated(tmp_path):
+    store = artifacts.ArtifactStore(tmp_path)
+    d1 = store.put('<html>배송</html>')
+    d2 = store.put('<html>배송</html>'.encode('utf-8'))
+    assert d1 == d2 and artifacts.valid_digest(d1)
+    assert len(store) == 1
+    assert store.get(d1).decode('utf-8') == '<html>배송</html>'
+    assert gzip.decompress(store.get_compressed(d1)) == store.get(d1)
+    assert store.get('0' * 64) is None
+    assert store.get('../etc/passwd') is None
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    digest = artifacts.ArtifactStore(tmp_path).put('page')
+    store = artifacts.ArtifactStore(tmp_path)
+    assert len(store) == 1 and store.get(digest) == b'page'
+
+
+def test_evicts_least_recently_used(tmp_path):
+    bodies = [os.urandom(4000).hex() for _ in range(3)]
+    one = len(gzip.compress(bodies[0].encode(), mtime=0))
+    store = artifacts.ArtifactStore(tmp_path, max_bytes=int(one * 2.5))
+    d0, d1 = store.put(bodies[0]), store.put(bodies[1])
+    store.get(d0)  # d1 is now the oldest
+    d2 = store.put(bodies[2])
+    assert store.get(d1) is None
+    assert store.get(d0) is not None and store.get(d2) is not None
+    assert store.total_bytes <= store.max_bytes
+
+
+def test_debug_output_references_artifact(monkeypatch):
+    html = open(FIXTURE, encoding='utf-8').read()
+
+    async def fake_apost(*a, **kw):
+        return SimpleNamespace(text=html, status_code=200, headers={})
+
+    monkeypatch.setattr(net, 'apost', fake_apost)
+    res = unified.track_lotte('404931271275', debug=True)
+    dbg = res['_debug']
+    assert 'raw' not in dbg
+    assert dbg['size'] == len(html.encode('utf-8'))
+    assert len(dbg['snippet']) <= artifacts.SNIPPET_CHARS
+    assert artifacts.get_store().get(dbg['artifact']).decode('utf-8') == html
+    assert html not in json.dumps(res, ensure_ascii=False)
+
+
+def test_artifact_endpoint():
+    digest = artifacts.get_store().put('<p>본문</p>')
+    with app.test_client() as c:
+        r = c.get(f'/api/artifacts/{digest}')
+        assert r.status_code == 200
+        assert r.get_data(as_text=True) == '<p>본문</p>'
+        assert 'immutable' in r.headers['Cache-Control']
+
+        rz = c.get(f'/api/artifacts/{digest}', headers={'Accept-Encoding': 'gzip'})
+        assert rz.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(rz.get_data()).decode('utf-8') == '<p>본문</p>'
+
+        assert c.get('/api/artifacts/' + 'a' * 64).status_code == 404
+        assert c.get('/api/artifacts/not-a-digest').status_code == 400
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import net
+import unified
+
+
+CVS_PAGE = 'var trackingInfo = ' + json.dumps({
+    'sender': {'name': 'Kim'},
+    'receiver': {'name': 'Lee'},
+    'trackingDetails': [
+        {'transTime': '2025-12-16T09:00:00', 'transWhere': 'Seoul', 'transKind': 'Picked up'},
+        {'transTime': '2025-12-16T15:30:00', 'transWhere': 'Busan', 'transKind': 'Delivered'},
+    ],
+}) + ';'
+
+KOREAPOST_PAGE = '''<table class="table_col"><tbody>
+<tr><td>2025.12.15 10:00</td><td>접수</td><td>서울</td></tr>
+<tr><td>2025.12.16 11:00</td><td>배달완료</td><td>부산</td></tr>
+</tbody></table>'''
+
+
+def fake_response(text):
+    return SimpleNamespace(text=text, content=text.encode('utf-8'), status_code=200, headers={})
+
+
+def test_cvs_async_normalized(monkeypatch):
+    async def fake_aget(url, **kw):
+        return fake_response(CVS_PAGE)
+    monkeypatch.setattr(net, 'aget', fake_aget)
+
+    res = asyncio.run(unified.track_cvs_async('210535605545'))
+    assert res['courier'] == 'CVSNet (GS25)'
+    assert res['sender'] == 'Kim' and res['receiver'] == 'Lee'
+    assert res['status'] == 'Delivered'
+    assert [h['time'] for h in res['history']] == ['2025-12-16 09:00', '2025-12-16 15:30']
+
+
+def test_koreapost_async_normalized(monkeypatch):
+    async def fake_aget(url, **kw):
+        return fake_response(KOREAPOST_PAGE)
+    monkeypatch.setattr(net, 'aget', fake_aget)
+
+    res = asyncio.run(unified.track_koreapost_async('1234567890123'))
+    assert res['courier'] == 'Korea Post'
+    assert res['status'] == '배달완료'
+    assert res['history'][0]['location'] == '서울'
+
+
+def test_track_many_async_stays_on_loop(monkeypatch):
+    async def fake_adapter(invc, debug=False):
+        return {'courier': 'Mock', 'tracking_number': invc, 'status': 'ok', 'history': []}
+
+    for key in ('cj', 'cvs', 'lotte', 'cu', 'hanjin', 'koreapost'):
+        monkeypatch.setattr(unified, f'track_{key}_async', fake_adapter)
+
+    def no_executor(*a, **kw):
+        raise AssertionError('batch must not use a thread pool')
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(loop, 'run_in_executor', no_executor)
+        return await unified.track_many_async(['404931271275', '25129173683', '1234567890', '1234567890123', 'bogus'])
+
+    results = asyncio.run(run())
+    assert [r.get('tracking_number') for r in results[:4]] == ['404931271275', '25129173683', '1234567890', '1234567890123']
+    assert results[4]['error'] == 'Unknown tracking format'
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import suite  # noqa: E402
+
+RUN_BENCH = os.getenv('RUN_BENCH') == '1'
+
+
+def test_regressions_compare_p50_with_tolerance():
+    baselines = {'a': {'p50': 1.0}, 'b': {'p50': 1.0}, 'tiny': {'p50': 1e-6}}
+    results = {'a': {'p50': 1.4}, 'b': {'p50': 1.6}, 'tiny': {'p50': 1e-5}, 'new': {'p50': 9.0}}
+    assert suite.regressions(results, baselines, tolerance=0.5) == ['b']
+
+
+def test_regressions_compare_peak_memory():
+    baselines = {'a': {'p50': 1.0, 'peak_kb': 100}, 'b': {'p50': 1.0, 'peak_kb': 100}, 'tiny': {'p50': 1.0, 'peak_kb': 1}}
+    results = {'a': {'p50': 1.0, 'peak_kb': 120}, 'b': {'p50': 1.0, 'peak_kb': 200}, 'tiny': {'p50': 1.0, 'peak_kb': 10}}
+    assert suite.regressions(results, baselines, memory_tolerance=0.25) == ['b']
+
+
+def test_logen_case_uses_a_logen_page():
+    with suite.Offline() as offline:
+        case = {name: (fn, arg) for name, fn, arg in suite.cases(offline)}['adapter.logen']
+        out = case[0](case[1])
+    assert out['history'] and out['history'][-1]['message'] == '배송완료'
+
+
+@pytest.mark.skipif(not RUN_BENCH, reason="Benchmarks disabled. Set RUN_BENCH=1 to enable")
+@pytest.mark.bench
+def test_benchmarks_within_baselines():
+    """Run the offline benchmark suite and compare it with the stored baselines.
+
+    Skipped by default: timings depend on the machine, so this is meant for
+    manual runs on the host the baselines were recorded on.
+    """
+    results = suite.run(report=None)
+    assert results
+    slow = suite.regressions(results, suite.load_baselines())
+    assert not slow, f"Slower than baseline: {slow}"
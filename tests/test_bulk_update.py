@@ -0,0 +1,96 @@
+import db
+import unified
+from app import app
+
+
+def _result(tracking, status):
+    return {'courier': 'Mock', 'tracking_number': tracking, 'status': status, 'history': [{'time': '2025-12-01 10:00', 'location': '허브', 'message': status}]}
+
+
+def test_update_tracked_results_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'bulk.db')
+    monkeypatch.setattr(db, 'WRITE_CHUNK', 3)
+    db.init_db()
+    ids = [db.add_tracked(f'T{i}') for i in range(10)]
+
+    deltas = db.update_tracked_results([(item_id, _result(f'T{n}', '이동중')) for n, item_id in enumerate(ids)])
+    assert len(deltas) == 10 and all(d['changed'] for d in deltas)
+
+    # Only every other item changes on the second pass
+    batch = [(item_id, _result(f'T{n}', '배송완료' if n % 2 else '이동중')) for n, item_id in enumerate(ids)]
+    deltas = db.update_tracked_results(batch)
+    assert [d['changed'] for d in deltas] == [bool(n % 2) for n in range(10)]
+    assert deltas[1]['new_events'][0]['message'] == '배송완료'
+
+    by_tracking = {it['tracking']: it for it in db.list_tracked()}
+    assert by_tracking['T1']['status_class'] == 'delivered'
+    assert by_tracking['T2']['status_class'] == 'other'
+    assert len({it['last_checked'] for it in by_tracking.values()}) == 1
+    assert db.update_tracked_results([]) == []
+
+
+def test_check_all_writes_one_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'bulk_api.db')
+    db.init_db()
+    calls = []
+    real = db.update_tracked_results
+
+    def spy(items):
+        items = list(items)
+        calls.append(len(items))
+        return real(items)
+
+    down = False
+
+    async def fake_track_async(tracking, debug=False, probe=None, courier=None):
+        if tracking == 'BAD' and down:
+            raise TimeoutError('read timeout')
+        return _result(tracking, '이동중')
+
+    monkeypatch.setattr(db, 'update_tracked_results', spy)
+    monkeypatch.setattr(unified, 'track_async', fake_track_async)
+    with app.test_client() as c:
+        for t in ('AAA', 'BBB', 'BAD'):
+            c.post('/api/tracked', json={'tracking': t})
+        c.post('/api/tracked/check_all')
+        good = {it['tracking']: it for it in db.list_tracked()}['BAD']
+        down = True
+        data = c.post('/api/tracked/check_all').get_json()
+        cached = c.post('/api/track', json={'tracking_number': 'BAD'}).get_json()
+
+    assert calls == [3, 2]
+    by_tracking = {r['tracking']: r for r in data['results']}
+    assert by_tracking['BAD']['result'] == {'error': 'read timeout'}
+    assert by_tracking['BAD']['changed'] is False and by_tracking['BAD']['last_checked'] == good['last_checked']
+    assert by_tracking['AAA']['changed'] is False
+    # A failed lookup keeps the stored result, its events and the cache entry
+    stored = {it['tracking']: it for it in db.list_tracked()}
+    assert stored['BAD']['last_result'] == good['last_result'] == _result('BAD', '이동중')
+    assert stored['BAD']['last_checked'] == good['last_checked']
+    assert cached == _result('BAD', '이동중')
+
+
+def test_check_one_failure_keeps_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'check_one.db')
+    db.init_db()
+    down = False
+
+    def fake_track(tracking, debug=False, probe=None, courier=None):
+        if down:
+            raise TimeoutError('read timeout')
+        return _result(tracking, '이동중')
+
+    monkeypatch.setattr(unified, 'track', fake_track)
+    with app.test_client() as c:
+        item_id = c.post('/api/tracked', json={'tracking': 'ONE'}).get_json()['id']
+        c.post(f'/api/tracked/{item_id}/check')
+        good = db.get_tracked(item_id)
+        down = True
+        data = c.post(f'/api/tracked/{item_id}/check').get_json()
+        cached = c.post('/api/track', json={'tracking_number': 'ONE'}).get_json()
+
+    assert data['result'] == {'error': 'read timeout'}
+    assert data['changed'] is False and data['last_checked'] == good['last_checked']
+    stored = db.get_tracked(item_id)
+    assert stored['last_result'] == good['last_result'] == _result('ONE', '이동중')
+    assert cached == _result('ONE', '이동중')
@@ -0,0 +1,78 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import net
+import unified
+
+
+PAGE = '<form><input type="hidden" name="_csrf" value="tok-{n}"/></form>'
+DETAIL = json.dumps({
+    'sender': {'name': 'Kim'},
+    'receiver': {'name': 'Lee'},
+    'trackingDetails': [{'transTime': '2025-12-16T10:00:00', 'transWhere': 'Seoul', 'transKind': 'Delivered'}],
+})
+
+
+class FakeCJ:
+    def __init__(self, reject_tokens=()):
+        self.gets = 0
+        self.posts = []
+        self.reject_tokens = set(reject_tokens)
+
+    async def aget(self, url, **kw):
+        self.gets += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(text=PAGE.format(n=self.gets), cookies={'JSESSIONID': f's{self.gets}'})
+
+    async def apost(self, url, data=None, headers=None, **kw):
+        self.posts.append((data['_csrf'], (headers or {}).get('Cookie')))
+        if data['_csrf'] in self.reject_tokens:
+            return SimpleNamespace(text='<html>expired</html>', status_code=403)
+        return SimpleNamespace(text=DETAIL, status_code=200)
+
+
+def install(monkeypatch, fake, ttl=600.0):
+    monkeypatch.setattr(net, 'aget', fake.aget)
+    monkeypatch.setattr(net, 'apost', fake.apost)
+    monkeypatch.setattr(unified, '_cj_session', unified.CJSession(ttl=ttl))
+
+
+def test_find_csrf_token_attribute_order():
+    assert unified.find_csrf_token('<input value="abc" type="hidden" name="_csrf">') == 'abc'
+    assert unified.find_csrf_token('<input name="other" value="x">') is None
+
+
+def test_concurrent_lookups_share_one_session(monkeypatch):
+    fake = FakeCJ()
+    install(monkeypatch, fake)
+
+    async def run():
+        return await asyncio.gather(*(unified.track_cj_async(f'36313609464{i}') for i in range(5)))
+
+    results = asyncio.run(run())
+    assert all(r['courier'] == 'CJ Logistics' for r in results)
+    assert fake.gets == 1
+    assert fake.posts == [('tok-1', 'JSESSIONID=s1')] * 5
+
+    # later lookups keep reusing the cached session
+    asyncio.run(unified.track_cj_async('363136094640'))
+    assert fake.gets == 1
+
+
+def test_rejected_token_is_refreshed(monkeypatch):
+    fake = FakeCJ(reject_tokens={'tok-1'})
+    install(monkeypatch, fake)
+
+    res = asyncio.run(unified.track_cj_async('363136094640'))
+    assert res['status'] == 'Delivered'
+    assert fake.gets == 2
+    assert [p[0] for p in fake.posts] == ['tok-1', 'tok-2']
+
+
+def test_expired_session_is_refreshed(monkeypatch):
+    fake = FakeCJ()
+    install(monkeypatch, fake, ttl=0)
+
+    asyncio.run(unified.track_cj_async('363136094640'))
+    asyncio.run(unified.track_cj_async('363136094640'))
+    assert fake.gets == 2
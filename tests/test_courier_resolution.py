@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+import db
+import net
+import unified
+
+
+def make_adapter(courier, calls, valid=True):
+    def adapter(invc, debug=False):
+        calls.append(courier)
+        if not valid:
+            return None
+        return {'courier': courier, 'tracking_number': invc, 'status': 'In transit', 'history': []}
+    return adapter
+
+
+def test_resolved_courier_is_tried_first(monkeypatch):
+    calls = []
+    monkeypatch.setattr(unified, 'track_cj', make_adapter('CJ Logistics', calls, valid=False))
+    monkeypatch.setattr(unified, 'track_cvs', make_adapter('CVSNet', calls, valid=False))
+    monkeypatch.setattr(unified, 'track_lotte', make_adapter('Lotte', calls))
+
+    assert unified.track('123456789013')['courier'] == 'Lotte'
+    assert calls == ['CJ Logistics', 'CVSNet', 'Lotte']
+    assert unified.resolved_courier('123456789013') == 'lotte'
+
+    calls.clear()
+    assert unified.track('123456789013')['courier'] == 'Lotte'
+    assert calls == ['Lotte']
+
+
+def test_stale_resolution_falls_back_to_full_dispatch(monkeypatch):
+    calls = []
+    unified.load_resolutions({'123456789013': 'lotte'})
+    monkeypatch.setattr(unified, 'track_cj', make_adapter('CJ Logistics', calls))
+    monkeypatch.setattr(unified, 'track_cvs', make_adapter('CVSNet', calls))
+    monkeypatch.setattr(unified, 'track_lotte', make_adapter('Lotte', calls, valid=False))
+
+    res = unified.track('123456789013', debug=True)
+    assert res['courier'] == 'CJ Logistics'
+    assert calls == ['Lotte', 'CJ Logistics']
+    assert unified.resolved_courier('123456789013') == 'cj'
+
+
+def test_resolutions_persist_in_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'tracked_resolution.db')
+    db.init_db()
+    unified.set_resolution_store(db.save_courier_resolution, db.forget_courier_resolution)
+
+    unified.remember_courier('210535605545', 'cvs')
+    assert db.get_courier_resolutions() == {'210535605545': 'cvs'}
+
+    unified.forget_courier('210535605545')
+    assert db.get_courier_resolutions() == {}
+
+
+def test_failing_resolution_probes_the_others(monkeypatch):
+    calls = []
+    unified.load_resolutions({'123456789013': 'cj'})
+
+    def circuit_open(invc, debug=False):
+        calls.append('CJ Logistics')
+        raise net.CircuitOpenError('www.cjlogistics.com', 30.0)
+
+    monkeypatch.setattr(unified, 'track_cj', circuit_open)
+    monkeypatch.setattr(unified, 'track_cvs', make_adapter('CVSNet', calls, valid=False))
+    monkeypatch.setattr(unified, 'track_lotte', make_adapter('Lotte', calls))
+
+    assert unified.track('123456789013')['courier'] == 'Lotte'
+    assert calls == ['CJ Logistics', 'CVSNet', 'Lotte']
+
+
+def test_resolutions_are_bounded(monkeypatch):
+    monkeypatch.setattr(unified, 'MAX_RESOLUTIONS', 2)
+    unified.load_resolutions({'111111111111': 'cj', '222222222222': 'cvs', '333333333333': 'lotte'})
+    assert unified.resolved_courier('111111111111') is None
+    # A lookup through the map keeps its number; the least recently used goes
+    unified._split_cached('222222222222', unified.PROBE_CANDIDATES_12)
+    unified.remember_courier('444444444444', 'cj')
+    assert unified.resolved_courier('333333333333') is None
+    assert unified.resolved_courier('222222222222') == 'cvs'
+    assert unified.resolved_courier('444444444444') == 'cj'
+
+
+def test_stored_resolutions_are_trimmed(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'trim_resolution.db')
+    db.init_db()
+    for n, key in enumerate(('cj', 'cvs', 'lotte')):
+        db.save_courier_resolution(f'{n}' * 12, key)
+    assert list(db.get_courier_resolutions(2).items()) == [('111111111111', 'cvs'), ('222222222222', 'lotte')]
+    assert len(db.get_courier_resolutions()) == 2
+
+
+def test_async_lookup_persists_off_the_loop(monkeypatch):
+    threads = []
+
+    def save(invc, key):
+        threads.append(threading.get_ident())
+
+    async def lotte(invc, debug=False):
+        return {'courier': 'Lotte', 'tracking_number': invc, 'status': 'In transit', 'history': []}
+
+    async def nothing(invc, debug=False):
+        return None
+
+    monkeypatch.setattr(unified, 'track_cj_async', nothing)
+    monkeypatch.setattr(unified, 'track_cvs_async', nothing)
+    monkeypatch.setattr(unified, 'track_lotte_async', lotte)
+    unified.set_resolution_store(save, None)
+
+    async def lookup():
+        res = await unified.track_async('123456789013')
+        return res, threading.get_ident()
+
+    res, loop_thread = asyncio.run(lookup())
+    assert res['courier'] == 'Lotte' and unified.resolved_courier('123456789013') == 'lotte'
+    assert len(threads) == 1 and threads[0] != loop_thread
@@ -1,12 +1,15 @@
+import os
 import json
 from tracking import parse_cupost_main
 from unified import track_cu
 from types import SimpleNamespace
-from unittest.mock import patch
+import net
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'cupost.html')
 
 
 def test_parse_cupost_main_local_file():
-    html = open('test.html', 'r', encoding='utf-8').read()
+    html = open(FIXTURE, 'r', encoding='utf-8').read()
     parsed = parse_cupost_main(html)
     assert 'trackingNumber' in parsed
     assert 'trackingEvents' in parsed
@@ -14,11 +17,14 @@ def test_parse_cupost_main_local_file():
 
 
 def test_track_cu_unified_mapping(monkeypatch):
-    html = open('test.html', 'r', encoding='utf-8').read()
+    html = open(FIXTURE, 'r', encoding='utf-8').read()
     mock_resp = SimpleNamespace(text=html, status_code=200, headers={})
 
-    with patch('requests.post', return_value=mock_resp):
-        res = track_cu('25129173683', debug=True)
+    async def fake_apost(*a, **kw):
+        return mock_resp
+
+    monkeypatch.setattr(net, 'apost', fake_apost)
+    res = track_cu('25129173683', debug=True)
 
     assert res['courier'] == 'CUpost'
     assert res['tracking_number'] == '25129173683'
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'pool.db')
+    db.init_db()
+    yield
+    db.close_pool()
+
+
+def test_connections_are_tuned(fresh_db):
+    with db.pooled() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == db.PRAGMAS['busy_timeout']
+    # get_conn() still hands out a separate connection the caller closes
+    conn = db.get_conn()
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == db.PRAGMAS['busy_timeout']
+    conn.close()
+
+
+def test_connections_are_reused(fresh_db):
+    with db.pooled() as first:
+        pass
+    db.add_tracked('T1')
+    db.list_tracked()
+    with db.pooled() as again:
+        assert again is first
+
+
+def test_pool_follows_db_path(fresh_db, tmp_path, monkeypatch):
+    db.add_tracked('T1')
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'other.db')
+    db.init_db()
+    assert db.list_tracked() == []
+
+
+def test_uncommitted_work_is_rolled_back(fresh_db):
+    with pytest.raises(RuntimeError):
+        with db.pooled() as conn:
+            conn.execute("INSERT INTO tracked (tracking, created_at) VALUES ('X', 'now')")
+            raise RuntimeError
+    assert db.list_tracked() == []
+    assert db.add_tracked('X') is not None
+
+
+def test_concurrent_reads_and_writes(fresh_db):
+    ids = [db.add_tracked(f'T{i}') for i in range(20)]
+    errors = []
+
+    def writer():
+        try:
+            for n in range(10):
+                for item_id in ids:
+                    db.update_tracked_result(item_id, {'status': f'이동중 {n}', 'history': []})
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(50):
+                assert len(db.list_tracked()) == len(ids)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
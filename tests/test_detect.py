@@ -0,0 +1,52 @@
+import detect
+import unified
+
+
+def test_mod7_check():
+    assert detect.mod7_check('404931271275')
+    assert detect.mod7_check('123456789013')
+    assert not detect.mod7_check('123456789012')
+    assert not detect.mod7_check('12345678901a')
+
+
+def test_rank_demotes_failed_check_digits():
+    # fails mod 7: CJ and Lotte are tried after CVSNet, in their usual order
+    ranked = detect.rank('210512345678', unified.FORMATS[0][1], names=unified.ADAPTERS)
+    assert [k for _n, k in ranked] == ['cvs', 'cj', 'lotte']
+
+
+def test_rank_prefix_boost():
+    assert unified.candidates_for('404931271275')[0] == ('Lotte', 'lotte')
+    assert unified.candidates_for('210535605545')[0] == ('CVSNet', 'cvs')
+    # Prefixes only reorder: a 12-digit CUpost sample adds no CUpost candidate
+    keys = [k for _n, k in unified.candidates_for('363225021454')]
+    assert 'cu' not in keys
+
+
+def test_rank_keeps_original_order_when_nothing_fits():
+    # not a mod-7 number, no prefix: nothing plausible, so keep the fallback order
+    assert detect.rank('999999999990', (('CJ Logistics', 'cj'), ('Lotte', 'lotte'))) == (('CJ Logistics', 'cj'), ('Lotte', 'lotte'))
+
+
+def test_courier_hint_is_tried_first(monkeypatch):
+    calls = []
+
+    def adapter(name):
+        def track(invc, debug=False):
+            calls.append(name)
+            return {'courier': name, 'tracking_number': invc, 'status': 'In transit', 'history': []}
+        return track
+
+    monkeypatch.setattr(unified, 'track_cj', adapter('CJ Logistics'))
+    monkeypatch.setattr(unified, 'track_lotte', adapter('Lotte'))
+    assert unified.courier_key('LOTTE') == 'lotte'
+    assert unified.courier_key('CJ Logistics') == 'cj'
+    assert unified.courier_key('nope') is None
+    assert unified.track('123456789013', courier='Lotte')['courier'] == 'Lotte'
+    assert calls == ['Lotte']
+
+
+def test_api_rejects_unknown_courier():
+    from app import app
+    resp = app.test_client().post('/api/track', json={'tracking_number': '123456789013', 'courier': 'nope'})
+    assert resp.status_code == 400
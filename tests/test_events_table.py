@@ -0,0 +1,167 @@
+import json
+import sqlite3
+
+import pytest
+
+import db
+from app import app
+
+E1 = {'time': '2025-12-01 09:00', 'location': '서울', 'message': '집화'}
+E2 = {'time': '2025-12-01 18:00', 'location': '대전 허브', 'message': '이동중'}
+E3 = {'time': '2025-12-02 10:00', 'location': '부산', 'message': '배송완료', 'status': 'done'}
+
+
+def _result(history, status='이동중'):
+    return {'courier': 'Mock', 'status': status, 'history': history}
+
+
+@pytest.fixture
+def item_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'events.db')
+    db.init_db()
+    return db.add_tracked('T1')
+
+
+@pytest.fixture
+def writes():
+    """Count the rows written to ``events`` through a side connection."""
+    conn = sqlite3.connect(str(db.DB_PATH))
+    conn.execute("CREATE TABLE event_writes (kind TEXT)")
+    for kind in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f"CREATE TRIGGER count_{kind.lower()} AFTER {kind} ON events BEGIN INSERT INTO event_writes VALUES ('{kind}'); END")
+    conn.commit()
+
+    def counts():
+        rows = conn.execute("SELECT kind, COUNT(*) FROM event_writes GROUP BY kind").fetchall()
+        conn.execute("DELETE FROM event_writes")
+        conn.commit()
+        return dict(rows)
+    yield counts
+    conn.close()
+
+
+def test_history_is_stored_as_events(item_id):
+    db.update_tracked_result(item_id, _result([E1, E2]))
+    with db.pooled() as conn:
+        raw, count = conn.execute("SELECT last_result, event_count FROM tracked WHERE id=?", (item_id,)).fetchone()
+        events = conn.execute("SELECT time, location, message, seq, at FROM events WHERE tracked_id=? ORDER BY seq", (item_id,)).fetchall()
+    assert 'history' not in json.loads(raw) and count == 2
+    assert [tuple(e) for e in events] == [
+        ('2025-12-01 09:00', '서울', '집화', 0, '2025-12-01T09:00:00'),
+        ('2025-12-01 18:00', '대전 허브', '이동중', 1, '2025-12-01T18:00:00'),
+    ]
+    assert db.get_tracked(item_id)['last_result'] == _result([E1, E2])
+
+
+def test_recheck_writes_only_new_events(item_id, writes):
+    db.update_tracked_result(item_id, _result([E1, E2]))
+    assert writes() == {'INSERT': 2}
+    db.update_tracked_result(item_id, _result([E1, E2]))
+    assert writes() == {}
+    delta = db.update_tracked_result(item_id, _result([E1, E2, E3], status='배송완료'))
+    assert delta['new_events'] == [E3]
+    assert writes() == {'INSERT': 1}
+    assert db.list_tracked()[0]['last_result']['history'] == [E1, E2, E3]
+
+
+def test_reordered_and_dropped_events(item_id, writes):
+    db.update_tracked_result(item_id, _result([E2, E1]))
+    writes()
+    # Newest first, as some couriers list it: the old events move down
+    delta = db.update_tracked_result(item_id, _result([E3, E2, E1]))
+    assert delta['new_events'] == [E3]
+    assert writes() == {'INSERT': 1, 'UPDATE': 2}
+    assert db.get_tracked(item_id)['last_result']['history'] == [E3, E2, E1]
+
+    delta = db.update_tracked_result(item_id, _result([E3]))
+    assert delta['changed'] and delta['new_events'] == []
+    assert writes() == {'DELETE': 2}
+    assert db.get_tracked(item_id)['last_result']['history'] == [E3]
+
+
+def test_results_without_history(item_id):
+    db.update_tracked_result(item_id, {'error': 'not found'})
+    assert db.get_tracked(item_id)['last_result'] == {'error': 'not found'}
+    db.update_tracked_result(item_id, _result([]))
+    assert db.get_tracked(item_id)['last_result'] == _result([])
+
+
+def test_removing_an_item_removes_its_events(item_id):
+    other = db.add_tracked('T2')
+    db.update_tracked_results([(item_id, _result([E1, E2])), (other, _result([E3]))])
+    db.remove_tracked(item_id)
+    with db.pooled() as conn:
+        assert [tuple(r) for r in conn.execute("SELECT tracked_id, COUNT(*) FROM events GROUP BY tracked_id")] == [(other, 1)]
+    # A result for an item removed meanwhile leaves no events behind
+    db.update_tracked_result(item_id, _result([E1]))
+    with db.pooled() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM events WHERE tracked_id=?", (item_id,)).fetchone()[0] == 0
+
+
+def test_first_and_last_event_from_index(item_id):
+    db.update_tracked_result(item_id, _result([E3, E1, E2]))
+    with db.pooled() as conn:
+        first, last = conn.execute("SELECT first_event_at, last_event_at FROM tracked WHERE id=?", (item_id,)).fetchone()
+        sql = "SELECT MIN(at), MAX(at) FROM events WHERE tracked_id=?"
+        assert tuple(conn.execute(sql, (item_id,)).fetchone()) == (first, last)
+        plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN SELECT MIN(at) FROM events WHERE tracked_id=?", (item_id,)))
+    assert 'idx_events_at' in plan
+
+
+def test_stored_histories_are_migrated(tmp_path, monkeypatch):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE tracked (id INTEGER PRIMARY KEY AUTOINCREMENT, tracking TEXT NOT NULL UNIQUE, label TEXT, last_result TEXT, last_checked TEXT, created_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO tracked (tracking, last_result, created_at) VALUES ('OLD', ?, '2025-12-01')", (json.dumps(_result([E2, E1])),))
+    conn.execute("INSERT INTO tracked (tracking, last_result, created_at) VALUES ('ERR', ?, '2025-12-01')", (json.dumps({'error': 'x'}),))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.init_db()
+    db.init_db()
+    with app.test_client() as c:
+        items = {it['tracking']: it for it in c.get('/api/tracked').get_json()['items']}
+    assert items['OLD']['last_result'] == _result([E2, E1])
+    assert items['ERR']['last_result'] == {'error': 'x'}
+    with db.pooled() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 2
+        assert conn.execute("SELECT first_event_at FROM tracked WHERE tracking='OLD'").fetchone()[0] == '2025-12-01T09:00:00'
+    assert db.update_tracked_result(items['OLD']['id'], _result([E2, E1]))['changed'] is False
+
+
+def test_repeated_events(item_id, writes):
+    # A scan listed twice by the courier is kept as listed
+    db.update_tracked_result(item_id, _result([E1, E1, E2]))
+    assert db.get_tracked(item_id)['last_result']['history'] == [E1, E1, E2]
+    writes()
+    delta = db.update_tracked_result(item_id, _result([E1, E1, E2, E3]))
+    assert delta['new_events'] == [E3]
+    assert writes() == {'INSERT': 1}
+    delta = db.update_tracked_result(item_id, _result([E1, E2, E3]))
+    assert delta['changed'] and delta['new_events'] == []
+    with db.pooled() as conn:
+        assert [r[0] for r in conn.execute("SELECT seq FROM events WHERE tracked_id=? ORDER BY seq", (item_id,))] == [0, 1, 2]
+    assert db.get_tracked(item_id)['last_result']['history'] == [E1, E2, E3]
+    assert db.update_tracked_result(item_id, _result([E1, E2, E3]))['changed'] is False
+
+
+def test_history_order_comes_from_seq(item_id):
+    # Rows inserted newest first, then moved: rowid order is the reverse
+    db.update_tracked_result(item_id, _result([E3, E2, E1]))
+    db.update_tracked_result(item_id, _result([E1, E2, E3]))
+    with db.pooled() as conn:
+        assert [r[0] for r in conn.execute("SELECT seq FROM events WHERE tracked_id=? ORDER BY id", (item_id,))] == [2, 1, 0]
+    assert db.get_tracked(item_id)['last_result']['history'] == [E1, E2, E3]
+    assert db.query_tracked()[0][0]['last_result']['history'] == [E1, E2, E3]
+
+
+def test_seq_is_unique_per_item(item_id):
+    db.update_tracked_result(item_id, _result([E1, E2]))
+    with db.pooled() as conn:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(db._INSERT_EVENT, (item_id, 1, *db.event_key(E3), None, json.dumps(E3)))
+        conn.rollback()
+    # Swapping events moves both rows through the unique index
+    db.update_tracked_result(item_id, _result([E2, E1]))
+    assert db.get_tracked(item_id)['last_result']['history'] == [E2, E1]
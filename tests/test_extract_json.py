@@ -41,3 +41,21 @@ def test_no_json_returns_none():
     txt = 'function foo() { return 1 + 2; } // no json here'
     out = extract_json(txt)
     assert out is None
+
+
+def test_json_content_type_skips_scanning():
+    assert extract_json('  [1, 2]\n', content_type='application/json; charset=utf-8') == [1, 2]
+    assert extract_json('not json', content_type='application/json') is None
+
+
+def test_skips_css_and_js_blocks():
+    txt = '<style>.a{color:red}</style><script>function f(x){ if (x) { return [x, 1]; } return {"a": 1}; }</script>'
+    assert extract_json(txt) == {"a": 1}
+
+
+def test_pathological_input_is_linear():
+    import time
+    for txt in ('{[' * 100000, '{"k": ' * 40000, '[' * 200000):
+        t0 = time.perf_counter()
+        assert extract_json(txt) is None
+        assert time.perf_counter() - t0 < 2
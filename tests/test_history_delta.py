@@ -0,0 +1,59 @@
+import sqlite3
+
+import db
+import unified
+from app import app
+
+E1 = {'time': '2025-12-01 09:00', 'location': '서울', 'message': '집화'}
+E2 = {'time': '2025-12-01 18:00', 'location': '대전 허브', 'message': '이동중'}
+E3 = {'time': '2025-12-02 10:00', 'location': '부산', 'message': '배송완료'}
+
+
+def _result(history, status='이동중'):
+    return {'courier': 'Mock', 'tracking_number': 'T1', 'status': status, 'history': history, 'latest_event': history[-1] if history else {}}
+
+
+def test_unchanged_result_is_not_rewritten(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'delta.db')
+    db.init_db()
+    item_id = db.add_tracked('T1')
+    conn = sqlite3.connect(str(db.DB_PATH))
+    conn.execute("CREATE TABLE writes (n INTEGER)")
+    conn.execute("CREATE TRIGGER count_writes AFTER UPDATE OF last_result ON tracked BEGIN INSERT INTO writes VALUES (1); END")
+    conn.commit()
+
+    d1 = db.update_tracked_result(item_id, _result([E1, E2]))
+    assert d1['changed'] and d1['new_events'] == [E1, E2]
+
+    d2 = db.update_tracked_result(item_id, _result([E1, E2]))
+    assert not d2['changed'] and d2['new_events'] == []
+    assert conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0] == 1
+    item = db.list_tracked()[0]
+    assert item['last_checked'] == d2['last_checked']
+
+    d3 = db.update_tracked_result(item_id, _result([E1, E2, E3], status='배송완료'))
+    assert d3['changed'] and d3['new_events'] == [E3]
+    assert conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0] == 2
+    assert db.list_tracked()[0]['status_class'] == 'delivered'
+    conn.close()
+
+
+def test_check_endpoint_returns_delta(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'delta_api.db')
+    db.init_db()
+    history = [E1, E2]
+    monkeypatch.setattr(unified, 'track', lambda tracking: _result(list(history)))
+
+    with app.test_client() as c:
+        item_id = c.post('/api/tracked', json={'tracking': 'T1'}).get_json()['id']
+        first = c.post(f'/api/tracked/{item_id}/check').get_json()
+        assert first['changed'] and first['new_events'] == [E1, E2]
+        assert 'history' not in first['result'] and first['result']['status'] == '이동중'
+
+        again = c.post(f'/api/tracked/{item_id}/check').get_json()
+        assert again['changed'] is False and again['new_events'] == []
+
+        history.append(E3)
+        later = c.post(f'/api/tracked/{item_id}/check?full=1').get_json()
+        assert later['new_events'] == [E3]
+        assert later['result']['history'] == [E1, E2, E3]
@@ -0,0 +1,83 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import htmlparse
+import net
+import tracking
+import unified
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_offline(monkeypatch, adapter, html):
+    async def fake_request(*a, **kw):
+        return SimpleNamespace(text=html, status_code=200, headers={})
+
+    monkeypatch.setattr(net, 'aget', fake_request)
+    monkeypatch.setattr(net, 'apost', fake_request)
+    return adapter('0000000000')
+
+
+def parse_all(monkeypatch):
+    return {
+        'lotte': tracking.parse_tracking_html(fixture('lotte.html')),
+        'cupost': tracking.parse_cupost_main(fixture('cupost.html')),
+        'hanjin': parse_offline(monkeypatch, unified.track_hanjin, fixture('hanjin.html')),
+        'koreapost': parse_offline(monkeypatch, unified.track_koreapost, fixture('koreapost.html')),
+    }
+
+
+@pytest.fixture
+def restore_parser():
+    yield
+    htmlparse.set_parser()
+
+
+def test_fallback_parser_always_available():
+    assert htmlparse.available('html.parser')
+    assert not htmlparse.available('no-such-parser')
+    with pytest.raises(ValueError):
+        htmlparse.set_parser('no-such-parser')
+
+
+def test_fixtures_parse_with_fallback(monkeypatch, restore_parser):
+    htmlparse.set_parser('html.parser')
+    out = parse_all(monkeypatch)
+    assert out['lotte']['trackingNumber'] == '404931271275'
+    assert len(out['lotte']['trackingEvents']) == 4
+    assert out['cupost']['deliveryStatus'] == '배송중'
+    assert len(out['hanjin']['history']) == 4
+    assert out['koreapost']['history'][-1]['location'] == '대전유성우체국'
+
+
+@pytest.mark.skipif(not htmlparse.available('lxml'), reason='lxml not installed')
+def test_lxml_matches_fallback(monkeypatch, restore_parser):
+    htmlparse.set_parser('html.parser')
+    expected = parse_all(monkeypatch)
+    htmlparse.set_parser('lxml')
+    assert parse_all(monkeypatch) == expected
+
+
+def test_regions_match_selectors():
+    soup = htmlparse.make_soup(
+        '<div class="a"><p>x</p></div><div class="b c">kept<span>y</span></div><input id="goodsStep" value="3"><p>z</p>',
+        regions=htmlparse.Regions('div.c', 'input#goodsStep'),
+    )
+    assert soup.find('div', class_='a') is None and soup.find('p') is None
+    assert soup.find('div', class_='b').get_text() == 'kepty'
+    assert soup.find('input', id='goodsStep')['value'] == '3'
+    with pytest.raises(ValueError):
+        htmlparse.Regions('table tr')
+
+
+def test_region_parsing_matches_full_tree(monkeypatch):
+    restricted = parse_all(monkeypatch)
+    monkeypatch.setattr(htmlparse, 'REGIONS_ENABLED', False)
+    assert parse_all(monkeypatch) == restricted
@@ -1,9 +1,16 @@
 import json
 from types import SimpleNamespace
+import net
 import unified
 import tracking
 
 
+def fake_apost(**resp):
+    async def apost(*a, **kw):
+        return SimpleNamespace(**resp)
+    return apost
+
+
 def test_unified_lotte_invoice(monkeypatch):
     lotte = "404931271275"
 
@@ -11,8 +18,8 @@ def test_unified_lotte_invoice(monkeypatch):
     monkeypatch.setattr(unified, 'track_cj', lambda invc, debug=False: None)
     monkeypatch.setattr(unified, 'track_cvs', lambda invc, debug=False: None)
 
-    # Mock requests.post within unified.track_lotte to avoid network
-    monkeypatch.setattr(unified.requests, 'post', lambda *a, **kw: SimpleNamespace(text='<html></html>'))
+    # Mock the pooled client used by unified.track_lotte to avoid network
+    monkeypatch.setattr(net, 'apost', fake_apost(text='<html></html>'))
 
     # Mock the parser to return a parsed structure for our invoice
     def fake_parse(html):
@@ -40,7 +47,7 @@ def test_unified_lotte_invoice(monkeypatch):
 def test_track_cu_invoice_using_fixture(monkeypatch):
     cu_post = "363225021454"
     # Stub network and parser so test is deterministic
-    monkeypatch.setattr(unified.requests, 'post', lambda *a, **kw: SimpleNamespace(text='<html></html>', status_code=200, headers={}))
+    monkeypatch.setattr(net, 'apost', fake_apost(text='<html></html>', status_code=200, headers={}))
     monkeypatch.setattr(tracking, 'parse_cupost_main', lambda html: {
         'trackingNumber': cu_post,
         'trackingEvents': [{'timestamp': '2025-12-16 11:13:47', 'location': '', 'description': 'In transit', 'is_current': True}],
@@ -1,9 +1,14 @@
 import json
 from types import SimpleNamespace
+import net
 import unified
 import tracking
 
 
+async def fake_apost(*a, **kw):
+    return SimpleNamespace(text='<html></html>')
+
+
 def load_invoices():
     with open('tests/invoices.json', 'r', encoding='utf-8') as f:
         return json.load(f)
@@ -20,7 +25,7 @@ def test_invoice_list_runs(monkeypatch):
             # Ensure CJ and CVS do not claim this invoice
             monkeypatch.setattr(unified, 'track_cj', lambda invc, debug=False: None)
             monkeypatch.setattr(unified, 'track_cvs', lambda invc, debug=False: None)
-            monkeypatch.setattr(unified.requests, 'post', lambda *a, **kw: SimpleNamespace(text='<html></html>'))
+            monkeypatch.setattr(net, 'apost', fake_apost)
             monkeypatch.setattr(tracking, 'parse_tracking_html', lambda html: {
                 'trackingNumber': inv,
                 'carrier': {'name': '롯데글로벌로지스'},
@@ -31,7 +36,7 @@ def test_invoice_list_runs(monkeypatch):
             })
 
         elif 'CUpost' in expected:
-            monkeypatch.setattr(unified.requests, 'post', lambda *a, **kw: SimpleNamespace(text='<html></html>'))
+            monkeypatch.setattr(net, 'apost', fake_apost)
             monkeypatch.setattr(tracking, 'parse_cupost_main', lambda html: {
                 'trackingNumber': inv,
                 'trackingEvents': [{'timestamp': '2025-12-16 11:13:47', 'location': '', 'description': 'In transit', 'is_current': True}],
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+import db
+import net
+import parsepool
+import unified
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    parsepool.configure(2)
+    monkeypatch.setattr(parsepool, 'INLINE_BELOW', 0)
+    yield
+    parsepool.configure(0)
+
+
+def _offline(monkeypatch, html):
+    async def fake(*a, **kw):
+        return SimpleNamespace(text=html, status_code=200, headers={})
+
+    monkeypatch.setattr(net, 'aget', fake)
+    monkeypatch.setattr(net, 'apost', fake)
+
+
+def test_disabled_by_default_parses_inline(monkeypatch):
+    # The default, whatever PARSE_WORKERS the suite runs with
+    monkeypatch.delenv('PARSE_WORKERS', raising=False)
+    assert parsepool._env_workers() == 0
+    monkeypatch.setattr(parsepool, 'WORKERS', parsepool._env_workers())
+    assert parsepool.pool() is None
+    calls = []
+
+    def fn(text, invc):
+        calls.append(invc)
+        return {'tracking_number': invc}
+
+    # A local function cannot be pickled, so this only works inline
+    assert asyncio.run(parsepool.run(fn, 'x' * 100_000, '1')) == {'tracking_number': '1'}
+    assert calls == ['1']
+
+
+def test_configure_sizes_pool():
+    try:
+        assert parsepool.configure(None) == (os.cpu_count() or 1)
+        assert parsepool.configure(-3) == 0
+    finally:
+        parsepool.configure(0)
+
+
+@pytest.mark.parametrize('key,fixture,invc', [
+    ('hanjin', 'hanjin.html', '1234567890'),
+    ('koreapost', 'koreapost.html', '1234567890123'),
+    ('lotte', 'lotte.html', '404931271275'),
+    ('cu', 'cupost.html', '25129173683'),
+    ('cvs', 'cvs.html', '210535605545'),
+])
+def test_pool_matches_inline(monkeypatch, pool, key, fixture, invc):
+    html = _page(fixture)
+    _offline(monkeypatch, html)
+    adapter = getattr(unified, f'track_{key}_async')
+
+    async def both():
+        pooled = await adapter(invc)
+        # Small pages stay inline
+        monkeypatch.setattr(parsepool, 'INLINE_BELOW', len(html) + 1)
+        return pooled, await adapter(invc)
+
+    pooled, inline = asyncio.run(both())
+    assert pooled == inline
+    assert pooled['history']
+
+
+def test_workers_skip_app_startup(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db, 'init_db', lambda: calls.append('init_db'))
+    # A spawned worker imports the main script (python app.py) as __mp_main__
+    runpy.run_path(APP, run_name='__mp_main__')
+    assert calls == []
+    runpy.run_path(APP, run_name='app_script')
+    assert calls == ['init_db']
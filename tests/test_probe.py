@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+import net
+import unified
+
+
+def make_adapter(courier, delay, valid=True, calls=None):
+    async def adapter(invc, debug=False):
+        if calls is not None:
+            calls.append(courier)
+        await asyncio.sleep(delay)
+        if not valid:
+            return {'error': 'No tracking data found'} if debug else None
+        return {'courier': courier, 'tracking_number': invc, 'status': 'In transit', 'history': []}
+    return adapter
+
+
+def patch_adapters(monkeypatch, cj, cvs, lotte):
+    monkeypatch.setattr(unified, 'track_cj_async', cj)
+    monkeypatch.setattr(unified, 'track_cvs_async', cvs)
+    monkeypatch.setattr(unified, 'track_lotte_async', lotte)
+
+
+def test_concurrent_priority_decides_ties(monkeypatch):
+    # Lotte answers first, but CJ has priority and also returns data
+    patch_adapters(monkeypatch,
+                   make_adapter('CJ Logistics', 0.05),
+                   make_adapter('CVSNet', 0.01, valid=False),
+                   make_adapter('Lotte', 0.0))
+    res = unified.track('123456789013', probe='concurrent')
+    assert res['courier'] == 'CJ Logistics'
+
+
+def test_concurrent_falls_through_to_lotte_with_attempts(monkeypatch):
+    patch_adapters(monkeypatch,
+                   make_adapter('CJ Logistics', 0.02, valid=False),
+                   make_adapter('CVSNet', 0.01, valid=False),
+                   make_adapter('Lotte', 0.0))
+    res = unified.track('123456789013', debug=True, probe='concurrent')
+    assert res['courier'] == 'Lotte'
+    attempts = res['_debug']['attempts']
+    assert [a['courier'] for a in attempts] == ['CJ Logistics', 'CVSNet']
+    assert all(a['outcome'] == 'no data' for a in attempts)
+
+
+def test_hedged_skips_later_candidates_when_first_wins(monkeypatch):
+    calls = []
+    monkeypatch.setattr(unified, 'HEDGE_DELAY', 0.2)
+    patch_adapters(monkeypatch,
+                   make_adapter('CJ Logistics', 0.0, calls=calls),
+                   make_adapter('CVSNet', 0.0, calls=calls),
+                   make_adapter('Lotte', 0.0, calls=calls))
+    res = unified.track('123456789013', debug=True, probe='hedged')
+    assert res['courier'] == 'CJ Logistics'
+    assert calls == ['CJ Logistics']
+    assert [a['outcome'] for a in res['_debug']['attempts']] == ['not started', 'not started']
+
+
+def test_hedged_starts_next_candidate_early_on_failure(monkeypatch):
+    calls = []
+    monkeypatch.setattr(unified, 'HEDGE_DELAY', 10)
+    patch_adapters(monkeypatch,
+                   make_adapter('CJ Logistics', 0.0, valid=False, calls=calls),
+                   make_adapter('CVSNet', 0.0, valid=False, calls=calls),
+                   make_adapter('Lotte', 0.0, calls=calls))
+    res = unified.track('123456789013', probe='hedged')
+    assert res['courier'] == 'Lotte'
+    assert calls == ['CJ Logistics', 'CVSNet', 'Lotte']
+
+
+def test_concurrent_cancels_slow_losers(monkeypatch):
+    patch_adapters(monkeypatch,
+                   make_adapter('CJ Logistics', 0.0),
+                   make_adapter('CVSNet', 5, valid=False),
+                   make_adapter('Lotte', 5))
+    res = unified.track('123456789013', debug=True, probe='concurrent')
+    assert res['courier'] == 'CJ Logistics'
+    assert [a['outcome'] for a in res['_debug']['attempts']] == ['cancelled', 'cancelled']
+
+
+def test_sequential_skips_courier_with_open_circuit(monkeypatch):
+    async def circuit_open(invc, debug=False):
+        raise net.CircuitOpenError('www.cjlogistics.com', 30.0)
+
+    patch_adapters(monkeypatch, circuit_open, make_adapter('CVSNet', 0.0, valid=False), make_adapter('Lotte', 0.0))
+    res = net.run(unified.track_async('123456789013', debug=True, probe='sequential'))
+    assert res['courier'] == 'Lotte'
+    attempts = res['_debug']['attempts']
+    assert attempts[0]['courier'] == 'CJ Logistics' and attempts[0]['outcome'] == 'exception'
+    assert 'Circuit open' in attempts[0]['error']
+
+
+def test_failure_is_raised_when_no_courier_answers(monkeypatch):
+    async def circuit_open(invc, debug=False):
+        raise net.CircuitOpenError('www.cjlogistics.com', 30.0)
+
+    patch_adapters(monkeypatch, circuit_open, make_adapter('CVSNet', 0.0, valid=False), make_adapter('Lotte', 0.0, valid=False))
+    for probe in ('sequential', 'concurrent'):
+        with pytest.raises(net.CircuitOpenError):
+            net.run(unified.track_async('123456789013', probe=probe))
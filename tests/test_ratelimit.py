@@ -0,0 +1,77 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+import net
+import ratelimit
+
+
+def test_concurrency_cap_is_respected():
+    lim = ratelimit.CourierLimiter('x', max_concurrency=3)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        await lim.acquire()
+        try:
+            peak = max(peak, lim.inflight)
+            await asyncio.sleep(0.01)
+        finally:
+            lim.release()
+
+    async def run():
+        await asyncio.gather(*(job() for _ in range(20)))
+
+    asyncio.run(run())
+    assert peak == 3
+    assert lim.inflight == 0
+
+
+def test_token_bucket_paces_requests():
+    lim = ratelimit.CourierLimiter('x', max_concurrency=10, rate=50.0, burst=1)
+
+    async def run():
+        for _ in range(6):
+            await lim.acquire()
+            lim.release()
+
+    t0 = time.monotonic()
+    asyncio.run(run())
+    # first token is free, the next five are spaced 1/50 s apart
+    assert time.monotonic() - t0 >= 0.09
+
+
+def test_aimd_cuts_on_errors_and_recovers_slowly():
+    lim = ratelimit.CourierLimiter('x', max_concurrency=8, rate=10.0, cooldown=0)
+    lim.record(False, 0.1)
+    assert int(lim.limit) == 4 and lim.current_rate() == pytest.approx(5.0)
+    lim.record(False, 0.1)
+    assert int(lim.limit) == 2
+    for _ in range(4):
+        lim.record(True, 0.1)
+    assert 2 < lim.limit < 5
+    # slow responses count as congestion
+    before = lim.limit
+    lim.record(True, lim.latency_target + 1)
+    assert lim.limit < before
+
+
+def test_arequest_reports_outcomes_to_courier_limiter(monkeypatch):
+    sched = ratelimit.Scheduler(limits={}, hosts={'www.cupost.co.kr': 'cu'})
+    monkeypatch.setattr(ratelimit, 'scheduler', sched)
+
+    class FakeClient:
+        is_closed = False
+
+        async def request(self, method, url, **kw):
+            return SimpleNamespace(status_code=503 if 'bad' in url else 200)
+
+    async def run():
+        net._state().client = FakeClient()
+        await net.aget('https://www.cupost.co.kr/ok')
+        await net.aget('https://www.cupost.co.kr/bad', retries=0)
+
+    asyncio.run(run())
+    stats = sched.stats()['cu']
+    assert stats['successes'] == 1 and stats['errors'] == 1
+    assert stats['inflight'] == 0
@@ -0,0 +1,141 @@
+import time
+import db
+import unified
+import cache
+from app import app
+import app as app_module
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def result(status):
+    return {'courier': 'Mock', 'tracking_number': 'X', 'status': status, 'history': []}
+
+
+def test_ttl_depends_on_status():
+    clock = FakeClock()
+    c = cache.ResultCache(ttls={'delivered': 1000, 'other': 10, 'error': 1}, stale_window=0, clock=clock)
+    c.put('a', result('배송완료'))
+    c.put('b', result('In transit'))
+    clock.now += 20
+    assert c.lookup('a')[1] == 'fresh'
+    assert c.lookup('b')[1] == 'miss'
+
+
+def test_lru_eviction_and_max_age():
+    clock = FakeClock()
+    c = cache.ResultCache(maxsize=2, clock=clock)
+    c.put('a', result('x'))
+    c.put('b', result('x'))
+    c.lookup('a')
+    c.put('c', result('x'))
+    assert c.lookup('b')[1] == 'miss'
+    clock.now += 5
+    assert c.lookup('a', max_age=10)[1] == 'fresh'
+    assert c.lookup('a', max_age=2)[1] == 'miss'
+
+
+def test_stale_entry_is_served_while_refreshing():
+    clock = FakeClock()
+    c = cache.ResultCache(ttls={'other': 10}, stale_window=100, clock=clock)
+    c.put('a', result('old'))
+    clock.now += 50
+    res, state, _ = c.lookup('a')
+    assert state == 'stale' and res['status'] == 'old'
+    assert c.refresh('a', lambda: result('new'))
+    deadline = time.time() + 2
+    while c.lookup('a')[0]['status'] != 'new' and time.time() < deadline:
+        time.sleep(0.01)
+    assert c.lookup('a')[0]['status'] == 'new'
+
+
+def test_warm_from_tracked_rows():
+    clock = FakeClock()
+    clock.now = 1765879500.0  # 2025-12-16T10:05:00Z
+    c = cache.ResultCache(ttls={'delivered': 1000, 'other': 10}, stale_window=0, clock=clock)
+    n = c.warm([
+        {'tracking': 'A', 'last_result': result('배송완료'), 'last_checked': '2025-12-16T10:00:00'},
+        {'tracking': 'B', 'last_result': None, 'last_checked': None},
+    ])
+    assert n == 1
+    res, state, age = c.lookup('A')
+    assert state == 'fresh' and age == 300
+
+
+def test_warm_keeps_most_recently_checked(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'warm.db')
+    db.init_db()
+    ids = [db.add_tracked(f'T{i}') for i in range(5)]
+    for n, item_id in enumerate(ids):
+        history = [{'time': '2025-12-16 09:00', 'location': '허브', 'message': f'이동중 {n}'}]
+        db.update_tracked_result(item_id, dict(result('이동중'), tracking_number=f'T{n}', history=history))
+    # Checked in the order T3, T0, T4, T1; T2 never
+    with db.pooled() as conn:
+        conn.execute("UPDATE tracked SET last_checked=NULL WHERE id=?", (ids[2],))
+        for minute, n in enumerate((3, 0, 4, 1)):
+            conn.execute("UPDATE tracked SET last_checked=? WHERE id=?", (f'2025-12-16T10:0{minute}:00', ids[n]))
+        conn.commit()
+
+    rows = db.recent_results(3)
+    assert [r['tracking'] for r in rows] == ['T0', 'T4', 'T1']
+    assert rows[0]['last_result']['history'][0]['message'] == '이동중 0'
+
+    clock = FakeClock()
+    clock.now = 1765879500.0  # 2025-12-16T10:05:00Z
+    c = cache.ResultCache(maxsize=2, clock=clock)
+    assert c.warm(rows) == 3
+    assert c.lookup('T0')[1] == 'miss'
+    assert c.lookup('T4')[1] == 'fresh' and c.lookup('T1')[1] == 'fresh'
+
+
+def test_api_track_uses_cache(monkeypatch):
+    calls = []
+
+    def fake_track(tracking, debug=False, probe=None, courier=None):
+        calls.append(tracking)
+        return result('In transit')
+
+    monkeypatch.setattr(unified, 'track', fake_track)
+    monkeypatch.setattr(app_module, 'result_cache', cache.ResultCache())
+
+    with app.test_client() as c:
+        r1 = c.post('/api/track', json={'tracking_number': '363136094640'})
+        r2 = c.post('/api/track', json={'tracking_number': '363136094640'})
+        assert r1.headers['X-Cache'] == 'MISS' and r2.headers['X-Cache'] == 'FRESH'
+        assert r2.get_json()['status'] == 'In transit'
+        assert len(calls) == 1
+
+        r3 = c.post('/api/track', json={'tracking_number': '363136094640', 'max_age': 0})
+        assert r3.headers['X-Cache'] == 'MISS'
+        assert len(calls) == 2
+
+        r4 = c.post('/api/track', json={'tracking_number': '363136094640', 'max_age': 'soon'})
+        assert r4.status_code == 400
+
+
+def test_api_track_cache_respects_hints(monkeypatch):
+    calls = []
+
+    def fake_track(tracking, debug=False, probe=None, courier=None):
+        calls.append((tracking, courier, probe))
+        return dict(result('In transit'), courier=courier or 'CJ')
+
+    monkeypatch.setattr(unified, 'track', fake_track)
+    monkeypatch.setattr(app_module, 'result_cache', cache.ResultCache())
+
+    with app.test_client() as c:
+        plain = c.post('/api/track', json={'tracking_number': '363136094640'})
+        hinted = c.post('/api/track', json={'tracking_number': '363136094640', 'courier': 'lotte'})
+        assert hinted.headers['X-Cache'] == 'MISS' and hinted.get_json()['courier'] == 'lotte'
+        again = c.post('/api/track', json={'tracking_number': ' 363136094640 ', 'courier': 'lotte'})
+        assert again.headers['X-Cache'] == 'FRESH' and again.get_json()['courier'] == 'lotte'
+        probed = c.post('/api/track', json={'tracking_number': '363136094640', 'probe': unified.PROBE_MODES[0]})
+        assert probed.headers['X-Cache'] == 'MISS'
+        assert plain.get_json()['courier'] == 'CJ'
+    assert [call[1:] for call in calls] == [(None, None), ('lotte', None), (None, unified.PROBE_MODES[0])]
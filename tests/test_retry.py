@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+import net
+
+
+class FlakyClient:
+    is_closed = False
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def request(self, method, url, **kw):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(status_code=outcome, headers={})
+
+
+def run_with_client(client, coro_fn):
+    async def run():
+        net._state().client = client
+        return await coro_fn()
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep(monkeypatch):
+    monkeypatch.setattr(net, 'backoff_delay', lambda attempt: 0)
+
+
+def test_get_is_retried_on_transport_error_and_5xx():
+    client = FlakyClient([httpx.ConnectTimeout('slow'), 503, 200])
+    resp = run_with_client(client, lambda: net.aget('https://www.hanjin.co.kr/x'))
+    assert resp.status_code == 200 and client.calls == 3
+
+
+def test_post_is_not_retried_unless_idempotent():
+    client = FlakyClient([503, 200])
+    resp = run_with_client(client, lambda: net.apost('https://www.ilogen.com/x'))
+    assert resp.status_code == 503 and client.calls == 1
+
+    client = FlakyClient([503, 200])
+    resp = run_with_client(client, lambda: net.apost('https://www.ilogen.com/x', idempotent=True))
+    assert resp.status_code == 200 and client.calls == 2
+
+
+def test_retries_give_up_and_raise():
+    client = FlakyClient([httpx.ConnectError('down')] * 5)
+    with pytest.raises(httpx.ConnectError):
+        run_with_client(client, lambda: net.aget('https://www.hanjin.co.kr/x', retries=1))
+    assert client.calls == 2
+
+
+def test_breaker_opens_fails_fast_and_probes_after_cooldown(monkeypatch):
+    monkeypatch.setattr(net, 'BREAKER_FAILURE_THRESHOLD', 2)
+    monkeypatch.setattr(net, 'BREAKER_COOLDOWN', 60)
+    client = FlakyClient([httpx.ConnectError('down')] * 2)
+    with pytest.raises(httpx.ConnectError):
+        run_with_client(client, lambda: net.aget('https://service.epost.go.kr/x', retries=1))
+    br = net.breaker('service.epost.go.kr')
+    assert br.state == 'open'
+
+    with pytest.raises(net.CircuitOpenError):
+        run_with_client(client, lambda: net.aget('https://service.epost.go.kr/x'))
+    assert client.calls == 2
+
+    # cooldown elapsed: one probe goes through and closes the breaker
+    br.opened_at -= 61
+    assert br.state == 'half_open'
+    resp = run_with_client(client, lambda: net.aget('https://service.epost.go.kr/x'))
+    assert resp.status_code == 200 and br.state == 'closed'
+
+
+def test_failed_half_open_probe_reopens():
+    br = net.CircuitBreaker('h', failure_threshold=1, cooldown=0)
+    br.record_failure()
+    assert br.allow()          # the single probe
+    assert not br.allow()      # others wait for its outcome
+    br.record_failure()
+    assert br.opened_at is not None and br.failures == 2
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import unified
+from cache import SingleFlight
+
+
+def test_single_flight_shares_result_across_threads():
+    sf = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        gate.wait(2)
+        return {'status': 'ok'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sf.do('k', fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 5 and all(r is results[0] for r in results)
+    assert len(sf) == 0
+
+
+def test_single_flight_propagates_errors_and_resets():
+    sf = SingleFlight()
+
+    def boom():
+        raise ValueError('down')
+
+    try:
+        sf.do('k', boom)
+    except ValueError:
+        pass
+    assert sf.do('k', lambda: 42) == 42
+
+
+def test_track_many_async_fetches_duplicates_once(monkeypatch):
+    calls = []
+
+    async def fake_hanjin(invc, debug=False):
+        calls.append(invc)
+        await asyncio.sleep(0.01)
+        return {'courier': 'Hanjin', 'tracking_number': invc, 'status': 'ok', 'history': []}
+
+    monkeypatch.setattr(unified, 'track_hanjin_async', fake_hanjin)
+    results = asyncio.run(unified.track_many_async(['1234567890', ' 1234567890', '1234567890', '9876543210']))
+    assert sorted(calls) == ['1234567890', '9876543210']
+    assert results[0] is results[1] is results[2]
+
+
+def test_sync_and_async_callers_share_one_fetch(monkeypatch):
+    calls = []
+
+    async def slow_hanjin(invc, debug=False):
+        calls.append(invc)
+        await asyncio.sleep(0.2)
+        return {'courier': 'Hanjin', 'tracking_number': invc, 'status': 'ok', 'history': []}
+
+    monkeypatch.setattr(unified, 'track_hanjin_async', slow_hanjin)
+    results = []
+    t = threading.Thread(target=lambda: results.append(unified.track('1234567890')))
+    t.start()
+    results.append(asyncio.run(unified.track_async('1234567890')))
+    t.join()
+    assert len(calls) == 1
+    assert results[0] is results[1]
+
+
+def test_debug_lookups_are_not_coalesced(monkeypatch):
+    calls = []
+
+    def fake_hanjin(invc, debug=False):
+        calls.append(invc)
+        return {'courier': 'Hanjin', 'tracking_number': invc, 'status': 'ok', 'history': []}
+
+    monkeypatch.setattr(unified, 'track_hanjin', fake_hanjin)
+    unified.track('1234567890', debug=True)
+    unified.track('1234567890', debug=True)
+    assert len(calls) == 2
+
+
+def test_hinted_lookups_get_their_own_fetch(monkeypatch):
+    calls = []
+
+    def make(courier):
+        async def adapter(invc, debug=False):
+            calls.append(courier)
+            await asyncio.sleep(0.05)
+            return {'courier': courier, 'tracking_number': invc, 'status': 'ok', 'history': []}
+        return adapter
+
+    monkeypatch.setattr(unified, 'track_cj_async', make('CJ Logistics'))
+    monkeypatch.setattr(unified, 'track_lotte_async', make('Lotte'))
+
+    async def both():
+        return await asyncio.gather(
+            unified.track_async('123456789013'),
+            unified.track_async('123456789013', courier='lotte'),
+            unified.track_async('123456789013', courier='Lotte'),
+        )
+
+    plain, hinted, by_name = asyncio.run(both())
+    assert plain['courier'] == 'CJ Logistics' and hinted['courier'] == 'Lotte'
+    assert by_name is hinted
+    assert sorted(calls) == ['CJ Logistics', 'Lotte']
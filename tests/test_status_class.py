@@ -0,0 +1,32 @@
+import db
+import utils
+
+
+def test_classify_follows_keyword_edits(monkeypatch):
+    assert utils.classify_status('고객님께 배달완료') == 'delivered'
+    assert utils.classify_status('배송완료 (조회불가 아님)') == 'delivered'
+    assert utils.classify_status('Not Found') == 'error'
+    assert utils.classify_status('In transit') == 'other'
+
+    monkeypatch.setitem(utils.STATUS_KEYWORDS, 'delivered', utils.STATUS_KEYWORDS['delivered'] + ['arrived'])
+    assert utils.classify_status('Arrived at door') == 'delivered'
+    monkeypatch.undo()
+    assert utils.classify_status('Arrived at door') == 'other'
+
+
+def test_status_class_is_stored_with_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'status_class.db')
+    db.init_db()
+    item_id = db.add_tracked('T1')
+    assert db.list_tracked()[0]['status_class'] == 'other'
+
+    db.update_tracked_result(item_id, {'status': '배송완료'})
+    assert db.list_tracked()[0]['status_class'] == 'delivered'
+
+    # rows written before the column existed are classified on startup
+    conn = db.get_conn()
+    conn.execute('UPDATE tracked SET status_class=NULL')
+    conn.commit()
+    conn.close()
+    db.init_db()
+    assert db.list_tracked()[0]['status_class'] == 'delivered'
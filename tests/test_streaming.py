@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import httpx
+
+import net
+import streaming
+import utils
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class Body(httpx.AsyncByteStream):
+    """Yields ``chunks`` and records how many were read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aiter__(self):
+        for c in self.chunks:
+            self.sent += 1
+            yield c
+
+
+def fetch(body, url='https://www.hanjin.co.kr/x', headers=None, **kw):
+    def handler(request):
+        return httpx.Response(200, headers=headers or {}, stream=body)
+
+    async def run():
+        net._state().client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await net.aget(url, **kw)
+        finally:
+            await net.aclose()
+    return asyncio.run(run())
+
+
+def test_detect_charset():
+    assert streaming.detect_charset({'content-type': 'text/html; charset=EUC-KR'}, b'') == 'cp949'
+    assert streaming.detect_charset({}, b'<html><meta charset="utf-8">') == 'utf-8'
+    assert streaming.detect_charset({}, b'<meta http-equiv="Content-Type" content="text/html; charset=euc-kr">') == 'cp949'
+    assert streaming.detect_charset({}, '배송완료'.encode('cp949')) == 'cp949'
+    # a multi-byte character cut at the end of the sniffed bytes is still UTF-8
+    assert streaming.detect_charset({}, '배송완료'.encode('utf-8')[:-1]) == 'utf-8'
+
+
+def test_stops_after_table_closes():
+    page = ('<html><body><table class="tb_deliver"><tr><td>배송완료</td></tr></table>'
+            + '<div>footer</div>' * 20000 + '</body></html>').encode('cp949')
+    body = Body(chunked(page, 1024))
+    r = fetch(body, until=streaming.element_closed('table.tb_deliver'))
+    assert r.encoding == 'cp949' and not r.complete and not r.truncated
+    assert '배송완료</td></tr></table>' in r.text
+    assert body.sent < len(body.chunks) // 10
+
+
+def test_nested_tables_are_counted():
+    w = streaming.ElementClosed('table.table_col')
+    assert not w.feed('<table class="x"></table><table class="table_col"><tr><td><table>')
+    assert not w.feed('</table></td></tr>')
+    assert w.feed('</tab' + 'le>')
+
+
+def test_stops_after_json_closes_across_chunks():
+    data = {'trackingDetails': [{'transKind': '배송중 {"}'}] * 200}
+    page = ('<script>var trackingInfo = ' + json.dumps(data, ensure_ascii=False) + ';</script>' + 'x' * 100000).encode('utf-8')
+    body = Body(chunked(page, 97))
+    r = fetch(body, url='https://www.cvsnet.co.kr/x', until=streaming.JsonClosed)
+    assert not r.complete
+    assert json.loads(r.text[r.text.index('{'):r.text.rindex('}') + 1]) == data
+
+
+def test_json_decoys_are_read_past():
+    data = {'trackingDetails': [{'transKind': '배송완료'}]}
+    page = ('<script>var data = {"menu": [1, 2]}; var jsonData = {"a": 1};</script>' + 'x' * 40000
+            + '<script>var tracking = ' + json.dumps(data, ensure_ascii=False) + ';</script>' + 'x' * 100000).encode('utf-8')
+    body = Body(chunked(page, 1000))
+    r = fetch(body, url='https://www.cvsnet.co.kr/x', until=streaming.JsonClosed)
+    assert not r.complete and body.sent < len(body.chunks) // 2
+    assert utils.extract_json(r.text) == data
+
+    w = streaming.JsonClosed()
+    assert not w.feed('var data = {"x": 1}; var trackingInfo = ')
+    assert w.feed('{"y": 2};')
+
+
+def test_small_bodies_are_read_to_the_end():
+    page = ('<script>var trackingInfo = {"a": 1};</script>' + 'x' * 10000).encode('utf-8')
+    body = Body(chunked(page, 1000))
+    r = fetch(body, until=streaming.JsonClosed)
+    assert r.complete and body.sent == len(body.chunks)
+
+
+def test_size_cap():
+    body = Body(chunked(b'a' * 100000, 4096))
+    r = fetch(body, stream=True, max_bytes=10000)
+    assert r.truncated and len(r.content) == 10000 and len(r.text) == 10000
+
+
+def test_small_complete_body():
+    r = fetch(Body([b'{"a": 1}']), headers={'content-type': 'application/json'}, stream=True)
+    assert r.complete and r.encoding == 'utf-8' and r.text == '{"a": 1}'
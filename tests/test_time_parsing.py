@@ -30,3 +30,19 @@ def test_parse_fuzzy_month_name():
 def test_parse_invalid_returns_none():
     dt = parse_time_to_dt('sometime today')
     assert dt is None
+
+
+def test_parse_courier_layouts():
+    assert parse_time_to_dt('2025-12-16T10:00:00') == datetime(2025, 12, 16, 10, 0)
+    assert parse_time_to_dt('2025.12.16. 11:13') == datetime(2025, 12, 16, 11, 13)
+    assert parse_time_to_dt('2025.12.16') == datetime(2025, 12, 16)
+    assert parse_time_to_dt('Dec 16, 2025 11:13') == datetime(2025, 12, 16, 11, 13)
+    assert parse_time_to_dt('2025-13-45 10:00') is None
+
+
+def test_repeated_strings_are_memoized():
+    import utils
+    parse_time_to_dt('2025-12-17 08:30')
+    hits = utils._parse_time.cache_info().hits
+    assert parse_time_to_dt(' 2025-12-17 08:30 ') == datetime(2025, 12, 17, 8, 30)
+    assert utils._parse_time.cache_info().hits == hits + 1
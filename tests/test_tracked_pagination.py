@@ -0,0 +1,102 @@
+import json
+import sqlite3
+
+import pytest
+
+import db
+from app import app
+
+STATUSES = ['배송완료', '이동중', '조회불가']
+
+
+@pytest.fixture
+def watchlist(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'pages.db')
+    db.init_db()
+    ids = [db.add_tracked(f'T{i:03d}', label=f'box {i}') for i in range(25)]
+    # Every fourth item stays unchecked; a few share a first-event time
+    db.update_tracked_results([
+        (item_id, {
+            'courier': 'CJ Logistics' if n % 2 else 'Lotte',
+            'status': STATUSES[n % 3],
+            'history': [{'time': f'2025-12-{1 + n % 5:02d} 10:00', 'location': '허브', 'message': '집화'}],
+        })
+        for n, item_id in enumerate(ids) if n % 4
+    ])
+    return ids
+
+
+def _pages(c, query, limit):
+    seen, cursor = [], None
+    while True:
+        url = f'/api/tracked?{query}&limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        data = c.get(url).get_json()
+        assert len(data['items']) <= limit
+        seen += [it['tracking'] for it in data['items']]
+        cursor = data['next_cursor']
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize('query', [
+    'sort=first_event&order=desc',
+    'sort=first_event&order=asc',
+    'sort=created_at&order=asc',
+    'sort=last_checked&order=desc',
+    'status=delivered&sort=first_event&order=asc',
+    'q=cj',
+    '',
+])
+def test_pages_cover_full_listing_in_order(watchlist, query):
+    with app.test_client() as c:
+        full = [it['tracking'] for it in c.get(f'/api/tracked?{query}').get_json()['items']]
+        assert full
+        assert _pages(c, query, 4) == full
+
+
+def test_first_event_order_and_unchecked_items(watchlist):
+    items, _ = db.query_tracked(sort='first_event', order='desc')
+    # Items without events come first in descending order, as before
+    unchecked = [it for it in items if it['last_result'] is None]
+    assert items[:len(unchecked)] == unchecked
+    times = [it['last_result']['history'][0]['time'] for it in items[len(unchecked):]]
+    assert times == sorted(times, reverse=True)
+
+
+def test_derived_columns_are_stored(watchlist):
+    conn = sqlite3.connect(str(db.DB_PATH))
+    row = conn.execute("SELECT status_text, courier, first_event_at, last_event_at, status_class FROM tracked WHERE tracking='T001'").fetchone()
+    conn.close()
+    assert row == ('이동중', 'CJ Logistics', '2025-12-02T10:00:00', '2025-12-02T10:00:00', 'other')
+
+
+def test_search_escapes_like_wildcards(watchlist):
+    db.add_tracked('X_1', label='50% off')
+    assert [it['tracking'] for it in db.query_tracked(q='%')[0]] == ['X_1']
+    assert [it['tracking'] for it in db.query_tracked(q='_')[0]] == ['X_1']
+
+
+def test_bad_paging_arguments(watchlist):
+    with app.test_client() as c:
+        assert c.get('/api/tracked?limit=abc').status_code == 400
+        assert c.get('/api/tracked?limit=5&cursor=not-a-cursor').status_code == 400
+        data = c.get('/api/tracked?limit=100000').get_json()
+        assert len(data['items']) == 25 and data['next_cursor'] is None
+
+
+def test_existing_rows_are_backfilled(tmp_path, monkeypatch):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE tracked (id INTEGER PRIMARY KEY AUTOINCREMENT, tracking TEXT NOT NULL UNIQUE, label TEXT, last_result TEXT, last_checked TEXT, created_at TEXT NOT NULL)")
+    result = {'courier': 'Hanjin', 'status': '배송완료', 'history': [{'time': '2025.12.16 10:00'}, {'time': '2025.12.17 09:30'}]}
+    conn.execute("INSERT INTO tracked (tracking, last_result, created_at) VALUES ('OLD', ?, '2025-12-01')", (json.dumps(result),))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.init_db()
+    items, _ = db.query_tracked(status='delivered', q='hanjin')
+    assert [it['tracking'] for it in items] == ['OLD']
+    with db.pooled() as conn:
+        row = conn.execute("SELECT first_event_at, last_event_at FROM tracked").fetchone()
+    assert tuple(row) == ('2025-12-16T10:00:00', '2025-12-17T09:30:00')
@@ -0,0 +1,129 @@
+import sqlite3
+
+import pytest
+
+import db
+from app import app
+
+
+def _search(q):
+    return sorted(it['tracking'] for it in db.query_tracked(q=q)[0])
+
+
+@pytest.fixture
+def watchlist(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', tmp_path / 'search.db')
+    db.init_db()
+    ids = {
+        'CJ001': db.add_tracked('CJ001', label='겨울 코트'),
+        'LT002': db.add_tracked('LT002', label='mattress topper'),
+        'HJ003': db.add_tracked('HJ003'),
+    }
+    db.update_tracked_results([
+        (ids['CJ001'], {'courier': 'CJ Logistics', 'status': '이동중',
+                        'history': [{'time': '2025-12-01 09:00', 'location': '대전 허브', 'message': '간선상차'}]}),
+        (ids['HJ003'], {'courier': 'Hanjin', 'status': '배송완료',
+                        'history': [{'time': '2025-12-02 10:00', 'location': '부산 중앙', 'message': '배송완료'}]}),
+    ])
+    return ids
+
+
+def test_index_is_available(watchlist):
+    assert db.FTS_AVAILABLE
+    with db.pooled() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tracked_fts WHERE tracked_fts MATCH '\"CJ001\"'").fetchone()[0] == 1
+        # Event text is indexed per event, not copied into tracked
+        assert conn.execute("SELECT COUNT(*) FROM events_fts WHERE events_fts MATCH '\"간선상차\"'").fetchone()[0] == 1
+
+
+def test_search_label_courier_status_and_events(watchlist):
+    assert _search('겨울 코트') == ['CJ001']
+    assert _search('TOPPER') == ['LT002']
+    assert _search('hanjin') == ['HJ003']
+    assert _search('배송완료') == ['HJ003']
+    assert _search('대전 허브') == ['CJ001']
+    assert _search('간선상') == ['CJ001']
+    # Every term has to match
+    assert _search('부산 cj') == []
+
+
+def test_short_terms(watchlist):
+    # One- and two-character terms are below the trigram length
+    assert _search('부산') == ['HJ003']
+    assert _search('LT') == ['LT002']
+    assert _search('03 hanjin') == ['HJ003']
+    # Any substring, not only the start of a word
+    assert _search('03') == ['HJ003']
+    assert _search('완료') == ['HJ003']
+    assert _search('앙') == ['HJ003']
+    assert _search('중부') == []
+    assert _search('s') == ['CJ001', 'LT002']
+    # Not letters or digits: LIKE
+    assert _search('-') == []
+
+
+def test_short_terms_use_gram_index(watchlist):
+    with db.pooled() as conn:
+        assert [r[0] for r in conn.execute("SELECT rowid FROM tracked_grams WHERE tracked_grams MATCH '\"cj\"'")] == [watchlist['CJ001']]
+        assert conn.execute("SELECT COUNT(*) FROM events_grams WHERE events_grams MATCH '\"상차\"'").fetchone()[0] == 1
+        where, params = db._search('부산')
+        plan = " ".join(r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN SELECT id FROM tracked WHERE {where}", params))
+    assert 'events_grams' in plan and 'LIKE' not in where
+
+
+def test_quotes_and_operators_are_literal(watchlist):
+    assert _search('"mattress') == []
+    assert _search('mattress OR hanjin') == []
+    assert _search('NEAR(cj') == []
+
+
+def test_index_follows_insert_update_and_delete(watchlist):
+    new_id = db.add_tracked('NEW9', label='노트북 파우치')
+    assert _search('노트북') == ['NEW9']
+
+    db.update_tracked_label(new_id, 'laptop sleeve')
+    assert _search('노트북') == []
+    assert _search('sleeve') == ['NEW9']
+
+    db.update_tracked_result(new_id, {'courier': 'Lotte', 'status': '이동중',
+                                      'history': [{'time': '2025-12-03 08:00', 'location': '옥천 HUB', 'message': '간선하차'}]})
+    assert _search('옥천 hub') == ['NEW9']
+    db.update_tracked_result(new_id, {'courier': 'Lotte', 'status': '배송완료',
+                                      'history': [{'time': '2025-12-04 08:00', 'location': '서울 송파', 'message': '배달완료'}]})
+    assert _search('옥천 hub') == []
+    assert _search('서울 송파') == ['NEW9']
+
+    assert _search('옥천') == []
+    assert _search('송파') == ['NEW9']
+
+    db.remove_tracked(new_id)
+    assert _search('sleeve') == []
+    assert _search('송파') == []
+    with db.pooled() as conn:
+        for name in ('tracked_fts', 'events_fts', 'tracked_grams', 'events_grams'):
+            conn.execute(f"INSERT INTO {name}({name}) VALUES ('integrity-check')")
+        assert conn.execute("SELECT COUNT(*) FROM events_fts").fetchone()[0] == 2
+
+
+def test_existing_rows_are_indexed(tmp_path, monkeypatch):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE tracked (id INTEGER PRIMARY KEY AUTOINCREMENT, tracking TEXT NOT NULL UNIQUE, label TEXT, last_result TEXT, last_checked TEXT, created_at TEXT NOT NULL)")
+    conn.execute("""INSERT INTO tracked (tracking, label, last_result, created_at) VALUES ('OLD1', '선물 상자', '{"courier": "Hanjin", "status": "배송완료", "history": [{"time": "2025.12.16 10:00", "location": "인천 터미널", "message": "도착"}]}', '2025-12-01')""")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.init_db()
+    assert _search('선물 상자') == ['OLD1']
+    assert _search('인천 터미널') == ['OLD1']
+    assert _search('인천') == ['OLD1']
+
+
+def test_like_fallback_without_fts(watchlist, monkeypatch):
+    monkeypatch.setattr(db, 'FTS_AVAILABLE', False)
+    assert _search('겨울 코트') == ['CJ001']
+    assert _search('대전 허브') == ['CJ001']
+    with app.test_client() as c:
+        items = c.get('/api/tracked?q=Hanjin').get_json()['items']
+        assert [it['tracking'] for it in items] == ['HJ003']
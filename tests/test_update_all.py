@@ -14,11 +14,11 @@ def test_update_all_endpoint(tmp_path, monkeypatch):
         r2 = c.post('/api/tracked', json={'tracking': 'BBB'})
         assert r1.status_code == 200 and r2.status_code == 200
 
-        # monkeypatch unified.track to return predictable results
-        def fake_track(tracking):
+        # monkeypatch the async dispatcher used by the batch to return predictable results
+        async def fake_track_async(tracking, debug=False, probe=None, courier=None):
             return {'courier': 'Mock', 'tracking_number': tracking, 'status': f'OK-{tracking}', 'history': [], 'latest_event': {}}
 
-        monkeypatch.setattr(unified, 'track', fake_track)
+        monkeypatch.setattr(unified, 'track_async', fake_track_async)
 
         # call update all
         resp = c.post('/api/tracked/check_all')
@@ -1,8 +1,12 @@
 import requests
-from bs4 import BeautifulSoup
 import json
 import re
 from utils import extract_json
+from htmlparse import Regions, make_soup
+
+# Parts of the pages the parsers below read; the rest is never parsed
+LOTTE_REGIONS = Regions("div.data_table", "div.delivery_step2", "input#goodsStep", "div.scroll_date_table", "footer", "button")
+CUPOST_REGIONS = Regions("p.f-s-20", "p.c-gray03", "div.rounded-badge", "div.result-info-1", "div.process", "div.location-process")
 
 def track_lotte(inv_no) -> str:
     url = "https://www.lotteglogis.com/mobile/reservation/tracking/linkView"
@@ -53,7 +57,7 @@ def parse_tracking_html(html_content):
     """
     Parse Lotte Global Logistics tracking HTML and convert to JSON
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, regions=LOTTE_REGIONS)
     
     # Extract basic tracking information
     tracking_data = {}
@@ -143,7 +147,7 @@ def parse_tracking_html(html_content):
 
 def parse_cupost_main(html_content):
     """Extract tracking information from CUpost HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, regions=CUPOST_REGIONS)
     
     tracking_data = {}
     
@@ -1,37 +1,19 @@
-# Async batch tracker for concurrent updates
-async def track_many_async(tracking_numbers, debug=False):
-    tasks = []
-    for invc in tracking_numbers:
-        invc = invc.strip()
-        # Dispatch to the correct async tracker based on number format
-        if re.match(r"^\d{12}$", invc):
-            tasks.append(track_cj_async(invc, debug=debug))
-        elif re.match(r"^\d{11}$", invc):
-            tasks.append(track_cu_async(invc, debug=debug))
-        elif re.match(r"^\d{13}$", invc):
-            # Korea Post is not async yet, fallback to sync in thread
-            import asyncio
-            loop = asyncio.get_running_loop()
-            from functools import partial
-            tasks.append(loop.run_in_executor(None, track_koreapost, invc, debug))
-        elif re.match(r"^\d{10}$", invc):
-            tasks.append(track_hanjin_async(invc, debug=debug))
-        else:
-            # fallback to sync for unknowns
-            import asyncio
-            loop = asyncio.get_running_loop()
-            from functools import partial
-            tasks.append(loop.run_in_executor(None, track, invc, debug))
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return results
-import requests
-import httpx
 import asyncio
-from bs4 import BeautifulSoup, ResultSet, Tag
+import artifacts
+from htmlparse import Regions, make_soup
 import re
 import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+import net
+import detect
+import parsepool
+import streaming
 import utils
 import tracking
+from cache import SingleFlight
 logger = logging.getLogger("unified")
 
 # -------------------------------------------------------------
@@ -68,18 +50,93 @@ def normalize(
 # -------------------------------------------------------------
 # CJ Logistics (대한통운)
 # -------------------------------------------------------------
+CJ_TRACKING_URL = "https://www.cjlogistics.com/ko/tool/parcel/tracking"
+CJ_DETAIL_URL = "https://www.cjlogistics.com/ko/tool/parcel/tracking-detail"
+# How long a CSRF token/cookie pair is reused before fetching a fresh one
+CJ_SESSION_TTL = 600.0
+# Status codes CJ answers with when the token or session was rejected
+CJ_REJECTED_STATUS = (401, 403, 419)
+
+_CSRF_INPUT_RE = re.compile(r"<input\b[^>]*\bname=[\"']_csrf[\"'][^>]*>", re.I)
+_VALUE_ATTR_RE = re.compile(r"\bvalue=[\"']([^\"']*)[\"']", re.I)
+
+
+def find_csrf_token(html):
+    """Return the ``_csrf`` hidden input value from a page, or None."""
+    m = _CSRF_INPUT_RE.search(html or "")
+    if not m:
+        return None
+    v = _VALUE_ATTR_RE.search(m.group(0))
+    return v.group(1) if v else None
+
+
+class CJSession:
+    """CSRF token and session cookies for the CJ detail endpoint.
+
+    Shared by concurrent lookups: the tracking page is fetched once per
+    ``CJ_SESSION_TTL`` (or after the server rejects the token) and every
+    lookup in between only POSTs the detail request.
+    """
+
+    def __init__(self, ttl=CJ_SESSION_TTL):
+        self.ttl = ttl
+        self.csrf = None
+        self.cookie = None
+        self.expires = 0.0
+        self.generation = 0
+        self._locks = weakref.WeakKeyDictionary()
+
+    def valid(self):
+        return self.csrf is not None and time.monotonic() < self.expires
+
+    def _lock(self):
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def get(self):
+        """Return ``(csrf, cookie_header, generation)``, refreshing if needed."""
+        if not self.valid():
+            async with self._lock():
+                if not self.valid():
+                    await self._refresh()
+        return self.csrf, self.cookie, self.generation
+
+    async def _refresh(self):
+        r = await net.aget(CJ_TRACKING_URL)
+        csrf = find_csrf_token(r.text)
+        if not csrf:
+            raise ValueError("CJ CSRF token not found")
+        cookies = getattr(r, "cookies", None) or {}
+        self.csrf = csrf
+        self.cookie = "; ".join(f"{k}={v}" for k, v in cookies.items()) or None
+        self.expires = time.monotonic() + self.ttl
+        self.generation += 1
+
+    def invalidate(self, generation=None):
+        """Drop the cached token (only if it is still ``generation``)."""
+        if generation is None or generation == self.generation:
+            self.csrf = None
+
+
+_cj_session = CJSession()
+
+
 async def track_cj_async(invc, debug=False):
-    url_csrf = "https://www.cjlogistics.com/ko/tool/parcel/tracking"
-    url_detail = "https://www.cjlogistics.com/ko/tool/parcel/tracking-detail"
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url_csrf)
-        soup = BeautifulSoup(r.text, "html.parser")
-        csrf = soup.find("input", {"name": "_csrf"})["value"]
-        r2 = await client.post(url_detail, data={"_csrf": csrf, "paramInvcNo": invc})
-    data = utils.extract_json(r2.text)
+    # One retry with a fresh session if the cached token was rejected
+    for _ in range(2):
+        csrf, cookie, generation = await _cj_session.get()
+        headers = {"Cookie": cookie} if cookie else None
+        r2 = await net.apost(CJ_DETAIL_URL, data={"_csrf": csrf, "paramInvcNo": invc}, headers=headers, idempotent=True, stream=True)
+        data = utils.extract_json(r2.text, content_type=getattr(r2, "headers", {}).get("content-type"))
+        if r2.status_code not in CJ_REJECTED_STATUS and data is not None:
+            break
+        _cj_session.invalidate(generation)
     if not data or "trackingDetails" not in data:
         if debug:
-            return {"_debug": {"raw": r2.text}, "error": "No tracking data found"}
+            return {"_debug": artifacts.describe(r2.text), "error": "No tracking data found"}
         return None
     details = data["trackingDetails"]
     history = [
@@ -101,71 +158,32 @@ async def track_cj_async(invc, debug=False):
         history=history,
     )
     if debug:
-        out["_debug"] = {"raw": r2.text}
+        out["_debug"] = artifacts.describe(r2.text)
     return out
 
 # Synchronous wrapper for compatibility
 def track_cj(invc, debug=False):
-    return asyncio.run(track_cj_async(invc, debug=debug))
+    return net.run(track_cj_async(invc, debug=debug))
 
 # -------------------------------------------------------------
 # CVSNet (GS25 택배)
 # -------------------------------------------------------------
-def track_cvs(invc, debug=False):
-    url: str = f"https://www.cvsnet.co.kr/invoice/tracking.do?invoice_no={invc}"
-    r = requests.get(url)
-    attempts = []
-
-    # Try a few decodings/variants to handle different encodings from the site
-    candidates = [("requests_text", r.text)]
-    try:
-        candidates.append(("utf8", r.content.decode("utf-8", errors="replace")))
-    except Exception:
-        pass
-    try:
-        candidates.append(("cp949", r.content.decode("cp949", errors="replace")))
-    except Exception:
-        pass
-
-    data = None
-    used_encoding = None
-    for name, txt in candidates:
-        attempts.append({"method": name, "length": len(txt)})
-        tmp = utils.extract_json(txt)
-        if tmp:
-            data = tmp
-            used_encoding: str = name
-            break
-
+def parse_cvs(text, invc, content_type=None):
+    """Normalized result from a CVSNet tracking page, or None without data."""
+    data = utils.extract_json(text, content_type=content_type)
     if not data or "trackingDetails" not in data:
-        if debug:
-            return {
-                "_debug": {
-                    "raw": r.text,
-                    "status_code": getattr(r, "status_code", None),
-                    "headers": dict(getattr(r, "headers", {})),
-                    "snippet": r.text[:2000],
-                    "attempts": attempts,
-                    "used": used_encoding,
-                },
-                "error": "No tracking data found",
-            }
         return None
-
-    details = data["trackingDetails"]
-
     history = [
         {
             "time": d["transTime"].replace("T", " ")[:16],
             "location": d["transWhere"],
             "message": d["transKind"],
         }
-        for d in details
+        for d in data["trackingDetails"]
     ]
     history = utils.normalize_history(history)
     latest = history[-1] if history else {}
-
-    out = normalize(
+    return normalize(
         courier="CVSNet (GS25)",
         tracking_number=invc,
         sender=data["sender"]["name"],
@@ -173,24 +191,55 @@ def track_cvs(invc, debug=False):
         latest=latest,
         history=history,
     )
+
+
+async def track_cvs_async(invc, debug=False):
+    url: str = f"https://www.cvsnet.co.kr/invoice/tracking.do?invoice_no={invc}"
+    # Streamed: decoded once with the detected charset, and reading stops
+    # once the tracking JSON has closed
+    r = await net.aget(url, until=streaming.JsonClosed)
+    used_encoding = getattr(r, "encoding", None) or "text"
+    attempts = [{"method": used_encoding, "length": len(r.text)}]
+    out = await parsepool.run(parse_cvs, r.text, invc, getattr(r, "headers", {}).get("content-type"))
+
+    if out is None:
+        if debug:
+            return {
+                "_debug": {
+                    **artifacts.describe(r.text),
+                    "status_code": getattr(r, "status_code", None),
+                    "headers": dict(getattr(r, "headers", {})),
+                    "attempts": attempts,
+                    "used": used_encoding,
+                },
+                "error": "No tracking data found",
+            }
+        return None
     if debug:
         out["_debug"] = {
-            "raw": r.text,
+            **artifacts.describe(r.text),
             "used": used_encoding,
             "attempts": attempts,
-            "snippet": r.text[:2000],
         }
     return out
 
+# Synchronous wrapper for compatibility
+def track_cvs(invc, debug=False):
+    return net.run(track_cvs_async(invc, debug=debug))
+
 # -------------------------------------------------------------
 # Lotte (롯데택배)
 # -------------------------------------------------------------
-async def track_lotte_async(invc, debug=False):
-    url = "https://www.lotteglogis.com/mobile/reservation/tracking/linkView"
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.post(url, data={"InvNo": invc})
+LOTTE_TABLE_REGIONS = Regions("table")
+
+
+def parse_lotte(text, invc, debug=False):
+    """Normalized result from a Lotte tracking page.
+
+    With ``debug``, ``_debug.parsed`` holds the structured page data.
+    """
     try:
-        parsed = tracking.parse_tracking_html(r.text)
+        parsed = tracking.parse_tracking_html(text)
         events = parsed.get('trackingEvents', [])
         history = [
             {
@@ -211,12 +260,12 @@ async def track_lotte_async(invc, debug=False):
         out['origin'] = parsed.get('origin', '')
         out['destination'] = parsed.get('destination', '')
         if debug:
-            out['_debug'] = {'raw': r.text, 'parsed': parsed, 'snippet': r.text[:2000], 'length': len(r.text)}
+            out['_debug'] = {'parsed': parsed}
         return out
     except Exception:
         pass
     # Fallback: extract table rows
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = make_soup(text, regions=LOTTE_TABLE_REGIONS)
     rows = soup.select("table tr")
     history = [
         {"time": tds[0].text.strip(), "location": tds[2].text.strip(), "message": tds[1].text.strip()}
@@ -225,54 +274,40 @@ async def track_lotte_async(invc, debug=False):
     ]
     history = utils.normalize_history(history)
     latest = history[-1] if history else {}
-    out = normalize(
+    return normalize(
         courier="Lotte",
         tracking_number=invc,
         latest=latest,
         history=history,
     )
+
+
+async def track_lotte_async(invc, debug=False):
+    url = "https://www.lotteglogis.com/mobile/reservation/tracking/linkView"
+    r = await net.apost(url, data={"InvNo": invc}, idempotent=True, stream=True)
+    out = await parsepool.run(parse_lotte, r.text, invc, debug)
     if debug:
-        out["_debug"] = {"raw": r.text, "snippet": r.text[:2000], "length": len(r.text)}
+        out["_debug"] = {**artifacts.describe(r.text), **out.get("_debug", {})}
     return out
 
 # Synchronous wrapper for compatibility
 def track_lotte(invc, debug=False):
-    return asyncio.run(track_lotte_async(invc, debug=debug))
+    return net.run(track_lotte_async(invc, debug=debug))
 
 
 # -------------------------------------------------------------
 # CU Post (CUpost)
 # -------------------------------------------------------------
-async def track_cu_async(invc, debug=False):
-    url = "https://www.cupost.co.kr/mobile/delivery/allResult.cupost"
-    payload = {"invoice_no": invc}
-
-    headers = {"User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Mobile Safari/537.36"}
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.post(url, data=payload, headers=headers)
-    except Exception as e:
-        if debug:
-            return {"_debug": {"error": str(e)}, "error": "Request failed"}
-        return None
+def parse_cu(text, invc, debug=False):
+    """Normalized result from a CUpost result page, or None without data.
 
+    With ``debug``, ``_debug.parsed`` holds the structured page data.
+    """
     try:
-        parsed = tracking.parse_cupost_main(r.text)
+        parsed = tracking.parse_cupost_main(text)
     except Exception:
         parsed = None
-
     if not parsed:
-        if debug:
-            return {
-                "_debug": {
-                    "raw": r.text,
-                    "status_code": getattr(r, "status_code", None),
-                    "headers": dict(getattr(r, "headers", {})),
-                    "snippet": r.text[:2000],
-                    "length": len(r.text),
-                },
-                "error": "No tracking data found",
-            }
         return None
 
     events = parsed.get("trackingEvents", [])
@@ -293,12 +328,39 @@ async def track_cu_async(invc, debug=False):
     )
     out["origin"] = parsed.get("origin", "")
     out["destination"] = parsed.get("destination", "")
+    if debug:
+        out["_debug"] = {"parsed": parsed}
+    return out
+
+
+async def track_cu_async(invc, debug=False):
+    url = "https://www.cupost.co.kr/mobile/delivery/allResult.cupost"
+    payload = {"invoice_no": invc}
+
+    headers = {"User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Mobile Safari/537.36"}
+    try:
+        r = await net.apost(url, data=payload, headers=headers, idempotent=True, stream=True)
+    except Exception as e:
+        if debug:
+            return {"_debug": {"error": str(e)}, "error": "Request failed"}
+        return None
+
+    out = await parsepool.run(parse_cu, r.text, invc, debug)
+    if out is None:
+        if debug:
+            return {
+                "_debug": {
+                    **artifacts.describe(r.text),
+                    "status_code": getattr(r, "status_code", None),
+                    "headers": dict(getattr(r, "headers", {})),
+                },
+                "error": "No tracking data found",
+            }
+        return None
     if debug:
         out["_debug"] = {
-            "raw": r.text,
-            "parsed": parsed,
-            "snippet": r.text[:2000],
-            "length": len(r.text),
+            **artifacts.describe(r.text),
+            **out.get("_debug", {}),
             "status_code": getattr(r, "status_code", None),
             "headers": dict(getattr(r, "headers", {})),
         }
@@ -306,16 +368,17 @@ async def track_cu_async(invc, debug=False):
 
 # Synchronous wrapper for compatibility
 def track_cu(invc, debug=False):
-    return asyncio.run(track_cu_async(invc, debug=debug))
+    return net.run(track_cu_async(invc, debug=debug))
 
 # -------------------------------------------------------------
 # Hanjin (한진택배)
 # -------------------------------------------------------------
-async def track_hanjin_async(invc, debug=False):
-    url = f"https://www.hanjin.co.kr/kor/CMS/DeliveryMgr/WaybillResult.do?mCode=MN038&NUM={invc}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
+HANJIN_REGIONS = Regions("table.tb_deliver")
+
+
+def parse_hanjin(text, invc):
+    """Normalized result from a Hanjin waybill page."""
+    soup = make_soup(text, regions=HANJIN_REGIONS)
     rows = soup.select("table.tb_deliver tbody tr")
     history = []
     for tr in rows:
@@ -326,27 +389,35 @@ async def track_hanjin_async(invc, debug=False):
         history.append({"time": time, "location": location, "message": message})
     history = utils.normalize_history(history)
     latest = history[-1] if history else {}
-    out = normalize(
+    return normalize(
         courier="Hanjin",
         tracking_number=invc,
         latest=latest,
         history=history,
     )
+
+
+async def track_hanjin_async(invc, debug=False):
+    url = f"https://www.hanjin.co.kr/kor/CMS/DeliveryMgr/WaybillResult.do?mCode=MN038&NUM={invc}"
+    r = await net.aget(url, until=streaming.element_closed("table.tb_deliver"))
+    out = await parsepool.run(parse_hanjin, r.text, invc)
     if debug:
-        out["_debug"] = {"raw": r.text}
+        out["_debug"] = artifacts.describe(r.text)
     return out
 
 # Synchronous wrapper for compatibility
 def track_hanjin(invc, debug=False):
-    return asyncio.run(track_hanjin_async(invc, debug=debug))
+    return net.run(track_hanjin_async(invc, debug=debug))
 
 # -------------------------------------------------------------
 # Korea Post (우체국)
 # -------------------------------------------------------------
-def track_koreapost(invc, debug=False):
-    url: str = f"https://service.epost.go.kr/trace.RetrieveDomRigiTraceList.comm?sid1={invc}"
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
+KOREAPOST_REGIONS = Regions("table.table_col")
+
+
+def parse_koreapost(text, invc):
+    """Normalized result from a Korea Post trace page."""
+    soup = make_soup(text, regions=KOREAPOST_REGIONS)
     rows = soup.select("table.table_col tbody tr")
     history = []
     for tr in rows:
@@ -358,23 +429,33 @@ def track_koreapost(invc, debug=False):
     history = utils.normalize_history(history)
     latest = history[-1] if history else {}
 
-    out = normalize(
+    return normalize(
         courier="Korea Post",
         tracking_number=invc,
         latest=latest,
         history=history,
     )
+
+
+async def track_koreapost_async(invc, debug=False):
+    url: str = f"https://service.epost.go.kr/trace.RetrieveDomRigiTraceList.comm?sid1={invc}"
+    r = await net.aget(url, until=streaming.element_closed("table.table_col"))
+    out = await parsepool.run(parse_koreapost, r.text, invc)
     if debug:
-        out["_debug"] = {"raw": r.text}
+        out["_debug"] = artifacts.describe(r.text)
     return out
 
+# Synchronous wrapper for compatibility
+def track_koreapost(invc, debug=False):
+    return net.run(track_koreapost_async(invc, debug=debug))
+
 
 # ----------------------------------------------------------------------
 # KG Logis
 # ----------------------------------------------------------------------
-def track_kgl(invc, debug=False):
+async def track_kgl_async(invc, debug=False):
     url = f"https://www.kglogis.co.kr/delivery/delivery_result.jsp?item_no={invc}"
-    r = requests.get(url)
+    r = await net.aget(url, stream=True)
     out = normalize(
         courier="KG Logis",
         tracking_number=invc,
@@ -383,15 +464,19 @@ def track_kgl(invc, debug=False):
     )
     out["raw_html"] = r.text
     if debug:
-        out["_debug"] = {"raw": r.text}
+        out["_debug"] = artifacts.describe(r.text)
     return out
 
+# Synchronous wrapper for compatibility
+def track_kgl(invc, debug=False):
+    return net.run(track_kgl_async(invc, debug=debug))
+
 # ----------------------------------------------------------------------
 # Daesin (대신택배)
 # ----------------------------------------------------------------------
-def track_daesin(invc, debug=False):
+async def track_daesin_async(invc, debug=False):
     url = f"http://www.ds3211.co.kr/freight/internalFreightSearch.ht?billno={invc}"
-    r = requests.get(url)
+    r = await net.aget(url, stream=True)
     out = normalize(
         courier="Daesin",
         tracking_number=invc,
@@ -400,15 +485,19 @@ def track_daesin(invc, debug=False):
     )
     out["raw_html"] = r.text
     if debug:
-        out["_debug"] = {"raw": r.text}
+        out["_debug"] = artifacts.describe(r.text)
     return out
+
+# Synchronous wrapper for compatibility
+def track_daesin(invc, debug=False):
+    return net.run(track_daesin_async(invc, debug=debug))
     
 # ----------------------------------------------------------------------
 # Logen (로젠택배)
 # ----------------------------------------------------------------------
-def track_logen(invc, debug=False):
+async def track_logen_async(invc, debug=False):
     url = "https://www.ilogen.com/deliveryInfo"
-    r = requests.post(url, data={"invoiceNo": invc})
+    r = await net.apost(url, data={"invoiceNo": invc}, idempotent=True, until=streaming.JsonClosed)
     data = utils.extract_json(r.text)
     history = []
     latest = {}
@@ -433,94 +522,475 @@ def track_logen(invc, debug=False):
     )
     out["raw_json"] = data
     if debug:
-        out["_debug"] = {"raw": r.text}
+        out["_debug"] = artifacts.describe(r.text)
     return out
-    
-    
+
+# Synchronous wrapper for compatibility
+def track_logen(invc, debug=False):
+    return net.run(track_logen_async(invc, debug=debug))
+
+
+# -------------------------------------------------------------
+# Probing for ambiguous numbers
+# -------------------------------------------------------------
+# 12-digit numbers are shared by several couriers. Candidates are listed in
+# fallback priority order (detect.rank reorders them per number); in every
+# probe mode an earlier candidate with a valid result wins over a later one,
+# whichever answered first.
+PROBE_CANDIDATES_12 = (
+    ("CJ Logistics", "cj"),
+    ("CVSNet", "cvs"),
+    ("Lotte", "lotte"),
+)
+
+# "sequential": try one candidate after another (one request chain at a time)
+# "concurrent": fire all candidates at once
+# "hedged":     start the next candidate after HEDGE_DELAY seconds, or as soon
+#               as every earlier candidate has failed
+PROBE_MODES = ("sequential", "concurrent", "hedged")
+PROBE_MODE = "sequential"
+HEDGE_DELAY = 0.35
+
+
+def _is_valid(res):
+    return bool(res) and "error" not in res
+
+
+def _with_attempts(res, debug_attempts, debug):
+    if debug:
+        res.setdefault("_debug", {})
+        res["_debug"]["attempts"] = debug_attempts
+    return res
+
+
+def _failed_attempt(name, exc, debug, debug_attempts, errors, **extra):
+    errors.append(exc)
+    if debug:
+        debug_attempts.append({"courier": name, **extra, "outcome": "exception", "error": repr(exc)})
+
+
+def _async_adapter(key):
+    # Looked up at call time so adapters can be swapped/monkeypatched
+    return globals()[f"track_{key}_async"]
+
+
+async def probe_async(invc, candidates, debug=False, hedge_delay=0.0, debug_attempts=None, errors=None):
+    """Race ``candidates`` (``(name, key)`` pairs) for ``invc``.
+
+    With ``hedge_delay`` 0 every candidate starts immediately, otherwise
+    candidate *i* starts ``i * hedge_delay`` seconds in (or earlier, once all
+    candidates before it have failed). The highest-priority valid result is
+    returned as soon as it is known; remaining requests are cancelled.
+    Returns ``(winning_key_or_None, result_or_None, debug_attempts)``;
+    exceptions raised by the adapters are appended to ``errors`` if given.
+    """
+    if debug_attempts is None:
+        debug_attempts = []
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    n = len(candidates)
+    pending = {}
+    started_at = {}
+    outcomes = {}
+    winner = None
+
+    def start_next():
+        i = len(started_at)
+        _name, key = candidates[i]
+        started_at[i] = loop.time()
+        task = asyncio.create_task(_async_adapter(key)(invc, debug=debug))
+        pending[task] = i
+
+    start_next()
+    try:
+        while winner is None and (pending or len(started_at) < n):
+            if len(started_at) < n and (not hedge_delay or all(j in outcomes for j in started_at)):
+                start_next()
+                continue
+            timeout = None
+            if len(started_at) < n:
+                timeout = max(0.0, t0 + len(started_at) * hedge_delay - loop.time())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                start_next()
+                continue
+            for task in done:
+                i = pending.pop(task)
+                try:
+                    outcomes[i] = (task.result(), None, loop.time())
+                except Exception as e:
+                    outcomes[i] = (None, e, loop.time())
+                    if errors is not None:
+                        errors.append(e)
+            # The first candidate (in priority order) that is still undecided
+            # blocks any lower-priority winner.
+            for i in range(n):
+                if i not in outcomes:
+                    break
+                if _is_valid(outcomes[i][0]):
+                    winner = i
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if debug:
+        for i, (name, _key) in enumerate(candidates):
+            if i == winner:
+                continue
+            entry = {"courier": name}
+            if i not in started_at:
+                entry["outcome"] = "not started"
+            elif i not in outcomes:
+                entry["outcome"] = "cancelled"
+                entry["elapsed"] = round(loop.time() - started_at[i], 3)
+            else:
+                res, exc, finished = outcomes[i]
+                entry["elapsed"] = round(finished - started_at[i], 3)
+                if exc is not None:
+                    entry["outcome"] = "exception"
+                    entry["error"] = repr(exc)
+                else:
+                    entry["outcome"] = "valid" if _is_valid(res) else "no data"
+                    if res:
+                        entry["result"] = res
+            debug_attempts.append(entry)
+    if winner is None:
+        return None, None, debug_attempts
+    return candidates[winner][1], outcomes[winner][0], debug_attempts
+
+
+def _probe(invc, candidates, debug, mode, debug_attempts, errors):
+    if mode == "sequential" or len(candidates) < 2:
+        for name, key in candidates:
+            try:
+                res = globals()[f"track_{key}"](invc, debug=debug)
+            except Exception as e:
+                # A failing courier (timeout, open circuit, ...) must not
+                # stop the others from being tried
+                _failed_attempt(name, e, debug, debug_attempts, errors)
+                continue
+            if _is_valid(res):
+                return key, res
+            if debug and res:
+                debug_attempts.append({"courier": name, "result": res})
+        return None, None
+    hedge_delay = HEDGE_DELAY if mode == "hedged" else 0.0
+    key, res, _ = net.run(probe_async(invc, candidates, debug=debug, hedge_delay=hedge_delay, debug_attempts=debug_attempts, errors=errors))
+    return key, res
+
+
+async def _probe_async(invc, candidates, debug, mode, debug_attempts, errors):
+    if mode == "sequential" or len(candidates) < 2:
+        for name, key in candidates:
+            try:
+                res = await _async_adapter(key)(invc, debug=debug)
+            except Exception as e:
+                # A failing courier (timeout, open circuit, ...) must not
+                # stop the others from being tried
+                _failed_attempt(name, e, debug, debug_attempts, errors)
+                continue
+            if _is_valid(res):
+                return key, res
+            if debug and res:
+                debug_attempts.append({"courier": name, "result": res})
+        return None, None
+    hedge_delay = HEDGE_DELAY if mode == "hedged" else 0.0
+    key, res, _ = await probe_async(invc, candidates, debug=debug, hedge_delay=hedge_delay, debug_attempts=debug_attempts, errors=errors)
+    return key, res
+
+
+# -------------------------------------------------------------
+# Courier resolution cache
+# -------------------------------------------------------------
+# Once an ambiguous number has resolved to a courier, later lookups go
+# straight to that adapter and only fall back to full dispatch when it
+# stops returning data. The map lives in memory, holding the
+# MAX_RESOLUTIONS most recently used numbers; app.py plugs in tracked.db
+# persistence through set_resolution_store().
+MAX_RESOLUTIONS = 10000
+_resolved: OrderedDict[str, str] = OrderedDict()
+_resolved_lock = threading.Lock()
+_resolution_store = None
+
+
+def set_resolution_store(save=None, forget=None):
+    """Register ``save(invc, key)`` / ``forget(invc)`` persistence callbacks."""
+    global _resolution_store
+    _resolution_store = (save, forget) if (save or forget) else None
+
+
+def load_resolutions(mapping):
+    """Seed the in-memory map with ``{tracking_number: courier_key}``, least recent first."""
+    with _resolved_lock:
+        for invc, key in mapping.items():
+            _resolved[invc] = key
+            _resolved.move_to_end(invc)
+        while len(_resolved) > MAX_RESOLUTIONS:
+            _resolved.popitem(last=False)
+
+
+def clear_resolutions():
+    with _resolved_lock:
+        _resolved.clear()
+
+
+def resolved_courier(invc):
+    return _resolved.get(invc.strip())
+
+
+def _set_resolution(invc, key):
+    # Remember key for invc (None: forget it); returns whether the stored
+    # resolution has to change
+    with _resolved_lock:
+        if key is None:
+            return _resolved.pop(invc, None) is not None
+        if _resolved.get(invc) == key:
+            _resolved.move_to_end(invc)
+            return False
+        _resolved[invc] = key
+        _resolved.move_to_end(invc)
+        if len(_resolved) > MAX_RESOLUTIONS:
+            _resolved.popitem(last=False)
+        return True
+
+
+def _store_resolution(invc, key):
+    if not _resolution_store:
+        return
+    save, forget = _resolution_store
+    fn, args = (forget, (invc,)) if key is None else (save, (invc, key))
+    if fn is None:
+        return
+    try:
+        fn(*args)
+    except Exception:
+        logger.exception("Failed to %s courier resolution for %s", "drop" if key is None else "persist", invc)
+
+
+def remember_courier(invc, key):
+    if _set_resolution(invc, key):
+        _store_resolution(invc, key)
+
+
+def forget_courier(invc):
+    if _set_resolution(invc, None):
+        _store_resolution(invc, None)
+
+
+async def _set_resolution_async(invc, key):
+    # remember_courier/forget_courier with the tracked.db write in a worker
+    # thread, off the event loop
+    if _set_resolution(invc, key) and _resolution_store:
+        await asyncio.to_thread(_store_resolution, invc, key)
+
+
+def _split_cached(invc, candidates):
+    """Return ``(cached_candidate_or_None, remaining_candidates)``."""
+    with _resolved_lock:
+        key = _resolved.get(invc)
+        if key is not None:
+            _resolved.move_to_end(invc)
+    if key is not None:
+        for name, k in candidates:
+            if k == key:
+                return (name, k), tuple(c for c in candidates if c[1] != key)
+    return None, candidates
+
+
+def _cache_miss(name, res, debug, debug_attempts):
+    if debug and res:
+        debug_attempts.append({"courier": name, "cached": True, "result": res})
+
+
 # -------------------------------------------------------------
 # Universal dispatcher
 # -------------------------------------------------------------
-def track(invc, debug=False):
+# Number formats and the couriers that may own them, in fallback order.
+# Daesin, Logen and KG Logis have adapters but no format mapped yet.
+FORMATS = (
+    (re.compile(r"^\d{12}$"), PROBE_CANDIDATES_12),  # CJ / Lotte / GS25 common
+    (re.compile(r"^\d{11}$"), (("CUpost", "cu"),)),  # CUpost uses 11-digit invoice numbers in many cases
+    (re.compile(r"^\d{10}$"), (("Hanjin", "hanjin"),)),
+    (re.compile(r"^\d{13}$"), (("Korea Post", "koreapost"),)),
+)
+SEVEN_ELEVEN_FORMAT = re.compile(r"^\d{20}$")
+
+# Every adapter by key, with the name used in debug attempts
+ADAPTERS = {
+    "cj": "CJ Logistics",
+    "cvs": "CVSNet",
+    "lotte": "Lotte",
+    "cu": "CUpost",
+    "hanjin": "Hanjin",
+    "koreapost": "Korea Post",
+    "kgl": "KG Logis",
+    "daesin": "Daesin",
+    "logen": "Logen",
+}
+
+
+def courier_key(courier):
+    """Map a courier hint (adapter key or name, any case) to its key, or None."""
+    if not courier:
+        return None
+    c = str(courier).strip().lower()
+    for key, name in ADAPTERS.items():
+        if c in (key, name.lower()):
+            return key
+    return None
+
+
+def candidates_for(invc, courier=None):
+    """Return the ``(name, key)`` couriers that may own ``invc``, most likely first.
+
+    The format picks the candidate set; ``detect.rank`` then moves couriers
+    whose check digit fails to the end and boosts sample-number prefixes.
+    ``courier`` (a key from ``ADAPTERS``) is tried first when given.
+    """
+    candidates = ()
+    for patt, format_candidates in FORMATS:
+        if patt.match(invc):
+            candidates = format_candidates
+            break
+    return detect.rank(invc, candidates, names=ADAPTERS, hint=courier_key(courier))
+
+
+def _probe_mode(probe):
+    mode = probe or PROBE_MODE
+    if mode not in PROBE_MODES:
+        raise ValueError(f"Unknown probe mode: {mode!r}")
+    return mode
+
+
+def _raise_failure(errors):
+    # No courier had the number, but some could not be asked: report the
+    # failure rather than an unknown number, so callers keep what they have
+    if errors:
+        raise errors[0]
+
+
+def _fallback(invc, debug_attempts):
+    if SEVEN_ELEVEN_FORMAT.match(invc):
+        # 7-Eleven parcels are not trackable online yet
+        return {'courier': '7-11 착한 택배',
+                'tracking_number': invc,
+                'status': 'unavailable',
+                'history': []
+                }
+    return {"error": "Unknown tracking format", "_debug": {"attempts": debug_attempts} }
+
+
+# Concurrent lookups of the same number share one upstream fetch
+_inflight = SingleFlight()
+
+
+def _flight_key(invc, courier, probe):
+    # Hints change which couriers are asked, so only identical lookups share
+    # a fetch (the same split as app._cache_key)
+    key = courier_key(courier)
+    if courier and key is None:
+        raise ValueError(f"Unknown courier: {courier!r}")
+    return invc, key, probe
+
+
+def track(invc, debug=False, probe=None, courier=None):
+    """Track ``invc`` with the courier matching its format.
+
+    ``probe`` selects how ambiguous numbers are probed (see ``PROBE_MODES``);
+    it defaults to ``PROBE_MODE``. ``courier`` is an optional hint (adapter
+    key or name) tried before the detected candidates. Concurrent non-debug
+    calls for the same number and hints (from any thread or ``track_async``)
+    share one lookup and get the same result.
+    """
     invc = invc.strip()
-    debug_attempts = []
-
-    if re.match(r"^\d{12}$", invc):  # CJ / Lotte / GS25 common
-        # Try CJ first
-        cj = track_cj(invc, debug=debug)
-        if cj and "error" not in cj:
-            if debug:
-                cj.setdefault("_debug", {})
-                cj["_debug"]["attempts"] = debug_attempts
-            return cj
-        else:
-            if debug and cj:
-                debug_attempts.append({"courier": "CJ Logistics", "result": cj})
-
-        # Try CVSNet
-        cvs = track_cvs(invc, debug=debug)
-        if cvs and "error" not in cvs:
-            if debug:
-                cvs.setdefault("_debug", {})
-                cvs["_debug"]["attempts"] = debug_attempts
-            return cvs
-        else:
-            if debug and cvs:
-                debug_attempts.append({"courier": "CVSNet", "result": cvs})
-
-        # Try Lotte
-        l = track_lotte(invc, debug=debug)
-        if l and "error" not in l:
-            if debug:
-                l.setdefault("_debug", {})
-                l["_debug"]["attempts"] = debug_attempts
-            return l
+    if debug:
+        # Debug output is per caller (raw pages, attempts); never shared
+        return _track(invc, debug=True, probe=probe, courier=courier)
+    return _inflight.do(_flight_key(invc, courier, probe), lambda: _track(invc, probe=probe, courier=courier))
+
+
+async def track_async(invc, debug=False, probe=None, courier=None):
+    """Async counterpart of ``track`` using the native async adapters."""
+    invc = invc.strip()
+    if debug:
+        return await _track_async(invc, debug=True, probe=probe, courier=courier)
+    return await _inflight.do_async(_flight_key(invc, courier, probe), lambda: _track_async(invc, probe=probe, courier=courier))
+
+
+def _candidates(invc, courier):
+    if courier and courier_key(courier) is None:
+        raise ValueError(f"Unknown courier: {courier!r}")
+    candidates = candidates_for(invc, courier)
+    # An explicit hint takes precedence over the remembered courier
+    cached, rest = (None, candidates) if courier else _split_cached(invc, candidates)
+    return candidates, cached, rest
+
+
+def _track(invc, debug=False, probe=None, courier=None):
+    debug_attempts, errors = [], []
+    mode = _probe_mode(probe)
+    candidates, cached, rest = _candidates(invc, courier)
+    if cached:
+        try:
+            res = globals()[f"track_{cached[1]}"](invc, debug=debug)
+        except Exception as e:
+            # Probe the other candidates; the resolution is kept since the
+            # failure may be transient
+            _failed_attempt(cached[0], e, debug, debug_attempts, errors, cached=True)
         else:
-            if debug and l:
-                debug_attempts.append({"courier": "Lotte", "result": l})
-    
-    # CUpost uses 11-digit invoice numbers in many cases
-    if re.match(r"^\d{11}$", invc):
-        cu = track_cu(invc, debug=debug)
-        if cu and "error" not in cu:
-            if debug:
-                cu.setdefault("_debug", {})
-                cu["_debug"]["attempts"] = debug_attempts
-            return cu
+            if _is_valid(res):
+                return _with_attempts(res, debug_attempts, debug)
+            forget_courier(invc)
+            _cache_miss(cached[0], res, debug, debug_attempts)
+    key, res = _probe(invc, rest, debug, mode, debug_attempts, errors)
+    if res is not None:
+        if len(candidates) > 1:
+            remember_courier(invc, key)
+        return _with_attempts(res, debug_attempts, debug)
+    _raise_failure(errors)
+    return _fallback(invc, debug_attempts)
+
+
+async def _track_async(invc, debug=False, probe=None, courier=None):
+    debug_attempts, errors = [], []
+    mode = _probe_mode(probe)
+    candidates, cached, rest = _candidates(invc, courier)
+    if cached:
+        try:
+            res = await _async_adapter(cached[1])(invc, debug=debug)
+        except Exception as e:
+            # Probe the other candidates; the resolution is kept since the
+            # failure may be transient
+            _failed_attempt(cached[0], e, debug, debug_attempts, errors, cached=True)
         else:
-            if debug and cu:
-                debug_attempts.append({"courier": "CUpost", "result": cu})
-        
-    
-        # track_daesin(invc, debug=debug)
-        # track_logen(invc, debug=debug)
+            if _is_valid(res):
+                return _with_attempts(res, debug_attempts, debug)
+            await _set_resolution_async(invc, None)
+            _cache_miss(cached[0], res, debug, debug_attempts)
+    key, res = await _probe_async(invc, rest, debug, mode, debug_attempts, errors)
+    if res is not None:
+        if len(candidates) > 1:
+            await _set_resolution_async(invc, key)
+        return _with_attempts(res, debug_attempts, debug)
+    _raise_failure(errors)
+    return _fallback(invc, debug_attempts)
 
-    if re.match(r"^\d{10}$", invc):
-        h = track_hanjin(invc, debug=debug)
-        if debug:
-            h.setdefault("_debug", {})
-            h["_debug"]["attempts"] = debug_attempts
-        return h
 
-    if re.match(r"^\d{13}$", invc):
-        k = track_koreapost(invc, debug=debug)
-        if debug:
-            k.setdefault("_debug", {})
-            k["_debug"]["attempts"] = debug_attempts
-        return k
-    
-    if re.match(r"^\d{20}$", invc):
-        seven_el = {'courier': '7-11 착한 택배',
-               'tracking_number': invc,
-               'status': 'unavailable',
-               'history': []
-               }
-        # kgl = track_kgl(invc, debug=debug)
-        # if debug:
-        #     kgl.setdefault("_debug", {})
-        #     kgl["_debug"]["attempts"] = debug_attempts
-        return seven_el
-    
-    return {"error": "Unknown tracking format", "_debug": {"attempts": debug_attempts} }
+# Async batch tracker for concurrent updates
+async def track_many_async(tracking_numbers, debug=False, probe=None):
+    """Track many numbers concurrently on the running event loop.
+
+    Requests to each courier host are paced by ``ratelimit.scheduler``,
+    whose per-courier ceilings are process-wide settings
+    (``ratelimit.COURIER_LIMITS`` or ``ratelimit.configure`` at startup).
+    Results are returned in input order; a failed lookup yields its
+    exception instead of a result. Duplicate numbers are fetched once.
+    """
+    tasks = [track_async(invc, debug=debug, probe=probe) for invc in tracking_numbers]
+    return await asyncio.gather(*tasks, return_exceptions=True)
 
 # -------------------------------------------------------------
 # Example
@@ -1,4 +1,6 @@
 import json
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import re
 from typing import Match, Any
@@ -33,130 +35,180 @@ def save_debug_to_file(obj, path: str) -> str:
     return str(p)
 
 
-def extract_json(text) -> Any | None:
-    """Try to extract the first JSON object or array from messy HTML/JS text.
+# extract_json limits: inputs longer than EXTRACT_MAX_CHARS are only decoded
+# when the whole body is JSON; otherwise the scans for embedded JSON stop after
+# examining EXTRACT_SCAN_FACTOR characters per input character (plus a small
+# allowance), which keeps the worst case linear in the input size
+EXTRACT_MAX_CHARS: int = 2_000_000
+EXTRACT_SCAN_FACTOR: int = 2
+EXTRACT_SCAN_SLACK: int = 65_536
+
+_JSON_VAR_NAMES: list[str] = ["trackingInfo", "tracking_info", "trackingData", "tracking", "trackingResult", "jsonData", "data"]
+_JSON_VAR = re.compile(r"\b(" + "|".join(map(re.escape, _JSON_VAR_NAMES)) + r")\b\s*=\s*(?=[\{\[])")
+# Object starts must be followed by a key (or be empty); CSS and JS blocks are skipped
+_JSON_START = re.compile(r"\{(?=\s*[\"'}])|\[")
+_JSON_TOKEN = re.compile(r"[\[\]{}\"'\\]")
+_decoder = json.JSONDecoder()
 
-    This is the same robust extractor used across couriers: quick regex for
-    embedded variables followed by a balanced-brace scanner that respects
-    quoted strings and escaped characters.
-    """
-    import re
 
-    def try_load(s) -> Any | None:
+def _loads_lenient(s) -> Any | None:
+    """``json.loads`` that also accepts trailing commas and single quotes."""
+    try:
+        return json.loads(s)
+    except Exception:
+        s2: str = re.sub(r",\s*}\s*$", "}", s)
+        s2: str = re.sub(r",\s*]", "]", s2)
         try:
-            return json.loads(s)
+            return json.loads(s2)
         except Exception:
-            s2: str = re.sub(r",\s*}\s*$", "}", s)
-            s2: str = re.sub(r",\s*]", "]", s2)
             try:
-                return json.loads(s2)
+                return json.loads(s2.replace("'", '"'))
             except Exception:
-                try:
-                    return json.loads(s2.replace("'", '"'))
-                except Exception:
-                    return None
+                return None
 
-    var_names: list[str] = ["trackingInfo", "tracking_info", "trackingData", "tracking", "trackingResult", "jsonData", "data"]
 
-    def scan_from(start_idx):
-        if start_idx >= len(text):
-            return None
-        ch = text[start_idx]
-        if ch not in "[{":
+def _decode_at(text, idx) -> Any | None:
+    try:
+        return _decoder.raw_decode(text, idx)[0]
+    except (ValueError, RecursionError):
+        return None
+
+
+class BracketScanner:
+    """Resumable matcher for the bracket opened at the first ``{``/``[`` fed.
+
+    Brackets inside single- or double-quoted strings and escaped characters
+    are skipped; the regex jumps straight between significant characters.
+    ``feed`` can be called with consecutive pieces of a text (e.g. chunks of
+    a streamed response) and returns the index just past the closing bracket
+    in the piece where it is found. ``failed`` is set on a mismatched
+    bracket and ``stop`` is where scanning of the last piece stopped.
+    """
+
+    def __init__(self) -> None:
+        self.stack: list[str] = []
+        self.quote_char: str | None = None
+        self.escaped = False
+        self.failed = False
+        self.stop = 0
+
+    def feed(self, text, pos=0) -> int | None:
+        if self.failed:
             return None
-        stack = [ch]
-        i = start_idx + 1
-        quote_char = None
-        esc = False
-        while i < len(text):
-            c = text[i]
-            if esc:
-                esc = False
-                i += 1
+        skip = pos + 1 if self.escaped else -1
+        self.escaped = False
+        for m in _JSON_TOKEN.finditer(text, pos):
+            i = m.start()
+            if i < skip:
                 continue
+            c = text[i]
             if c == "\\":
-                esc = True
-                i += 1
-                continue
-            if quote_char:
-                if c == quote_char:
-                    quote_char = None
-                i += 1
-                continue
-            if c == '"' or c == "'":
-                quote_char: str = c
-                i += 1
-                continue
-            if c in "{[":
-                stack.append(c)
-            elif c in "}]":
-                opening = stack.pop() if stack else None
-                if (opening == "{" and c != "}") or (opening == "[" and c != "]"):
+                skip = i + 2
+                self.escaped = skip > len(text)
+            elif self.quote_char:
+                if c == self.quote_char:
+                    self.quote_char = None
+            elif c in "\"'":
+                self.quote_char = c
+            elif c in "{[":
+                self.stack.append(c)
+            else:
+                opening = self.stack.pop() if self.stack else None
+                self.stop = i + 1
+                if (opening == "{") != (c == "}"):
+                    self.failed = True
                     return None
-                if not stack:
-                    return text[start_idx : i + 1]
-            i += 1
+                if not self.stack:
+                    return i + 1
+        self.stop = len(text)
         return None
 
-    for name in var_names:
-        patt = re.compile(r"\b" + re.escape(name) + r"\b\s*=\s*([\{\[])")
-        mvar = patt.search(text)
-        if mvar:
-            candidate = scan_from(mvar.start(1))
-            if candidate:
-                v = try_load(candidate)
-                if v is not None:
-                    return v
-
-    m = re.search(r"(\{[\s\S]*?\}|\[[\s\S]*?\])", text)
-    if m:
-        candidate = m.group(1)
-        v = try_load(candidate)
-        if v is not None:
-            return v
 
-    for start_idx, ch in enumerate(text):
-        if ch not in "[{":
+def _balanced_end(text, start) -> tuple[int | None, int]:
+    """``(index just past the bracket closing text[start] or None, scan stop)``."""
+    scanner = BracketScanner()
+    end = scanner.feed(text, start)
+    return end, scanner.stop
+
+
+def json_vars(text):
+    """``(rank, value start)`` for each well-known JS variable assigned in ``text``.
+
+    ``rank`` is the variable's position in ``_JSON_VAR_NAMES``; rank 0 is
+    the one ``extract_json`` prefers over all others.
+    """
+    for m in _JSON_VAR.finditer(text):
+        yield _JSON_VAR_NAMES.index(m.group(1)), m.end()
+
+
+def loads_value(text) -> Any | None:
+    """Decode one JSON value the way ``extract_json`` does, or None."""
+    v = _decode_at(text, 0)
+    return _loads_lenient(text) if v is None else v
+
+
+def extract_json(text, content_type=None) -> Any | None:
+    """Try to extract the first JSON object or array from messy HTML/JS text.
+
+    This is the same robust extractor used across couriers, in one pass:
+
+    1. if ``content_type`` says JSON, or the text itself looks like a JSON
+       document, decode it directly;
+    2. values assigned to well-known JS variables (``trackingInfo = {...}``),
+       found with a single combined regex and decoded with
+       ``JSONDecoder.raw_decode`` (falling back to a lenient load for
+       trailing commas and single quotes);
+    3. the first balanced ``{...}``/``[...]`` segment that loads (strictly
+       or leniently).
+
+    Steps 2-3 are skipped for texts longer than ``EXTRACT_MAX_CHARS`` and
+    share a scan budget (see ``EXTRACT_SCAN_FACTOR``), so pathological
+    input such as thousands of unclosed brackets costs linear time.
+    """
+    if not text:
+        return None
+    stripped = text.strip()
+    if stripped[:1] in ("{", "[") or (content_type and "json" in content_type.lower()):
+        try:
+            return json.loads(stripped)
+        except (ValueError, RecursionError):
+            pass
+    if len(text) > EXTRACT_MAX_CHARS:
+        return None
+    budget = EXTRACT_SCAN_FACTOR * len(text) + EXTRACT_SCAN_SLACK
+
+    # Earlier names in _JSON_VAR_NAMES win over later ones
+    found = {}
+    for m in _JSON_VAR.finditer(text):
+        found.setdefault(m.group(1), m.end())
+    for name in _JSON_VAR_NAMES:
+        if name not in found:
             continue
-        stack = [ch]
-        i = start_idx + 1
-        quote_char = None
-        esc = False
-        while i < len(text):
-            c = text[i]
-            if esc:
-                esc = False
-                i += 1
-                continue
-            if c == "\\":
-                esc = True
-                i += 1
-                continue
-            if quote_char:
-                if c == quote_char:
-                    quote_char = None
-                i += 1
-                continue
-            if c == '"' or c == "'":
-                quote_char = c
-                i += 1
-                continue
-            if c in "{[":
-                stack.append(c)
-            elif c in "}]":
-                if not stack:
-                    break
-                opening = stack.pop()
-                if (opening == "{" and c != "}") or (opening == "[" and c != "]"):
-                    break
-                if not stack:
-                    candidate = text[start_idx : i + 1]
-                    v = try_load(candidate)
-                    if v is not None:
-                        return v
-                    break
-            i += 1
+        idx = found[name]
+        v = _decode_at(text, idx)
+        if v is None:
+            end, stop = _balanced_end(text, idx)
+            budget -= stop - idx
+            v = _loads_lenient(text[idx:end]) if end else None
+        if v is not None:
+            return v
 
+    # Candidate segments are matched up with the bracket scanner first and
+    # only the segment is decoded, so a failed attempt never costs more
+    # than the text it covers
+    pos = 0
+    while budget > 0:
+        m = _JSON_START.search(text, pos)
+        if not m:
+            break
+        start = m.start()
+        end, stop = _balanced_end(text, start)
+        budget -= stop - start
+        if end is not None:
+            v = _loads_lenient(text[start:end])
+            if v is not None:
+                return v
+        pos = start + 1
     return None
 
 
@@ -188,73 +240,122 @@ STATUS_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+_status_matchers: tuple | None = None
+
+
+def _compile_status_keywords():
+    """Compiled (delivered, error) keyword regexes, rebuilt when STATUS_KEYWORDS changes."""
+    global _status_matchers
+    key = (tuple(STATUS_KEYWORDS["delivered"]), tuple(STATUS_KEYWORDS["error"]))
+    if _status_matchers is None or _status_matchers[0] != key:
+        # Longest first so the alternation never stops on a shorter prefix
+        def alternation(words):
+            words = sorted({w for w in words if w}, key=len, reverse=True)
+            return re.compile("|".join(map(re.escape, words))) if words else None
+        _status_matchers = (key, alternation(key[0]), alternation(key[1]))
+    return _status_matchers[1], _status_matchers[2]
+
+
 def classify_status(status_text: str) -> str:
-    """Classify a free-form status string into 'delivered'|'error'|'other'."""
+    """Classify a free-form status string into 'delivered'|'error'|'other'.
+
+    Delivered keywords win over error keywords. Each keyword list is matched
+    with one precompiled regex, recompiled after ``STATUS_KEYWORDS`` is edited.
+    """
     if not status_text:
         return "other"
     s: str = str(status_text).lower()
-    for k in STATUS_KEYWORDS["delivered"]:
-        if k in s:
-            return "delivered"
-    for k in STATUS_KEYWORDS["error"]:
-        if k in s:
-            return "error"
+    delivered, error = _compile_status_keywords()
+    if delivered is not None and delivered.search(s):
+        return "delivered"
+    if error is not None and error.search(s):
+        return "error"
     return "other"
 
 
-def parse_time_to_dt(s):
-    """Parse a free-form timestamp string into a datetime.
+# Timestamp layouts seen from the couriers, tried in order before anything
+# slower: CJ/CVSNet/Hanjin "2025-12-16 11:13[:47]" (also with "T"), CUpost and
+# Korea Post "2025.12.16 11:13", and "2025/12/16" variants
+_TIME_NUMERIC = re.compile(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})\.?(?:[ T]+(\d{1,2}):(\d{2})(?::(\d{2}))?)?")
+# "16 Dec 2025 11:13" and "Dec 16, 2025 11:13"
+_TIME_DAY_MONTH = re.compile(r"(\d{1,2})\s+([A-Za-z]{3})[a-z]*\.?,?\s+(\d{4})(?:,?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?")
+_TIME_MONTH_DAY = re.compile(r"([A-Za-z]{3})[a-z]*\.?\s+(\d{1,2}),?\s+(\d{4})(?:,?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?")
+_MONTHS = {m: i for i, m in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+# Any YYYY MM DD [HH:MM[:SS]] sequence, e.g. "2025년 12월 16일 11:13"
+_TIME_LOOSE = re.compile(r"(\d{4})[^0-9]{0,3}(\d{1,2})[^0-9]{0,3}(\d{1,2})(?:[^0-9]+(\d{1,2}):(\d{2})(?::(\d{2}))?)?")
 
-    Tries dateutil.parser.parse when available (fuzzy parsing). Falls back
-    to simple regex-based extraction of YYYY/MM/DD[-] HH:MM[:SS] patterns.
-    Returns a timezone-naive datetime on success or None on failure.
-    """
-    if not s:
-        return None
-    s: str = str(s).strip()
+PARSE_TIME_CACHE_SIZE: int = 4096
+
+_dateutil_parser = None  # None: not tried yet; False: not installed
+
+
+def _fuzzy_parser():
+    """``dateutil.parser`` if installed; the import is attempted only once."""
+    global _dateutil_parser
+    if _dateutil_parser is None:
+        try:
+            from dateutil import parser as _parser
+            _dateutil_parser = _parser
+        except ImportError:
+            _dateutil_parser = False
+    return _dateutil_parser or None
+
+
+def _build_dt(year, month, day, hour=None, minute=None, second=None):
     try:
-        # Prefer dateutil if available for robust parsing
-        from dateutil import parser as _parser
-        dt = _parser.parse(s, fuzzy=True)
-        # Normalize to naive datetime (drop tzinfo)
-        if getattr(dt, 'tzinfo', None):
-            dt = dt.astimezone(tz=None).replace(tzinfo=None)
-        return dt
-    except Exception:
-        pass
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        return None
 
-    # Fallback: extract numeric date/time components using regex
-    import re
-    from datetime import datetime
 
-    # Examples it should handle: '2025-12-16 11:13:47', '2025.12.16 11:13', '2025/12/16 11:13', '16 Dec 2025 11:13'
-    # Try to find a YYYY, MM, DD pattern first
-    m = re.search(r"(\d{4})[^0-9]{0,3}(\d{1,2})[^0-9]{0,3}(\d{1,2})(?:[^0-9]+(\d{1,2}:\d{2}(?::\d{2})?))?", s)
+@lru_cache(maxsize=PARSE_TIME_CACHE_SIZE)
+def _parse_time(s):
+    m = _TIME_NUMERIC.fullmatch(s)
     if m:
-        year, month, day, timepart = m.group(1), m.group(2), m.group(3), m.group(4)
+        return _build_dt(*m.groups())
+    m = _TIME_DAY_MONTH.fullmatch(s)
+    if m and m.group(2).lower() in _MONTHS:
+        day, month, year, *hms = m.groups()
+        return _build_dt(year, _MONTHS[month.lower()], day, *hms)
+    m = _TIME_MONTH_DAY.fullmatch(s)
+    if m and m.group(1).lower() in _MONTHS:
+        month, day, year, *hms = m.groups()
+        return _build_dt(year, _MONTHS[month.lower()], day, *hms)
+
+    m = _TIME_LOOSE.search(s)
+    if m:
+        return _build_dt(*m.groups())
+
+    # Last resort: fuzzy parsing, when dateutil is installed
+    parser = _fuzzy_parser()
+    if parser is not None:
         try:
-            if timepart:
-                # Normalize timepart to HH:MM:SS
-                parts: list[str] | json.Any = timepart.split(':')
-                if len(parts) == 2:
-                    timepart: str | json.Any = timepart + ':00'
-                dtstr: str = f"{int(year):04d}-{int(month):02d}-{int(day):02d} {timepart}"
-                try:
-                    return datetime.strptime(dtstr, '%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    try:
-                        return datetime.strptime(dtstr, '%Y-%m-%d %H:%M')
-                    except Exception:
-                        return None
-            else:
-                return datetime(int(year), int(month), int(day))
-        except Exception:
+            dt = parser.parse(s, fuzzy=True)
+        except (ValueError, OverflowError):
             return None
-
-    # If nothing matched, return None
+        # Normalize to naive datetime (drop tzinfo)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(tz=None).replace(tzinfo=None)
+        return dt
     return None
 
 
+def parse_time_to_dt(s):
+    """Parse a free-form timestamp string into a datetime.
+
+    The courier layouts (``2025-12-16 11:13[:47]``, ``2025.12.16 11:13``,
+    ``2025/12/16``, ``16 Dec 2025 11:13``) are matched with precompiled
+    patterns first, then any ``YYYY MM DD [HH:MM[:SS]]`` sequence is
+    extracted, and only then is ``dateutil``'s fuzzy parser tried (if
+    installed). Results are memoized for the last ``PARSE_TIME_CACHE_SIZE``
+    distinct strings. Returns a timezone-naive datetime on success or None
+    on failure.
+    """
+    if not s:
+        return None
+    return _parse_time(str(s).strip())
+
+
 def normalize_history(history):
     """Normalize a list of history events so they are ordered oldest-first.
 
@@ -288,3 +389,10 @@ def normalize_history(history):
     others.sort(key=lambda x: x[0])
     out.extend([ev for (_idx, ev) in others])
     return out
+
+
+def event_key(ev):
+    """Identity of a history event: its (time, location, message)."""
+    if not isinstance(ev, dict):
+        return ev if isinstance(ev, (str, int, float)) else json.dumps(ev, sort_keys=True, default=str)
+    return (ev.get('time') or ev.get('timestamp') or '', ev.get('location') or '', ev.get('message') or '')